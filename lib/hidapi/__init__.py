@@ -34,4 +34,6 @@ from hidapi.udev import (
 				get_manufacturer,
 				get_product,
 				get_serial,
+				get_report_descriptor,
+				get_report_ids,
 			)
@@ -30,6 +30,8 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import os as _os
 import errno as _errno
+from fcntl import ioctl as _ioctl
+from struct import pack as _pack, unpack as _unpack
 from time import sleep
 from select import select as _select
 from pyudev import Context as _Context, Monitor as _Monitor, Device as _Device
@@ -78,7 +80,88 @@ def exit():
 	return True
 
 
-def _match(action, device, vendor_id=None, product_id=None, interface_number=None, hid_driver=None):
+# ioctls from linux/hidraw.h
+_HIDIOCGRDESCSIZE = 0x80044801
+_HIDIOCGRDESC = 0x90044802
+_HID_MAX_DESCRIPTOR_SIZE = 4096
+
+# report ids declared by the report descriptor of each hidraw node, with the
+# sysfs path of its HID device and the USB id they were read for; a replugged
+# device gets a new sysfs path, even if it gets the same node
+_report_ids = {}
+
+
+def get_report_descriptor(device_handle):
+	"""Get the report descriptor of a HID device.
+
+	:param device_handle: a device handle returned by open() or open_path().
+
+	:returns: the report descriptor bytes.
+	"""
+	assert device_handle
+	buffer = bytearray(4)
+	_ioctl(device_handle, _HIDIOCGRDESCSIZE, buffer, True)
+	size, = _unpack('I', bytes(buffer))
+	# struct hidraw_report_descriptor: size, value[HID_MAX_DESCRIPTOR_SIZE]
+	buffer = bytearray(_pack('I', size) + b'\x00' * _HID_MAX_DESCRIPTOR_SIZE)
+	_ioctl(device_handle, _HIDIOCGRDESC, buffer, True)
+	return bytes(buffer[4:4 + size])
+
+
+def _parse_report_ids(descriptor):
+	ids = set()
+	i = 0
+	while i < len(descriptor):
+		prefix = ord(descriptor[i:i + 1])
+		if prefix == 0xFE:
+			# long item: size, tag, data
+			i += 3 + ord(descriptor[i + 1:i + 2])
+			continue
+		size = (0, 1, 2, 4)[prefix & 0x03]
+		if prefix & 0xFC == 0x84 and size:
+			# global Report ID item
+			ids.add(ord(descriptor[i + 1:i + 2]))
+		i += 1 + size
+	return frozenset(ids)
+
+
+def _read_report_ids(device, hid_device):
+	# sysfs exposes the descriptor without opening the device
+	try:
+		descriptor = hid_device.attributes.get('report_descriptor')
+	except (AttributeError, KeyError, EnvironmentError):
+		descriptor = None
+	if descriptor is None:
+		try:
+			handle = _os.open(device.device_node, _os.O_RDONLY | _os.O_NONBLOCK)
+		except EnvironmentError:
+			return None
+		try:
+			descriptor = get_report_descriptor(handle)
+		except EnvironmentError:
+			return None
+		finally:
+			_os.close(handle)
+	return _parse_report_ids(bytes(descriptor))
+
+
+def _device_report_ids(device, hid_device, vid, pid):
+	key = (hid_device.sys_path, vid, pid)
+	cached = _report_ids.get(device.device_node)
+	if cached and cached[0] == key:
+		return cached[1]
+	ids = _read_report_ids(device, hid_device)
+	if ids is not None:
+		_report_ids[device.device_node] = (key, ids)
+	return ids
+
+
+def _hid_sys_path(device_path):
+	# the sysfs path of the HID device a hidraw node belongs to
+	return _os.path.realpath('/sys/class/hidraw/%s/device' % _os.path.basename(device_path))
+
+
+def _match(action, device, vendor_id=None, product_id=None, interface_number=None, hid_driver=None, report_id=None):
 	usb_device = device.find_parent('usb', 'usb_device')
 	# print ("* parent", action, device, "usb:", usb_device)
 	if not usb_device:
@@ -105,12 +188,19 @@ def _match(action, device, vendor_id=None, product_id=None, interface_number=Non
 
 		intf_device = device.find_parent('usb', 'usb_interface')
 		# print ("*** usb interface", action, device, "usb_interface:", intf_device)
-		if interface_number is None:
-			usb_interface = None if intf_device is None else intf_device.attributes.asint('bInterfaceNumber')
-		else:
-			usb_interface = None if intf_device is None else intf_device.attributes.asint('bInterfaceNumber')
+		usb_interface = None if intf_device is None else intf_device.attributes.asint('bInterfaceNumber')
+
+		# when looking for some report ids, the report descriptor tells which
+		# interface it is; the interface number only if it can't be read
+		ids = None if report_id is None else _device_report_ids(device, hid_device, vid, pid)
+		if ids is not None:
+			if not ids.intersection(report_id):
+				return
+		elif interface_number is not None:
 			if usb_interface is None or interface_number != usb_interface:
 				return
+		elif report_id is not None:
+			return
 
 		attrs = usb_device.attributes
 		d_info = DeviceInfo(path=device.device_node,
@@ -126,6 +216,7 @@ def _match(action, device, vendor_id=None, product_id=None, interface_number=Non
 
 	elif action == 'remove':
 		# print (dict(device), dict(usb_device))
+		_report_ids.pop(device.device_node, None)
 
 		d_info = DeviceInfo(path=device.device_node,
 							vendor_id=vid[-4:],
@@ -170,7 +261,7 @@ def monitor_glib(callback, *device_filters):
 							break
 				elif action == 'remove':
 					# the GLib notification does _not_ match!
-					pass
+					_report_ids.pop(device.device_node, None)
 		return True
 
 	try:
@@ -189,16 +280,17 @@ def monitor_glib(callback, *device_filters):
 	m.start()
 
 
-def enumerate(vendor_id=None, product_id=None, interface_number=None, hid_driver=None):
+def enumerate(vendor_id=None, product_id=None, interface_number=None, hid_driver=None, report_id=None):
 	"""Enumerate the HID Devices.
 
 	List all the HID devices attached to the system, optionally filtering by
-	vendor_id, product_id, and/or interface_number.
+	vendor_id, product_id, interface_number, hid_driver, and/or the report ids
+	(any of) declared by their report descriptor.
 
 	:returns: a list of matching ``DeviceInfo`` tuples.
 	"""
 	for dev in _Context().list_devices(subsystem='hidraw'):
-		dev_info = _match('add', dev, vendor_id, product_id, interface_number, hid_driver)
+		dev_info = _match('add', dev, vendor_id, product_id, interface_number, hid_driver, report_id)
 		if dev_info:
 			yield dev_info
 
@@ -228,6 +320,27 @@ def open_path(device_path):
 	return _os.open(device_path, _os.O_RDWR | _os.O_SYNC)
 
 
+def get_report_ids(device_path, device_handle):
+	"""Get the report ids declared by the report descriptor of a HID device.
+
+	:param device_path: the path of a ``DeviceInfo`` tuple returned by
+	enumerate().
+	:param device_handle: a device handle returned by open() or open_path(),
+	to read the report descriptor through if enumerate() has not seen it.
+
+	:returns: a frozenset of the report ids (empty if the device does not use
+	numbered reports), or ``None`` if the descriptor could not be read.
+	"""
+	assert device_handle
+	cached = _report_ids.get(device_path)
+	if cached and cached[0][0] == _hid_sys_path(device_path):
+		return cached[1]
+	try:
+		return _parse_report_ids(get_report_descriptor(device_handle))
+	except EnvironmentError:
+		pass
+
+
 def close(device_handle):
 	"""Close a HID device.
 
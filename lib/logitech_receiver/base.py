@@ -22,6 +22,7 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import threading as _threading
 from time import time as _timestamp
 from random import getrandbits as _random_bits
 
@@ -78,13 +79,17 @@ class DeviceUnreachable(_KwException):
 #
 #
 
-from .base_usb import ALL as _RECEIVER_USB_IDS
+from .base_usb import ALL as _RECEIVER_USB_IDS, HIDPP_REPORT_IDS as _HIDPP_REPORT_IDS
 
 def receivers():
 	"""List all the Linux devices exposed by the UR attached to the machine."""
+	seen = set()
 	for receiver_usb_id in _RECEIVER_USB_IDS:
 		for d in _hid.enumerate(*receiver_usb_id):
-			yield d
+			# a known receiver also matches the catch-all entry
+			if d.path not in seen:
+				seen.add(d.path)
+				yield d
 
 
 def notify_on_receivers_glib(callback):
@@ -100,15 +105,21 @@ def open_path(path):
 
 	:param path: the Linux device path.
 
-	The UR physical device may expose multiple linux devices with the same
-	interface, so we have to check for the right one. At this moment the only
-	way to distinguish betheen them is to do a test ping on an invalid
-	(attached) device number (i.e., 0), expecting a 'ping failed' reply.
+	The UR physical device may expose multiple linux devices, so we have to
+	check for the right one: only the HID++ interface declares the HID++
+	report ids in its report descriptor, as cached when enumerating.
 
 	:returns: an open receiver handle if this is the right Linux device, or
 	``None``.
 	"""
-	return _hid.open_path(path)
+	handle = _hid.open_path(path)
+	ids = _hid.get_report_ids(path, handle)
+	if ids is None or ids.intersection(_HIDPP_REPORT_IDS):
+		# if the descriptor can't be read, trust the interface number
+		return handle
+	if _log.isEnabledFor(_DEBUG):
+		_log.debug("%s is not a HID++ interface, report ids %s", path, sorted(ids))
+	_hid.close(handle)
 
 
 def open():
@@ -301,14 +312,24 @@ del namedtuple
 def request(handle, devnumber, request_id, *params):
 	"""Makes a feature call to a device and waits for a matching reply.
 
-	This function will wait for a matching reply indefinitely.
-
 	:param handle: an open UR handle.
 	:param devnumber: attached device number.
 	:param request_id: a 16-bit integer.
 	:param params: parameters for the feature call, 3 to 16 bytes.
 	:returns: the reply data, or ``None`` if some error occurred.
 	"""
+	try:
+		return checked_request(handle, devnumber, request_id, *params)
+	except DeviceUnreachable:
+		return None
+
+
+def checked_request(handle, devnumber, request_id, *params):
+	"""Same as request(), but tells apart the device not being reachable.
+
+	:raises DeviceUnreachable: if the receiver could not reach the device,
+	or there was no reply in time.
+	"""
 
 	# import inspect as _inspect
 	# print ('\n  '.join(str(s) for s in _inspect.stack()))
@@ -353,9 +374,10 @@ def request(handle, devnumber, request_id, *params):
 				if report_id == 0x10 and reply_data[:1] == b'\x8F' and reply_data[1:3] == request_data[:2]:
 					error = ord(reply_data[3:4])
 
-					# if error == _hidpp10.ERROR.resource_error: # device unreachable
-					# 	_log.warn("(%s) device %d error on request {%04X}: unknown device", handle, devnumber, request_id)
-					# 	raise DeviceUnreachable(number=devnumber, request=request_id)
+					if error == _hidpp10.ERROR.resource_error and devnumber != 0xFF: # device unreachable
+						if _log.isEnabledFor(_DEBUG):
+							_log.debug("(%s) device %d unreachable on request {%04X}", handle, devnumber, request_id)
+						raise DeviceUnreachable(number=devnumber, request=request_id)
 
 					# if error == _hidpp10.ERROR.unknown_device: # unknown device
 					# 	_log.error("(%s) device %d error on request {%04X}: unknown device", handle, devnumber, request_id)
@@ -413,7 +435,220 @@ def request(handle, devnumber, request_id, *params):
 
 	_log.warn("timeout (%0.2f/%0.2f) on device %d request {%04X} params [%s]",
 					delta, timeout, devnumber, request_id, _strhex(params))
-	# raise DeviceUnreachable(number=devnumber, request=request_id)
+	raise DeviceUnreachable(number=devnumber, request=request_id)
+
+
+"""How many requests request_many() keeps in flight at the same time.
+HID++ 2.0 replies can only be told apart by their SoftwareId, and there are
+only 8 SoftwareIds with the most significant bit set, so it can't be more than 8."""
+PIPELINE_WINDOW = 8
+
+
+def request_many(handle, devnumber, requests, window=PIPELINE_WINDOW, checked=False):
+	"""Makes a batch of calls to the same device, keeping up to `window` of
+	them in flight at the same time, and waits for all the matching replies.
+
+	:param handle: an open UR handle.
+	:param devnumber: attached device number.
+	:param requests: a sequence of ``(request_id, *params)`` tuples.
+	:param window: maximum number of requests in flight.
+	:returns: a list with the reply data for each request, in the same order
+	as the requests, with ``None`` for the requests that failed.
+
+	HID++ 2.0 requests get distinct SoftwareIds; replies to register requests
+	are matched in the order the requests were written, which is the order
+	the receiver processes them in.  Requests that got a 'busy' reply or no
+	reply at all are retried one by one with request().
+
+	:raises FeatureCallError: after all the replies have been collected, if a
+	HID++ 2.0 feature call returned with an error.
+	:raises DeviceUnreachable: with `checked`, if the device turned out to be
+	unreachable; the replies collected are in its `replies`.
+	"""
+	assert window > 0 and window <= PIPELINE_WINDOW
+
+	replies = [None] * len(requests)
+	pending = list(range(len(requests)))
+	pending.reverse()
+	in_flight = []
+	retry = []
+	feature_error = None
+	unreachable = False
+	free_swids = list(range(0x08, 0x10))
+
+	ihandle = int(handle)
+	notifications_hook = getattr(handle, 'notifications_hook', None)
+	_skip_incoming(handle, ihandle, notifications_hook)
+
+	while pending or in_flight:
+		while pending and len(in_flight) < window:
+			index = pending[-1]
+			request_id = requests[index][0]
+			params = requests[index][1:]
+			assert isinstance(request_id, int)
+
+			swid = None
+			if devnumber != 0xFF and request_id < 0x8000:
+				if not free_swids:
+					break
+				swid = free_swids[0]
+				request_id = (request_id & 0xFFF0) | swid
+
+			if params:
+				params = b''.join(_pack('B', p) if isinstance(p, int) else p for p in params)
+			else:
+				params = b''
+			request_data = _pack('!H', request_id) + params
+			# these replies have to match the first parameter as well
+			match = params[:1] if devnumber == 0xFF and request_id in (0x83B5, 0x81F1) else None
+			if any(f[2][:2] == request_data[:2] and f[3] == match for f in in_flight):
+				# can't tell the replies apart, wait for the one in flight
+				break
+
+			timeout = _RECEIVER_REQUEST_TIMEOUT if devnumber == 0xFF else _DEVICE_REQUEST_TIMEOUT
+			if request_id & 0xFF00 == 0x8300:
+				timeout *= 2
+
+			pending.pop()
+			if swid is not None:
+				free_swids.remove(swid)
+			write(ihandle, devnumber, request_data)
+			in_flight.append([index, request_id, request_data, match, swid, timeout, _timestamp() + timeout])
+
+		if not in_flight:
+			# SoftwareIds of timed-out requests are never reused, as late
+			# replies may still show up; do the rest one by one
+			retry.extend(pending)
+			break
+
+		timeout = max(0, min(f[6] for f in in_flight) - _timestamp())
+		reply = _read(handle, timeout)
+		done = None
+
+		if reply:
+			report_id, reply_devnumber, reply_data = reply
+			if reply_devnumber == devnumber:
+				for f in in_flight:
+					index, request_id, request_data, match = f[:4]
+
+					if report_id == 0x10 and reply_data[:1] == b'\x8F' and reply_data[1:3] == request_data[:2]:
+						error = ord(reply_data[3:4])
+						if error == _hidpp10.ERROR.busy:
+							retry.append(index)
+						elif error == _hidpp10.ERROR.resource_error and devnumber != 0xFF:
+							unreachable = True
+						elif _log.isEnabledFor(_DEBUG):
+							_log.debug("(%s) device 0x%02X error on request {%04X}: %d = %s",
+											handle, devnumber, request_id, error, _hidpp10.ERROR[error])
+						done = f
+						break
+
+					if reply_data[:1] == b'\xFF' and reply_data[1:3] == request_data[:2]:
+						error = ord(reply_data[3:4])
+						if error == _hidpp20.ERROR.busy:
+							retry.append(index)
+						else:
+							_log.error("(%s) device %d error on feature request {%04X}: %d = %s",
+											handle, devnumber, request_id, error, _hidpp20.ERROR[error])
+							if feature_error is None:
+								feature_error = _hidpp20.FeatureCallError(number=devnumber, request=request_id,
+																		error=error, params=request_data[2:])
+						done = f
+						break
+
+					if reply_data[:2] == request_data[:2] and (match is None or reply_data[2:3] == match):
+						replies[index] = reply_data[2:]
+						done = f
+						break
+			else:
+				# a reply was received, but did not match our requests in any way
+				# reset the timeout starting point
+				now = _timestamp()
+				for f in in_flight:
+					f[6] = max(f[6], now + f[5])
+
+			if done is None and notifications_hook:
+				n = make_notification(reply_devnumber, reply_data)
+				if n:
+					notifications_hook(n)
+
+		if done is not None:
+			in_flight.remove(done)
+			if done[4] is not None:
+				free_swids.append(done[4])
+
+		now = _timestamp()
+		for f in [f for f in in_flight if f[6] <= now]:
+			_log.warn("(%s) timeout on device %d pipelined request {%04X}", handle, devnumber, f[1])
+			in_flight.remove(f)
+			retry.append(f[0])
+
+	for index in sorted(retry):
+		try:
+			replies[index] = checked_request(handle, devnumber, *requests[index])
+		except DeviceUnreachable:
+			# the others would only time out as well
+			unreachable = True
+			break
+
+	if feature_error is not None:
+		raise feature_error
+	if unreachable and checked:
+		raise DeviceUnreachable(number=devnumber, replies=replies)
+
+	return replies
+
+
+def is_read(request_id):
+	"""Whether a request only reads from the device, without side effects:
+	HID++ 1.0 register reads, and the HID++ 2.0 root feature lookups."""
+	return request_id & 0xFD00 == 0x8100 or request_id < 0x0100
+
+
+class _Flight(object):
+	__slots__ = ('thread', 'done', 'result', 'error')
+
+	def __init__(self):
+		self.thread = _threading.current_thread()
+		self.done = _threading.Event()
+		self.result = None
+		self.error = None
+
+_flights = {}
+_flights_lock = _threading.Lock()
+
+
+def single_flight(key, function, *args):
+	"""Calls ``function(*args)``; other threads calling with the same `key`
+	while the call is in progress just wait for it, and get the same result
+	(or exception).  Meant for requests without side effects.
+	"""
+	with _flights_lock:
+		flight = _flights.get(key)
+		leader = flight is None
+		if leader:
+			flight = _flights[key] = _Flight()
+
+	if not leader:
+		if flight.thread is _threading.current_thread():
+			# called again from within the same call, e.g. while processing
+			# the notifications that came before its reply
+			return function(*args)
+		flight.done.wait()
+		if flight.error is not None:
+			raise flight.error
+		return flight.result
+
+	try:
+		flight.result = function(*args)
+		return flight.result
+	except Exception as e:
+		flight.error = e
+		raise
+	finally:
+		with _flights_lock:
+			del _flights[key]
+		flight.done.set()
 
 
 def ping(handle, devnumber):
@@ -26,11 +26,16 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 _DRIVER = ('hid-generic', 'generic-usb', 'logitech-djreceiver')
 
 
-# each tuple contains (vendor_id, product_id, usb interface number, hid driver)
-_unifying_receiver = lambda product_id: (0x046d, product_id, 2, _DRIVER)
-_nano_receiver = lambda product_id: (0x046d, product_id, 1, _DRIVER)
-_lenovo_receiver = lambda product_id: (0x17ef, product_id, 1, _DRIVER)
-_lightspeed_receiver = lambda product_id: (0x046d, product_id, 2, _DRIVER)
+# HID++ short and long reports, and DJ short reports
+HIDPP_REPORT_IDS = (0x10, 0x11, 0x20)
+
+# each tuple contains (vendor_id, product_id, usb interface number, hid driver,
+# report ids); the HID++ interface is told by the report ids declared in its
+# report descriptor, the interface number is only used if it can't be read
+_unifying_receiver = lambda product_id: (0x046d, product_id, 2, _DRIVER, HIDPP_REPORT_IDS)
+_nano_receiver = lambda product_id: (0x046d, product_id, 1, _DRIVER, HIDPP_REPORT_IDS)
+_lenovo_receiver = lambda product_id: (0x17ef, product_id, 1, _DRIVER, HIDPP_REPORT_IDS)
+_lightspeed_receiver = lambda product_id: (0x046d, product_id, 2, _DRIVER, HIDPP_REPORT_IDS)
 
 # standard Unifying receivers (marked with the orange Unifying logo)
 UNIFYING_RECEIVER_C52B    = _unifying_receiver(0xc52b)
@@ -57,6 +62,10 @@ LIGHTSPEED_RECEIVER_C539  = _lightspeed_receiver(0xc539)
 LIGHTSPEED_RECEIVER_C53a  = _lightspeed_receiver(0xc53a)
 LIGHTSPEED_RECEIVER_C53f  = _lightspeed_receiver(0xc53f)
 
+# any other Logitech receiver, by the HID++ reports its descriptor declares;
+# never by interface number alone
+OTHER_RECEIVER            = (0x046d, None, None, _DRIVER, HIDPP_REPORT_IDS)
+
 del _DRIVER, _unifying_receiver, _nano_receiver, _lenovo_receiver, _lightspeed_receiver
 
 
@@ -78,4 +87,5 @@ ALL = (
 		LIGHTSPEED_RECEIVER_C539,
 		LIGHTSPEED_RECEIVER_C53a,
 		LIGHTSPEED_RECEIVER_C53f,
+		OTHER_RECEIVER,
 	)
@@ -22,7 +22,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 from binascii import hexlify as _hexlify
-from struct import pack, unpack
+from struct import pack, unpack, Struct as _Struct
+from collections import namedtuple as _namedtuple
 try:
 	unicode
 	# if Python2, unicode_literals will mess our first (un)pack() argument
@@ -263,6 +264,40 @@ class KwException(Exception):
 			return self.args[0][k]
 
 
+class Schema(object):
+	"""The layout of (part of) a HID++ message payload, declared once: a
+	struct format and the names of its fields.  Decoded payloads are named
+	tuples.
+	"""
+	__slots__ = ('name', 'struct', 'record')
+
+	def __init__(self, name, fmt, fields):
+		self.name = name
+		self.struct = _Struct(str(fmt))
+		self.record = _namedtuple(name, fields)
+		assert len(self.record._fields) == len(self.struct.unpack(b'\x00' * self.struct.size)), name
+
+	@property
+	def size(self):
+		return self.struct.size
+
+	def decode(self, data, offset=0):
+		"""Decodes the payload, starting at `offset`.
+
+		:returns: a record, or ``None`` if there is no data or it is too short.
+		"""
+		if data is None or len(data) < offset + self.struct.size:
+			return None
+		return self.record._make(self.struct.unpack_from(data, offset))
+
+	def encode(self, *values):
+		return self.struct.pack(*values)
+
+	def __str__(self):
+		return '<Schema(%s %s)>' % (self.name, ' '.join(self.record._fields))
+	__unicode__ = __repr__ = __str__
+
+
 from collections import namedtuple
 
 """Firmware information."""
@@ -0,0 +1,183 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+## Copyright (C) 2012-2013  Daniel Pavel
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# Decoded input events (wheel, touch) streamed to interested consumers.
+#
+# The events are published from the listener thread, as the notifications
+# are processed.  Each subscriber gets its own bounded buffer, so a slow
+# consumer only loses its own (oldest) events, and never holds up the
+# listener.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading as _threading
+from collections import namedtuple, deque as _deque
+from time import time as _timestamp
+
+from logging import getLogger, DEBUG as _DEBUG
+_log = getLogger(__name__)
+del getLogger
+
+#
+# Event types; all of them start with the time the notification was processed.
+#
+
+"""A HIRES_WHEEL movement: `high_res` is the wheel resolution mode, `periods`
+the number of sampling periods covered, `delta_v` the vertical movement."""
+WheelEvent = namedtuple('WheelEvent', ('timestamp', 'high_res', 'periods', 'delta_v'))
+
+"""The HIRES_WHEEL ratchet was switched; `ratchet` is 1 for ratcheted, 0 for free-spinning."""
+RatchetEvent = namedtuple('RatchetEvent', ('timestamp', 'ratchet'))
+
+"""A TOUCHMOUSE_RAW_POINTS frame, with a TouchPoint for each finger touching the surface."""
+TouchEvent = namedtuple('TouchEvent', ('timestamp', 'points'))
+TouchPoint = namedtuple('TouchPoint', ('finger', 'x', 'y', 'width_x', 'width_y'))
+
+"""A TOUCHMOUSE_RAW_POINTS status change."""
+TouchStatusEvent = namedtuple('TouchStatusEvent', ('timestamp', 'button_down', 'mouse_lifted'))
+
+del namedtuple
+
+"""Default number of events a subscriber buffers before dropping the oldest."""
+DEFAULT_BUFFER = 256
+
+#
+#
+#
+
+class Subscription(object):
+	"""A stream of decoded events from one device.
+
+	Iterating it blocks until events arrive, and stops once the subscription
+	is closed (after delivering the events still buffered).  With `batch`,
+	iterating yields lists of all the events buffered at that moment instead
+	of single events.
+	"""
+	def __init__(self, device, kinds=None, maxlen=DEFAULT_BUFFER, batch=False):
+		assert maxlen > 0
+		self.device = device
+		self.kinds = tuple(kinds) if kinds else None
+		self.batch = batch
+		# events dropped because the consumer did not keep up
+		self.dropped = 0
+		self.closed = False
+		self._queue = _deque(maxlen=maxlen)
+		self._ready = _threading.Condition()
+
+	def _publish(self, event):
+		# runs on the listener thread, must never block for long
+		with self._ready:
+			if len(self._queue) == self._queue.maxlen:
+				self.dropped += 1
+			self._queue.append(event)
+			self._ready.notify()
+
+	def get(self, timeout=None):
+		"""Waits for the next event.
+
+		:returns: the event, or ``None`` on timeout or if the subscription was closed.
+		"""
+		with self._ready:
+			if not self._queue and not self.closed:
+				self._ready.wait(timeout)
+			if self._queue:
+				return self._queue.popleft()
+
+	def get_batch(self, timeout=None):
+		"""Waits for events, then takes all of them at once.
+
+		:returns: a list of events, empty on timeout or if the subscription was closed.
+		"""
+		with self._ready:
+			if not self._queue and not self.closed:
+				self._ready.wait(timeout)
+			events = list(self._queue)
+			self._queue.clear()
+			return events
+
+	def close(self):
+		"""Stops the subscription, waking up any waiting consumer."""
+		if not self.closed:
+			unsubscribe(self)
+			with self._ready:
+				self.closed = True
+				self._ready.notify_all()
+
+	def __iter__(self):
+		while True:
+			events = self.get_batch()
+			if events:
+				if self.batch:
+					yield events
+				else:
+					for e in events:
+						yield e
+			elif self.closed:
+				break
+
+	def __len__(self):
+		return len(self._queue)
+
+	def __str__(self):
+		return '<Subscription(%s,%d/%d,dropped=%d)>' % (self.device, len(self._queue), self._queue.maxlen, self.dropped)
+	__unicode__ = __repr__ = __str__
+
+
+def subscribe(device, kinds=None, maxlen=DEFAULT_BUFFER, batch=False):
+	"""Starts streaming the decoded events of a device.
+
+	:param kinds: event types to receive (e.g. ``(WheelEvent, )``), all by default.
+	:param maxlen: how many events to buffer for a slow consumer.
+	:param batch: iterate over lists of events instead of single events.
+	"""
+	s = Subscription(device, kinds, maxlen, batch)
+	# replace the tuple instead of changing it, the listener thread may be iterating it
+	device._subscriptions = device._subscriptions + (s, )
+	return s
+
+
+def unsubscribe(subscription):
+	device = subscription.device
+	device._subscriptions = tuple(s for s in device._subscriptions if s is not subscription)
+
+
+def close_all(device):
+	"""Closes all the subscriptions to a device, e.g. when it is unpaired."""
+	for s in device._subscriptions:
+		s.close()
+
+
+def wants(device, kind):
+	"""Quick check done before decoding an event, so nothing is decoded when nobody listens."""
+	for s in device._subscriptions:
+		if s.kinds is None or kind in s.kinds:
+			return True
+	return False
+
+
+def publish(device, kind, *fields):
+	"""Hands a new event to all the subscribers interested in its kind."""
+	event = None
+	for s in device._subscriptions:
+		if s.kinds is None or kind in s.kinds:
+			if event is None:
+				event = kind(_timestamp(), *fields)
+			s._publish(event)
+	if event is not None and _log.isEnabledFor(_DEBUG):
+		_log.debug("%s: published %s", device, event)
@@ -19,6 +19,8 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from time import time as _timestamp
+
 from logging import getLogger  # , DEBUG as _DEBUG
 _log = getLogger(__name__)
 del getLogger
@@ -28,6 +30,7 @@ from .common import (strhex as _strhex,
 					bytes2int as _bytes2int,
 					int2bytes as _int2bytes,
 					NamedInts as _NamedInts,
+					Schema as _Schema,
 					FirmwareInfo as _FirmwareInfo)
 from .hidpp20 import FIRMWARE_KIND, BATTERY_STATUS
 
@@ -131,24 +134,147 @@ REGISTERS = _NamedInts(
 				firmware=0xF1,
 			)
 
+"""Layouts of the battery registers (and of the notifications with the same
+number), by register."""
+BATTERY_LAYOUT = {
+				REGISTERS.battery_charge: _Schema('BatteryCharge', '!BxB', ('charge', 'status')),
+				REGISTERS.battery_status: _Schema('BatteryStatus', '!BB', ('level', 'charging')),
+			}
+
+"""How long a register read stays good, in seconds; ``None`` means until the
+register is written, or the device links again.  Registers not listed here
+are always read from the device."""
+REGISTER_TTL = {
+				REGISTERS.receiver_connection: None,
+				REGISTERS.receiver_info: None,
+				# other processes (solaar-cli) may change it
+				REGISTERS.notifications: 30,
+				REGISTERS.firmware: None,
+				REGISTERS.battery_status: 60,
+				REGISTERS.battery_charge: 60,
+			}
+
+# writing a register may change what some other registers read
+_WRITE_INVALIDATES = {
+				# (un)pairing changes the device slots
+				REGISTERS.receiver_pairing: (REGISTERS.receiver_connection, REGISTERS.receiver_info),
+			}
+
+#
+# register cache
+#
+
+class RegisterCache(dict):
+	"""The register reads of a device, by ``(register, *params)``."""
+	def __init__(self):
+		super(RegisterCache, self).__init__()
+		# bumped on each invalidation, so reads that were in flight at
+		# the time are not stored
+		self.generation = 0
+
+
+def _cache_key(register_number, params):
+	return (int(register_number) & 0x2FF, ) + tuple(params)
+
+
+def _cached(device, key, max_age):
+	cache = getattr(device, '_register_cache', None)
+	if cache is None or key[0] not in REGISTER_TTL:
+		return
+	entry = cache.get(key)
+	if entry is not None:
+		ttl = REGISTER_TTL[key[0]]
+		if max_age is not None:
+			ttl = max_age if ttl is None else min(ttl, max_age)
+		if ttl is None or _timestamp() - entry[0] < ttl:
+			return entry[1]
+
+
+def _store(device, key, generation, timestamp, reply):
+	cache = getattr(device, '_register_cache', None)
+	if reply is not None and cache is not None and key[0] in REGISTER_TTL and cache.generation == generation:
+		cache[key] = (timestamp, reply)
+
+
+def invalidate_registers(device, register_number=None, *params):
+	"""Forgets the cached register reads of a device: all of them, the ones
+	of a register (with any parameters), or a single one."""
+	cache = getattr(device, '_register_cache', None)
+	if cache is None:
+		return
+	cache.generation += 1
+	if register_number is None:
+		cache.clear()
+	elif params:
+		cache.pop(_cache_key(register_number, params), None)
+	else:
+		register = int(register_number) & 0x2FF
+		for key in [k for k in cache if k[0] == register]:
+			cache.pop(key, None)
+
 #
 # functions
 #
 
-def read_register(device, register_number, *params):
+def read_register(device, register_number, *params, **kwargs):
+	"""Reads a register, or answers from the cache if the register has a
+	REGISTER_TTL and was read recently enough.
+
+	:param max_age: (keyword) don't answer from a cached read older than this
+	many seconds; 0 always reads from the device.
+	"""
 	assert device, 'tried to read register %02X from invalid device %s' % (register_number, device)
+	max_age = kwargs.pop('max_age', None)
+	assert not kwargs, kwargs
+
+	key = _cache_key(register_number, params)
+	reply = _cached(device, key, max_age)
+	if reply is not None:
+		return reply
+
+	cache = getattr(device, '_register_cache', None)
+	generation = cache.generation if cache is not None else None
+	timestamp = _timestamp()
 	# support long registers by adding a 2 in front of the register number
-	request_id = 0x8100 | (int(register_number) & 0x2FF)
-	return device.request(request_id, *params)
+	request_id = 0x8100 | key[0]
+	reply = device.request(request_id, *params)
+	_store(device, key, generation, timestamp, reply)
+	return reply
 
 
 def write_register(device, register_number, *value):
 	assert device, 'tried to write register %02X to invalid device %s' % (register_number, device)
+	# whatever the outcome, what was read before may not be good anymore
+	invalidate_registers(device, register_number)
+	for register in _WRITE_INVALIDATES.get(int(register_number), ()):
+		invalidate_registers(device, register)
 	# support long registers by adding a 2 in front of the register number
 	request_id = 0x8000 | (int(register_number) & 0x2FF)
 	return device.request(request_id, *value)
 
 
+def read_registers(device, *registers):
+	"""Reads several registers in one pipelined batch; the ones in the
+	cache are not read again.
+
+	:param registers: ``(register_number, *params)`` tuples.
+	:returns: a list with the reply for each register, ``None`` where the read failed.
+	"""
+	assert device, 'tried to read registers from invalid device %s' % device
+	keys = [_cache_key(r[0], r[1:]) for r in registers]
+	replies = [_cached(device, k, None) for k in keys]
+	missing = [i for i, reply in enumerate(replies) if reply is None]
+	if missing:
+		cache = getattr(device, '_register_cache', None)
+		generation = cache.generation if cache is not None else None
+		timestamp = _timestamp()
+		read = device.request_many([(0x8100 | keys[i][0],) + tuple(registers[i][1:]) for i in missing])
+		for i, reply in zip(missing, read):
+			replies[i] = reply
+			_store(device, keys[i], generation, timestamp, reply)
+	return replies
+
+
 def get_battery(device):
 	assert device
 	assert device.kind is not None
@@ -182,9 +308,13 @@ def get_battery(device):
 
 
 def parse_battery_status(register, reply):
+	layout = BATTERY_LAYOUT[register].decode(reply)
+	if layout is None:
+		return
+
 	if register == REGISTERS.battery_charge:
-		charge = ord(reply[:1])
-		status_byte = ord(reply[2:3]) & 0xF0
+		charge = layout.charge
+		status_byte = layout.status & 0xF0
 		status_text = (BATTERY_STATUS.discharging if status_byte == 0x30
 				else BATTERY_STATUS.recharging if status_byte == 0x50
 				else BATTERY_STATUS.full if status_byte == 0x90
@@ -192,7 +322,7 @@ def parse_battery_status(register, reply):
 		return charge, status_text
 
 	if register == REGISTERS.battery_status:
-		status_byte = ord(reply[:1])
+		status_byte = layout.level
 		charge = (BATTERY_APPOX.full if status_byte == 7 # full
 			else BATTERY_APPOX.good if status_byte == 5 # good
 			else BATTERY_APPOX.low if status_byte == 3 # low
@@ -200,7 +330,7 @@ def parse_battery_status(register, reply):
 			# pure 'charging' notifications may come without a status
 			else BATTERY_APPOX.empty)
 
-		charging_byte = ord(reply[1:2])
+		charging_byte = layout.charging
 		if charging_byte == 0x00:
 			status_text = BATTERY_STATUS.discharging
 		elif charging_byte & 0x21 == 0x21:
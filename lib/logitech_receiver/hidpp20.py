@@ -31,8 +31,7 @@ from .common import (FirmwareInfo as _FirmwareInfo,
 					ReprogrammableKeyInfoV4 as _ReprogrammableKeyInfoV4,
 					KwException as _KwException,
 					NamedInts as _NamedInts,
-					pack as _pack,
-					unpack as _unpack)
+					Schema as _Schema)
 from . import special_keys
 
 #
@@ -152,6 +151,67 @@ ERROR = _NamedInts(
 				busy=0x08,
 				unsupported=0x09)
 
+#
+# Message layouts
+#
+
+_BATTERY_LEVEL = _Schema('BatteryLevel', '!BBB', ('discharge', 'next_level', 'status'))
+_KEY_INFO = _Schema('KeyInfo', '!HHBBBB', ('cid', 'task', 'flags', 'pos', 'group', 'gmask'))
+
+"""Reply layouts of the feature functions, by ``(feature, function)``."""
+REPLY = {
+				(FEATURE.ROOT, 0x00): _Schema('FeatureIndex', '!BBB', ('index', 'flags', 'version')),
+				(FEATURE.FEATURE_SET, 0x00): _Schema('FeatureCount', '!B', ('count', )),
+				(FEATURE.FEATURE_SET, 0x10): _Schema('FeatureId', '!HB', ('feature', 'flags')),
+				(FEATURE.DEVICE_FW_VERSION, 0x00): _Schema('EntityCount', '!B', ('count', )),
+				(FEATURE.DEVICE_FW_VERSION, 0x10): _Schema('EntityInfo', '!B3sBBHx', ('kind', 'name', 'major', 'minor', 'build')),
+				(FEATURE.DEVICE_NAME, 0x00): _Schema('NameLength', '!B', ('length', )),
+				(FEATURE.DEVICE_NAME, 0x20): _Schema('DeviceKind', '!B', ('kind', )),
+				(FEATURE.BATTERY_STATUS, 0x00): _BATTERY_LEVEL,
+				(FEATURE.REPROG_CONTROLS, 0x00): _Schema('KeyCount', '!B', ('count', )),
+				(FEATURE.REPROG_CONTROLS, 0x10): _KEY_INFO,
+				(FEATURE.REPROG_CONTROLS_V4, 0x00): _Schema('KeyCount', '!B', ('count', )),
+				(FEATURE.REPROG_CONTROLS_V4, 0x10): _KEY_INFO,
+				(FEATURE.REPROG_CONTROLS_V4, 0x20): _Schema('KeyReporting', '!HBH', ('cid', 'flags', 'remapped')),
+				(FEATURE.MOUSE_POINTER, 0x00): _Schema('PointerInfo', '!HB', ('dpi', 'flags')),
+				(FEATURE.VERTICAL_SCROLLING, 0x00): _Schema('RollerInfo', '!BBB', ('roller', 'ratchet', 'lines')),
+				(FEATURE.HI_RES_SCROLLING, 0x00): _Schema('HiResScrolling', '!BB', ('mode', 'resolution')),
+				(FEATURE.POINTER_SPEED, 0x00): _Schema('PointerSpeed', '!BB', ('speed', 'fraction')),
+				(FEATURE.LOWRES_WHEEL, 0x00): _Schema('WheelReporting', '!B', ('flags', )),
+				(FEATURE.HIRES_WHEEL, 0x00): _Schema('WheelCapabilities', '!BB', ('multiplier', 'flags')),
+				(FEATURE.HIRES_WHEEL, 0x10): _Schema('WheelMode', '!B', ('mode', )),
+				(FEATURE.HIRES_WHEEL, 0x30): _Schema('RatchetSwitch', '!B', ('state', )),
+			}
+
+"""Request parameter layouts of the feature functions, by ``(feature, function)``."""
+REQUEST = {
+				(FEATURE.ROOT, 0x00): _Schema('GetFeature', '!H', ('feature', )),
+				(FEATURE.REPROG_CONTROLS_V4, 0x20): _Schema('GetKeyReporting', '!H', ('cid', )),
+			}
+
+"""Notification layouts, by ``(feature, address)``."""
+EVENT = {
+				(FEATURE.BATTERY_STATUS, 0x00): _BATTERY_LEVEL,
+				(FEATURE.SOLAR_DASHBOARD, 0x00): _Schema('SolarCharge', '!BHH4s', ('charge', 'lux', 'adc', 'check')),
+				(FEATURE.TOUCHMOUSE_RAW_POINTS, 0x00): _Schema('TouchPoint', '!BBBB', ('x_high', 'y_high', 'xy_low', 'size')),
+				(FEATURE.TOUCHMOUSE_RAW_POINTS, 0x10): _Schema('TouchStatus', '!B', ('flags', )),
+				(FEATURE.HIRES_WHEEL, 0x00): _Schema('WheelMovement', '!bh', ('flags', 'delta_v')),
+				(FEATURE.HIRES_WHEEL, 0x10): _Schema('RatchetChange', '!B', ('flags', )),
+			}
+
+
+_GET_FEATURE = REQUEST[(FEATURE.ROOT, 0x00)]
+_FEATURE_INDEX = REPLY[(FEATURE.ROOT, 0x00)]
+_FEATURE_COUNT = REPLY[(FEATURE.FEATURE_SET, 0x00)]
+
+
+def decode_reply(feature, function, reply):
+	"""Decodes the reply to a feature function, see REPLY.
+
+	:returns: a record, or ``None`` if there is no reply.
+	"""
+	return REPLY[(feature, function)].decode(reply)
+
 #
 #
 #
@@ -170,7 +230,7 @@ class FeatureCallError(_KwException):
 
 class FeaturesArray(object):
 	"""A sequence of features supported by a HID++ 2.0 device."""
-	__slots__ = ('supported', 'device', 'features')
+	__slots__ = ('supported', 'device', 'features', 'generation', '_absent', '_versions')
 	assert FEATURE.ROOT == 0x0000
 
 	def __init__(self, device):
@@ -178,6 +238,23 @@ class FeaturesArray(object):
 		self.device = device
 		self.supported = True
 		self.features = None
+		# bumped each time the feature table is (re)loaded, so what was
+		# worked out from the features can tell when it is out of date
+		self.generation = 0
+		# Feature IDs the device said it does not have
+		self._absent = set()
+		# versions of the features looked up, by Feature ID
+		self._versions = {}
+
+	def invalidate(self):
+		"""Forgets the feature table, e.g. after a firmware update; it is
+		loaded again when next needed."""
+		if self.device is not None:
+			self.supported = True
+		self.features = None
+		self._absent.clear()
+		self._versions.clear()
+		self.generation += 1
 
 	def __del__(self):
 		self.supported = False
@@ -202,23 +279,24 @@ class FeaturesArray(object):
 				self.device = None
 				return False
 
-			reply = self.device.request(0x0000, _pack('!H', FEATURE.FEATURE_SET))
+			reply = self.device.request(0x0000, _GET_FEATURE.encode(FEATURE.FEATURE_SET))
 			if reply is None:
 				self.supported = False
 			else:
-				fs_index = ord(reply[0:1])
+				fs_index = _FEATURE_INDEX.decode(reply).index
 				if fs_index:
-					count = self.device.request(fs_index << 8)
+					count = _FEATURE_COUNT.decode(self.device.shared_request(fs_index << 8))
 					if count is None:
 						_log.warn("FEATURE_SET found, but failed to read features count")
 						# most likely the device is unavailable
 						return False
 					else:
-						count = ord(count[:1])
+						count = count.count
 						assert count >= fs_index
 						self.features = [None] * (1 + count)
 						self.features[0] = FEATURE.ROOT
 						self.features[fs_index] = FEATURE.FEATURE_SET
+						self.generation += 1
 						return True
 				else:
 					self.supported = False
@@ -234,10 +312,9 @@ class FeaturesArray(object):
 					raise IndexError(index)
 
 				if self.features[index] is None:
-					feature = self.device.feature_request(FEATURE.FEATURE_SET, 0x10, index)
+					feature = decode_reply(FEATURE.FEATURE_SET, 0x10, self.device.feature_read(FEATURE.FEATURE_SET, 0x10, index))
 					if feature:
-						feature, = _unpack('!H', feature[:2])
-						self.features[index] = FEATURE[feature]
+						self.features[index] = FEATURE[feature.feature]
 
 				return self.features[index]
 
@@ -247,23 +324,37 @@ class FeaturesArray(object):
 
 	def __contains__(self, featureId):
 		"""Tests whether the list contains given Feature ID"""
-		if self._check():
-			ivalue = int(featureId)
-
-			may_have = False
-			for f in self.features:
-				if f is None:
-					may_have = True
-				elif ivalue == int(f):
-					return True
+		return self.lookup(featureId) is True
+
+	def lookup(self, featureId):
+		"""Whether the device has the given Feature ID.
+
+		:returns: ``True`` or ``False``, or ``None`` if the device could not
+		tell right now.
+		"""
+		if not self._check():
+			return None if self.supported else False
+
+		ivalue = int(featureId)
+		may_have = False
+		for f in self.features:
+			if f is None:
+				may_have = True
+			elif ivalue == int(f):
+				return True
 
-			if may_have:
-				reply = self.device.request(0x0000, _pack('!H', ivalue))
-				if reply:
-					index = ord(reply[0:1])
-					if index:
-						self.features[index] = FEATURE[ivalue]
-						return True
+		if not may_have or ivalue in self._absent:
+			return False
+
+		reply = _FEATURE_INDEX.decode(self.device.request(0x0000, _GET_FEATURE.encode(ivalue)))
+		if reply is None:
+			return None
+		if reply.index:
+			self.features[reply.index] = FEATURE[ivalue]
+			self._versions[ivalue] = reply.version
+			return True
+		self._absent.add(ivalue)
+		return False
 
 	def index(self, featureId):
 		"""Gets the Feature Index for a given Feature ID"""
@@ -276,15 +367,25 @@ class FeaturesArray(object):
 				elif ivalue == int(f):
 					return index
 
-			if may_have:
-				reply = self.device.request(0x0000, _pack('!H', ivalue))
+			if may_have and ivalue not in self._absent:
+				reply = _FEATURE_INDEX.decode(self.device.request(0x0000, _GET_FEATURE.encode(ivalue)))
 				if reply:
-					index = ord(reply[0:1])
-					self.features[index] = FEATURE[ivalue]
-					return index
+					if reply.index:
+						self.features[reply.index] = FEATURE[ivalue]
+						self._versions[ivalue] = reply.version
+						return reply.index
+					self._absent.add(ivalue)
 
 		raise ValueError("%r not in list" % featureId)
 
+	def version(self, featureId):
+		"""The version of a feature, if it was already looked up; does not
+		talk to the device.
+
+		:returns: the version number, or ``None`` if not known.
+		"""
+		return self._versions.get(int(featureId))
+
 	def __iter__(self):
 		if self._check():
 			yield FEATURE.ROOT
@@ -305,66 +406,78 @@ class KeysArray(object):
 	"""A sequence of key mappings supported by a HID++ 2.0 device."""
 	__slots__ = ('device', 'keys', 'keyversion')
 
-	def __init__(self, device, count):
+	def __init__(self, device, count, keyversion=1):
 		assert device is not None
 		self.device = device
-		self.keyversion = 0
+		self.keyversion = keyversion
 		self.keys = [None] * count
 
+	def _fetch(self, indices):
+		"""Reads the key info (and, for REPROG_CONTROLS_V4, the remapping) of
+		all the given keys with pipelined requests."""
+		indices = [i for i in indices if self.keys[i] is None]
+		if not indices:
+			return
+
+		# TODO: add here additional variants for other REPROG_CONTROLS
+		feature = FEATURE.REPROG_CONTROLS_V4 if self.keyversion == 4 else FEATURE.REPROG_CONTROLS
+		replies = _feature_request_each(self.device, feature, [(0x10, i) for i in indices])
+		if not replies:
+			return
+
+		keys = []
+		for index, keydata in zip(indices, replies):
+			keydata = _KEY_INFO.decode(keydata)
+			if keydata:
+				keys.append((index, ) + keydata)
+
+		if self.keyversion == 4:
+			get_reporting = REQUEST[(feature, 0x20)]
+			requests = [(0x20, get_reporting.encode(k[1])) for k in keys]
+			remaps = _feature_request_each(self.device, feature, requests) or [None] * len(keys)
+
+		for i, (index, key, key_task, flags, pos, group, gmask) in enumerate(keys):
+			ctrl_id_text = special_keys.CONTROL[key]
+			ctrl_task_text = special_keys.TASK[key_task]
+			if self.keyversion == 4:
+				# if key not mapped map it to itself for display
+				remapped = key
+				reporting = decode_reply(feature, 0x20, remaps[i])
+				if reporting and reporting.remapped:
+					remapped = reporting.remapped
+				remapped_text = special_keys.CONTROL[remapped]
+				self.keys[index] = _ReprogrammableKeyInfoV4(index, ctrl_id_text, ctrl_task_text, flags, pos, group, gmask, remapped_text)
+			else:
+				self.keys[index] = _ReprogrammableKeyInfo(index, ctrl_id_text, ctrl_task_text, flags)
+
 	def __getitem__(self, index):
 		if isinstance(index, int):
 			if index < 0 or index >= len(self.keys):
 				raise IndexError(index)
 
-			# TODO: add here additional variants for other REPROG_CONTROLS
 			if self.keys[index] is None:
-				keydata = feature_request(self.device, FEATURE.REPROG_CONTROLS, 0x10, index)
-				self.keyversion=1
-				if keydata is None:
-					keydata = feature_request(self.device, FEATURE.REPROG_CONTROLS_V4, 0x10, index)
-					self.keyversion=4
-				if keydata:
-					key, key_task, flags, pos, group, gmask = _unpack('!HHBBBB', keydata[:8])
-					ctrl_id_text = special_keys.CONTROL[key]
-					ctrl_task_text = special_keys.TASK[key_task]
-					if self.keyversion == 1:
-						self.keys[index] = _ReprogrammableKeyInfo(index, ctrl_id_text, ctrl_task_text, flags)
-					if self.keyversion == 4:
-						try:
-							mapped_data = feature_request(self.device, FEATURE.REPROG_CONTROLS_V4, 0x20, key&0xff00, key&0xff)
-							if mapped_data:
-								remap_key, remap_flag, remapped = _unpack('!HBH', mapped_data[:5])
-								# if key not mapped map it to itself for display
-								if remapped == 0:
-									remapped = key
-						except Exception:
-							remapped = key
-							remap_key = key
-							remap_flag = 0
-
-						remapped_text = special_keys.CONTROL[remapped]
-						self.keys[index] = _ReprogrammableKeyInfoV4(index, ctrl_id_text, ctrl_task_text, flags, pos, group, gmask, remapped_text)
-
+				self._fetch((index, ))
 			return self.keys[index]
 
 		elif isinstance(index, slice):
-			indices = index.indices(len(self.keys))
-			return [self.__getitem__(i) for i in range(*indices)]
+			indices = range(*index.indices(len(self.keys)))
+			self._fetch(indices)
+			return [self.keys[i] for i in indices]
 
 	def index(self, value):
 		for index, k in enumerate(self.keys):
 			if k is not None and int(value) == int(k.key):
 				return index
 
+		self._fetch(range(len(self.keys)))
 		for index, k in enumerate(self.keys):
-			if k is None:
-				k = self.__getitem__(index)
-				if k is not None:
-					return index
+			if k is not None and int(value) == int(k.key):
+				return index
 
 	def __iter__(self):
-		for k in range(0, len(self.keys)):
-			yield self.__getitem__(k)
+		self._fetch(range(len(self.keys)))
+		for k in self.keys:
+			yield k
 
 	def __len__(self):
 		return len(self.keys)
@@ -380,29 +493,67 @@ def feature_request(device, feature, function=0x00, *params):
 			return device.request((feature_index << 8) + (function & 0xFF), *params)
 
 
+def feature_read(device, feature, function=0x00, *params):
+	"""Same as feature_request(), for functions that only read from the
+	device: identical calls made at the same time share a single request."""
+	if device.online and device.features:
+		if feature in device.features:
+			feature_index = device.features.index(int(feature))
+			return device.shared_request((feature_index << 8) + (function & 0xFF), *params)
+
+
+def feature_request_many(device, feature, requests):
+	"""Makes several calls to the same feature with pipelined requests.
+
+	:param requests: ``(function, *params)`` tuples.
+	:returns: a list with the reply for each call, or ``None`` if the feature
+	is not available.
+	"""
+	if device.online and device.features:
+		if feature in device.features:
+			feature_index = device.features.index(int(feature))
+			requests = [((feature_index << 8) + (r[0] & 0xFF), ) + tuple(r[1:]) for r in requests]
+			return device.request_many(requests)
+
+
+def _feature_request_each(device, feature, requests):
+	"""Like feature_request_many, but if some request fails the others are
+	sent one by one, and the failed ones answer ``None``."""
+	try:
+		return feature_request_many(device, feature, requests)
+	except FeatureCallError:
+		replies = []
+		for r in requests:
+			try:
+				replies.append(feature_request(device, feature, *r))
+			except FeatureCallError:
+				replies.append(None)
+		return replies
+
+
 def get_firmware(device):
 	"""Reads a device's firmware info.
 
 	:returns: a list of FirmwareInfo tuples, ordered by firmware layer.
 	"""
-	count = feature_request(device, FEATURE.DEVICE_FW_VERSION)
+	count = decode_reply(FEATURE.DEVICE_FW_VERSION, 0x00, feature_read(device, FEATURE.DEVICE_FW_VERSION))
 	if count:
-		count = ord(count[:1])
+		count = count.count
 
 		fw = []
 		for index in range(0, count):
-			fw_info = feature_request(device, FEATURE.DEVICE_FW_VERSION, 0x10, index)
-			if fw_info:
-				level = ord(fw_info[:1]) & 0x0F
+			reply = feature_read(device, FEATURE.DEVICE_FW_VERSION, 0x10, index)
+			entity = decode_reply(FEATURE.DEVICE_FW_VERSION, 0x10, reply)
+			if entity:
+				level = entity.kind & 0x0F
 				if level == 0 or level == 1:
-					name, version_major, version_minor, build = _unpack('!3sBBH', fw_info[1:8])
-					version = '%02X.%02X' % (version_major, version_minor)
-					if build:
-						version += '.B%04X' % build
-					extras = fw_info[9:].rstrip(b'\x00') or None
-					fw_info = _FirmwareInfo(FIRMWARE_KIND[level], name.decode('ascii'), version, extras)
+					version = '%02X.%02X' % (entity.major, entity.minor)
+					if entity.build:
+						version += '.B%04X' % entity.build
+					extras = reply[9:].rstrip(b'\x00') or None
+					fw_info = _FirmwareInfo(FIRMWARE_KIND[level], entity.name.decode('ascii'), version, extras)
 				elif level == FIRMWARE_KIND.Hardware:
-					fw_info = _FirmwareInfo(FIRMWARE_KIND.Hardware, '', str(ord(fw_info[1:2])), None)
+					fw_info = _FirmwareInfo(FIRMWARE_KIND.Hardware, '', str(ord(entity.name[:1])), None)
 				else:
 					fw_info = _FirmwareInfo(FIRMWARE_KIND.Other, '', '', None)
 
@@ -419,9 +570,9 @@ def get_kind(device):
 	:returns: a string describing the device type, or ``None`` if the device is
 	not available or does not support the ``DEVICE_NAME`` feature.
 	"""
-	kind = feature_request(device, FEATURE.DEVICE_NAME, 0x20)
+	kind = decode_reply(FEATURE.DEVICE_NAME, 0x20, feature_read(device, FEATURE.DEVICE_NAME, 0x20))
 	if kind:
-		kind = ord(kind[:1])
+		kind = kind.kind
 		# if _log.isEnabledFor(_DEBUG):
 		# 	_log.debug("device %d type %d = %s", devnumber, kind, DEVICE_KIND[kind])
 		return DEVICE_KIND[kind]
@@ -433,13 +584,13 @@ def get_name(device):
 	:returns: a string with the device name, or ``None`` if the device is not
 	available or does not support the ``DEVICE_NAME`` feature.
 	"""
-	name_length = feature_request(device, FEATURE.DEVICE_NAME)
+	name_length = decode_reply(FEATURE.DEVICE_NAME, 0x00, feature_read(device, FEATURE.DEVICE_NAME))
 	if name_length:
-		name_length = ord(name_length[:1])
+		name_length = name_length.length
 
 		name = b''
 		while len(name) < name_length:
-			fragment = feature_request(device, FEATURE.DEVICE_NAME, 0x10, len(name))
+			fragment = feature_read(device, FEATURE.DEVICE_NAME, 0x10, len(name))
 			if fragment:
 				name += fragment[:name_length - len(name)]
 			else:
@@ -454,28 +605,29 @@ def get_battery(device):
 
 	:raises FeatureNotSupported: if the device does not support this feature.
 	"""
-	battery = feature_request(device, FEATURE.BATTERY_STATUS)
+	battery = decode_reply(FEATURE.BATTERY_STATUS, 0x00, feature_read(device, FEATURE.BATTERY_STATUS))
 	if battery:
-		discharge, dischargeNext, status = _unpack('!BBB', battery[:3])
 		if _log.isEnabledFor(_DEBUG):
 			_log.debug("device %d battery %d%% charged, next level %d%% charge, status %d = %s",
-						device.number, discharge, dischargeNext, status, BATTERY_STATUS[status])
-		return discharge, BATTERY_STATUS[status]
+						device.number, battery.discharge, battery.next_level, battery.status, BATTERY_STATUS[battery.status])
+		return battery.discharge, BATTERY_STATUS[battery.status]
 
 
 def get_keys(device):
 	# TODO: add here additional variants for other REPROG_CONTROLS
-	count = feature_request(device, FEATURE.REPROG_CONTROLS)
+	count = decode_reply(FEATURE.REPROG_CONTROLS, 0x00, feature_read(device, FEATURE.REPROG_CONTROLS))
+	keyversion = 1
 	if count is None:
-		count = feature_request(device, FEATURE.REPROG_CONTROLS_V4)
+		count = decode_reply(FEATURE.REPROG_CONTROLS_V4, 0x00, feature_read(device, FEATURE.REPROG_CONTROLS_V4))
+		keyversion = 4
 	if count:
-		return KeysArray(device, ord(count[:1]))
+		return KeysArray(device, count.count, keyversion)
 
 
 def get_mouse_pointer_info(device):
-	pointer_info = feature_request(device, FEATURE.MOUSE_POINTER)
+	pointer_info = decode_reply(FEATURE.MOUSE_POINTER, 0x00, feature_read(device, FEATURE.MOUSE_POINTER))
 	if pointer_info:
-		dpi, flags = _unpack('!HB', pointer_info[:3])
+		dpi, flags = pointer_info
 		acceleration = ('none', 'low', 'med', 'high')[flags & 0x3]
 		suggest_os_ballistics = (flags & 0x04) != 0
 		suggest_vertical_orientation = (flags & 0x08) != 0
@@ -488,9 +640,9 @@ def get_mouse_pointer_info(device):
 
 
 def get_vertical_scrolling_info(device):
-	vertical_scrolling_info = feature_request(device, FEATURE.VERTICAL_SCROLLING)
+	vertical_scrolling_info = decode_reply(FEATURE.VERTICAL_SCROLLING, 0x00, feature_read(device, FEATURE.VERTICAL_SCROLLING))
 	if vertical_scrolling_info:
-		roller, ratchet, lines = _unpack('!BBB', vertical_scrolling_info[:3])
+		roller, ratchet, lines = vertical_scrolling_info
 		roller_type = ('reserved', 'standard', 'reserved', '3G', 'micro', 'normal touch pad', 'inverted touch pad', 'reserved')[roller]
 		return {
 			'roller': roller_type,
@@ -500,52 +652,43 @@ def get_vertical_scrolling_info(device):
 
 
 def get_hi_res_scrolling_info(device):
-	hi_res_scrolling_info = feature_request(device, FEATURE.HI_RES_SCROLLING)
+	hi_res_scrolling_info = decode_reply(FEATURE.HI_RES_SCROLLING, 0x00, feature_read(device, FEATURE.HI_RES_SCROLLING))
 	if hi_res_scrolling_info:
-		mode, resolution = _unpack('!BB', hi_res_scrolling_info[:2])
-		return mode, resolution
+		return tuple(hi_res_scrolling_info)
 
 
 def get_pointer_speed_info(device):
-	pointer_speed_info = feature_request(device, FEATURE.POINTER_SPEED)
+	pointer_speed_info = decode_reply(FEATURE.POINTER_SPEED, 0x00, feature_read(device, FEATURE.POINTER_SPEED))
 	if pointer_speed_info:
-		pointer_speed_hi, pointer_speed_lo = _unpack('!BB', pointer_speed_info[:2])
-		#if pointer_speed_lo > 0:
-		#	pointer_speed_lo = pointer_speed_lo
-		return pointer_speed_hi+pointer_speed_lo/256
+		return pointer_speed_info.speed + pointer_speed_info.fraction / 256
 
 
 def get_lowres_wheel_status(device):
-	lowres_wheel_status = feature_request(device, FEATURE.LOWRES_WHEEL)
+	lowres_wheel_status = decode_reply(FEATURE.LOWRES_WHEEL, 0x00, feature_read(device, FEATURE.LOWRES_WHEEL))
 	if lowres_wheel_status:
-		wheel_flag = _unpack('!B', lowres_wheel_status[:1])[0]
-		wheel_reporting = ('HID', 'HID++')[wheel_flag & 0x01]
+		wheel_reporting = ('HID', 'HID++')[lowres_wheel_status.flags & 0x01]
 		return wheel_reporting
 
 
 def get_hires_wheel(device):
-	caps = feature_request(device, FEATURE.HIRES_WHEEL, 0x00)
-	mode = feature_request(device, FEATURE.HIRES_WHEEL, 0x10)
-	ratchet = feature_request(device, FEATURE.HIRES_WHEEL, 0x030)
+	caps = decode_reply(FEATURE.HIRES_WHEEL, 0x00, feature_read(device, FEATURE.HIRES_WHEEL, 0x00))
+	mode = decode_reply(FEATURE.HIRES_WHEEL, 0x10, feature_read(device, FEATURE.HIRES_WHEEL, 0x10))
+	ratchet = decode_reply(FEATURE.HIRES_WHEEL, 0x30, feature_read(device, FEATURE.HIRES_WHEEL, 0x30))
 
 
 	if caps and mode and ratchet:
 		# Parse caps
-		multi, flags = _unpack('!BB', caps[:2])
+		multi = caps.multiplier
 
-		has_invert = (flags & 0x08) != 0
-		has_ratchet = (flags & 0x04) != 0
+		has_invert = (caps.flags & 0x08) != 0
+		has_ratchet = (caps.flags & 0x04) != 0
 
 		# Parse mode
-		wheel_mode, reserved = _unpack('!BB', mode[:2])
-
-		target = (wheel_mode & 0x01) != 0
-		res = (wheel_mode & 0x02) != 0
-		inv = (wheel_mode & 0x04) != 0
+		target = (mode.mode & 0x01) != 0
+		res = (mode.mode & 0x02) != 0
+		inv = (mode.mode & 0x04) != 0
 
 		# Parse Ratchet switch
-		ratchet_mode, reserved = _unpack('!BB', ratchet[:2])
-
-		ratchet = (ratchet_mode & 0x01) != 0
+		ratchet = (ratchet.state & 0x01) != 0
 
 		return multi, has_invert, has_ratchet, inv, res, target, ratchet
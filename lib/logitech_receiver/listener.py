@@ -34,6 +34,7 @@ del getLogger
 
 
 from . import base as _base
+from . import scheduler as _scheduler
 
 #
 #
@@ -49,6 +50,10 @@ class _ThreadedHandle(object):
 
 	def __init__(self, listener, path, handle):
 		assert listener is not None
+		assert isinstance(listener, _threading.Thread)
+		self._init(listener, path, handle)
+
+	def _init(self, listener, path, handle):
 		assert path is not None
 		assert handle is not None
 		assert isinstance(handle, int)
@@ -111,6 +116,16 @@ class _ThreadedHandle(object):
 		return bool(self._local)
 	__nonzero__ = __bool__
 
+
+def threaded_handle(path, handle):
+	"""Wraps an open handle, so each thread using it gets its own handle to
+	the same device, for when no listener thread reads its notifications.
+	Closing the wrapper closes them all.
+	"""
+	threaded = _ThreadedHandle.__new__(_ThreadedHandle)
+	threaded._init(None, path, handle)
+	return threaded
+
 #
 #
 #
@@ -147,6 +162,8 @@ class EventsListener(_threading.Thread):
 
 	def run(self):
 		self._active = True
+		# requests made while processing notifications
+		_scheduler.set_priority(_scheduler.PRIORITY.notification)
 
 		# replace the handle with a threaded one
 		self.receiver.handle = _ThreadedHandle(self, self.receiver.path, self.receiver.handle)
@@ -28,13 +28,15 @@ del getLogger
 
 
 from .i18n import _
-from .common import strhex as _strhex, unpack as _unpack
+from .common import strhex as _strhex
 from . import hidpp10 as _hidpp10
 from . import hidpp20 as _hidpp20
+from . import events as _events
 from .status import KEYS as _K, ALERT as _ALERT
 
 _R = _hidpp10.REGISTERS
 _F = _hidpp20.FEATURE
+_EVENT = _hidpp20.EVENT
 
 #
 #
@@ -123,8 +125,12 @@ def _process_hidpp10_custom_notification(device, status, n):
 		# message layout: 10 ix <register> <xx> <yy> <zz> <00>
 		assert n.data[-1:] == b'\x00'
 		data = chr(n.address).encode() + n.data
-		charge, status_text = _hidpp10.parse_battery_status(n.sub_id, data)
-		status.set_battery_info(charge, status_text)
+		_hidpp10.invalidate_registers(device, n.sub_id)
+		battery = _hidpp10.parse_battery_status(n.sub_id, data)
+		if battery:
+			status.set_battery_info(*battery)
+		else:
+			_log.warn("%s: short battery notification %s", device, n)
 		return True
 
 	if n.sub_id == _R.keyboard_illumination:
@@ -137,12 +143,24 @@ def _process_hidpp10_custom_notification(device, status, n):
 	_log.warn("%s: unrecognized %s", device, n)
 
 
+def _forget_registers(device):
+	# the device (un)linked: what was read from it may not hold anymore,
+	# and the receiver's slot for it may have changed
+	_hidpp10.invalidate_registers(device)
+	receiver = device.receiver
+	_hidpp10.invalidate_registers(receiver, _R.receiver_connection)
+	for sub in (0x20, 0x30, 0x40):
+		_hidpp10.invalidate_registers(receiver, _R.receiver_info, sub + device.number - 1)
+
+
 def _process_hidpp10_notification(device, status, n):
 	# unpair notification
 	if n.sub_id == 0x40:
+		_forget_registers(device)
 		if n.address == 0x02:
 			# device un-paired
 			status.clear()
+			_events.close_all(device)
 			device.wpid = None
 			device.status = None
 			if device.number in device.receiver:
@@ -167,8 +185,12 @@ def _process_hidpp10_notification(device, status, n):
 					else 'Lightspeed 1_1' if n.address == 0x0D
 					else None)
 		if protocol_name:
+			wpid = _strhex(n.data[2:3] + n.data[1:2])
+			if (wpid != device.wpid or n.address == 0x05) and device.features is not None:
+				# re-paired, or its firmware is being updated: the features
+				# may have changed
+				device.features.invalidate()
 			if _log.isEnabledFor(_DEBUG):
-				wpid = _strhex(n.data[2:3] + n.data[1:2])
 				assert wpid == device.wpid, "%s wpid mismatch, got %s" % (device, wpid)
 
 			flags = ord(n.data[:1]) & 0xF0
@@ -180,6 +202,8 @@ def _process_hidpp10_notification(device, status, n):
 				_log.debug("%s: %s connection notification: software=%s, encrypted=%s, link=%s, payload=%s",
 							device, protocol_name, sw_present, link_encrypted, link_established, has_payload)
 			status[_K.LINK_ENCRYPTED] = link_encrypted
+			_forget_registers(device)
+			device.link_changed(link_established)
 			status.changed(active=link_established)
 		else:
 			_log.warn("%s: connection notification with unknown protocol %02X: %s", device.number, n.address, n)
@@ -209,11 +233,9 @@ def _process_hidpp10_notification(device, status, n):
 
 def _process_feature_notification(device, status, n, feature):
 	if feature == _F.BATTERY_STATUS:
-		if n.address == 0x00:
-			discharge_level = ord(n.data[:1])
-			discharge_next_level = ord(n.data[1:2])
-			battery_status = ord(n.data[2:3])
-			status.set_battery_info(discharge_level, _hidpp20.BATTERY_STATUS[battery_status])
+		battery = _EVENT[(feature, 0x00)].decode(n.data) if n.address == 0x00 else None
+		if battery:
+			status.set_battery_info(battery.discharge, _hidpp20.BATTERY_STATUS[battery.status])
 		else:
 			_log.warn("%s: unknown BATTERY %s", device, n)
 		return True
@@ -240,8 +262,9 @@ def _process_feature_notification(device, status, n, feature):
 		return True
 
 	if feature == _F.SOLAR_DASHBOARD:
-		if n.data[5:9] == b'GOOD':
-			charge, lux, adc = _unpack('!BHH', n.data[:5])
+		solar = _EVENT[(feature, 0x00)].decode(n.data)
+		if solar and solar.check == b'GOOD':
+			charge, lux = solar.charge, solar.lux
 			# guesstimate the battery voltage, emphasis on 'guess'
 			# status_text = '%1.2fV' % (adc * 2.67793237653 / 0x0672)
 			status_text = _hidpp20.BATTERY_STATUS.discharging
@@ -274,32 +297,64 @@ def _process_feature_notification(device, status, n, feature):
 		if n.address == 0x00:
 			if _log.isEnabledFor(_INFO):
 				_log.info("%s: TOUCH MOUSE points %s", device, n)
+			if _events.wants(device, _events.TouchEvent):
+				_events.publish(device, _events.TouchEvent, _decode_touch_points(n.data))
 		elif n.address == 0x10:
-			touch = ord(n.data[:1])
-			button_down = bool(touch & 0x02)
-			mouse_lifted = bool(touch & 0x01)
+			touch = _EVENT[(feature, 0x10)].decode(n.data)
+			if touch is None:
+				_log.warn("%s: short TOUCH MOUSE %s", device, n)
+				return True
+			button_down = bool(touch.flags & 0x02)
+			mouse_lifted = bool(touch.flags & 0x01)
 			if _log.isEnabledFor(_INFO):
 				_log.info("%s: TOUCH MOUSE status: button_down=%s mouse_lifted=%s", device, button_down, mouse_lifted)
+			_events.publish(device, _events.TouchStatusEvent, button_down, mouse_lifted)
 		else:
 			_log.warn("%s: unknown TOUCH MOUSE %s", device, n)
 		return True
 
 	if feature == _F.HIRES_WHEEL:
 		if (n.address == 0x00):
-			if _log.isEnabledFor(_INFO):
-				flags, delta_v = _unpack('>bh', n.data[:3])
+			movement = _EVENT[(feature, 0x00)].decode(n.data)
+			if movement and (_log.isEnabledFor(_INFO) or _events.wants(device, _events.WheelEvent)):
+				flags, delta_v = movement
 				high_res = (flags & 0x10) != 0
 				periods = flags & 0x0f
-				_log.info("%s: WHEEL: res: %d periods: %d delta V:%-3d", device, high_res, periods, delta_v)
+				if _log.isEnabledFor(_INFO):
+					_log.info("%s: WHEEL: res: %d periods: %d delta V:%-3d", device, high_res, periods, delta_v)
+				_events.publish(device, _events.WheelEvent, high_res, periods, delta_v)
 			return True
 		elif (n.address == 0x10):
+			change = _EVENT[(feature, 0x10)].decode(n.data)
+			if change is None:
+				_log.warn("%s: short WHEEL %s", device, n)
+				return True
+			ratchet = change.flags & 0x01
 			if _log.isEnabledFor(_INFO):
-				flags = ord(n.data[:1])
-				ratchet = flags & 0x01
 				_log.info("%s: WHEEL: ratchet: %d", device, ratchet)
+			_events.publish(device, _events.RatchetEvent, ratchet)
 			return True
 		else:
 			_log.warn("%s: unknown WHEEL %s", device, n)
 		return True
 
 	_log.warn("%s: unrecognized %s for feature %s (index %02X)", device, n, feature, n.sub_id)
+
+
+def _decode_touch_points(data):
+	# 4 bytes per finger: X[11:4], Y[11:4], Y[3:0]X[3:0], Wy[3:0]Wx[3:0];
+	# all 0xFF when the finger is lifted
+	layout = _EVENT[(_F.TOUCHMOUSE_RAW_POINTS, 0x00)]
+	points = []
+	for finger in range(0, 4):
+		point = layout.decode(data, finger * layout.size)
+		if point is None:
+			# a short notification, no more fingers in it
+			break
+		x_h, y_h, xy_l, w = point
+		if x_h == 0xFF and y_h == 0xFF and xy_l == 0xFF:
+			continue
+		x = (x_h << 4) | (xy_l & 0x0F)
+		y = (y_h << 4) | (xy_l >> 4)
+		points.append(_events.TouchPoint(finger + 1, x, y, w & 0x0F, w >> 4))
+	return tuple(points)
@@ -20,8 +20,10 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import errno as _errno
+import threading as _threading
+from time import time as _timestamp
 
-from logging import getLogger, INFO as _INFO
+from logging import getLogger, DEBUG as _DEBUG, INFO as _INFO
 _log = getLogger(__name__)
 del getLogger
 
@@ -31,11 +33,24 @@ from . import base as _base
 from . import hidpp10 as _hidpp10
 from . import hidpp20 as _hidpp20
 from .common import strhex as _strhex
-from .descriptors import DEVICES as _DESCRIPTORS
+from . import descriptors as _descriptors
+from . import events as _events
+from .scheduler import LinkScheduler as _LinkScheduler
 from .settings_templates import check_feature_settings as _check_feature_settings
 
 _R = _hidpp10.REGISTERS
 
+from collections import namedtuple
+"""The receiver_info registers describing a paired device slot: pairing
+information (0x20+n), extended pairing information (0x30+n) and codename (0x40+n)."""
+_PairingInfo = namedtuple('_PairingInfo', ('pairing', 'extended', 'codename'))
+del namedtuple
+
+# After a device failed to answer, requests to it fail right away for this
+# long (seconds), doubling each time it still does not answer, up to the max.
+_BREAKER_BACKOFF = 2
+_BREAKER_MAX_BACKOFF = 60
+
 #
 #
 #
@@ -70,12 +85,22 @@ class PairedDevice(object):
 		self._keys = None
 		self._registers = None
 		self._settings = None
+		# the feature table generation the settings were last looked up for
+		self._settings_generation = None
 
 		# Misc stuff that's irrelevant to any functionality, but may be
 		# displayed in the UI and caching it here helps.
 		self._polling_rate = None
 		self._power_switch = None
 
+		# decoded input event streams, see subscribe()
+		self._subscriptions = ()
+
+		# when the device stopped answering: (retry timestamp, backoff)
+		self._breaker = None
+		self._register_cache = _hidpp10.RegisterCache()
+		self._probe_lock = _threading.Lock()
+
 		# if _log.isEnabledFor(_DEBUG):
 		# 	_log.debug("new PairedDevice(%s, %s, %s)", receiver, number, link_notification)
 
@@ -87,7 +112,7 @@ class PairedDevice(object):
 			self._kind = _hidpp10.DEVICE_KIND[kind]
 		else:
 			# force a reading of the wpid
-			pair_info = receiver.read_register(_R.receiver_info, 0x20 + number - 1)
+			pair_info = receiver.pairing_info(number).pairing
 			if pair_info:
 				# may be either a Unifying receiver, or an Unifying-ready receiver
 				self.wpid = _strhex(pair_info[3:5])
@@ -110,16 +135,16 @@ class PairedDevice(object):
 		# also it gets set to None on this object when the device is unpaired
 		assert self.wpid is not None, "failed to read wpid: device %d of %s" % (number, receiver)
 
-		self.descriptor = _DESCRIPTORS.get(self.wpid)
+		self.descriptor = _descriptors.get_wpid(self.wpid)
 		if self.descriptor is None:
 			# Last chance to correctly identify the device; many Nano receivers
 			# do not support this call.
-			codename = self.receiver.read_register(_R.receiver_info, 0x40 + self.number - 1)
+			codename = self.receiver.pairing_info(self.number).codename
 			if codename:
 				codename_length = ord(codename[1:2])
 				codename = codename[2:2 + codename_length]
 				self._codename = codename.decode('ascii')
-				self.descriptor = _DESCRIPTORS.get(self._codename)
+				self.descriptor = _descriptors.get_codename(self._codename)
 
 		if self.descriptor:
 			self._name = self.descriptor.name
@@ -137,10 +162,9 @@ class PairedDevice(object):
 
 	@property
 	def protocol(self):
-		if self._protocol is None and self.online is not False:
-			self._protocol = _base.ping(self.receiver.handle, self.number)
-			# if the ping failed, the peripheral is (almost) certainly offline
-			self.online = self._protocol is not None
+		if self._protocol is None and self.online is not False and self._reachable():
+			# if the ping fails, the peripheral is (almost) certainly offline
+			self.ping()
 
 			# if _log.isEnabledFor(_DEBUG):
 			# 	_log.debug("device %d protocol %s", self.number, self._protocol)
@@ -149,7 +173,7 @@ class PairedDevice(object):
 	@property
 	def codename(self):
 		if self._codename is None:
-			codename = self.receiver.read_register(_R.receiver_info, 0x40 + self.number - 1)
+			codename = self.receiver.pairing_info(self.number).codename
 			if codename:
 				codename_length = ord(codename[1:2])
 				codename = codename[2:2 + codename_length]
@@ -170,7 +194,7 @@ class PairedDevice(object):
 	@property
 	def kind(self):
 		if self._kind is None:
-			pair_info = self.receiver.read_register(_R.receiver_info, 0x20 + self.number - 1)
+			pair_info = self.receiver.pairing_info(self.number).pairing
 			if pair_info:
 				kind = ord(pair_info[7:8]) & 0x0F
 				self._kind = _hidpp10.DEVICE_KIND[kind]
@@ -191,7 +215,7 @@ class PairedDevice(object):
 	@property
 	def serial(self):
 		if self._serial is None:
-			serial = self.receiver.read_register(_R.receiver_info, 0x30 + self.number - 1)
+			serial = self.receiver.pairing_info(self.number).extended
 			if serial:
 				ps = ord(serial[9:10]) & 0x0F
 				self._power_switch = _hidpp10.POWER_SWITCH_LOCATION[ps]
@@ -209,7 +233,7 @@ class PairedDevice(object):
 	@property
 	def power_switch_location(self):
 		if self._power_switch is None:
-			ps = self.receiver.read_register(_R.receiver_info, 0x30 + self.number - 1)
+			ps = self.receiver.pairing_info(self.number).extended
 			if ps is not None:
 				ps = ord(ps[9:10]) & 0x0F
 				self._power_switch = _hidpp10.POWER_SWITCH_LOCATION[ps]
@@ -220,7 +244,7 @@ class PairedDevice(object):
 	@property
 	def polling_rate(self):
 		if self._polling_rate is None:
-			pair_info = self.receiver.read_register(_R.receiver_info, 0x20 + self.number - 1)
+			pair_info = self.receiver.pairing_info(self.number).pairing
 			if pair_info:
 				self._polling_rate = ord(pair_info[2:3])
 			else:
@@ -251,7 +275,12 @@ class PairedDevice(object):
 			else:
 				self._settings = []
 
-		_check_feature_settings(self, self._settings)
+		generation = getattr(self.features, 'generation', None)
+		if not generation or generation != self._settings_generation:
+			if _check_feature_settings(self, self._settings):
+				# only once the feature table was loaded, and the device
+				# told for certain which of the features it has
+				self._settings_generation = getattr(self.features, 'generation', None)
 		return self._settings
 
 	def enable_notifications(self, enable=True):
@@ -277,8 +306,84 @@ class PairedDevice(object):
 			_log.info("%s: device notifications %s %s", self, 'enabled' if enable else 'disabled', flag_names)
 		return flag_bits if ok else None
 
+	def subscribe(self, kinds=None, maxlen=_events.DEFAULT_BUFFER, batch=False):
+		"""Streams the wheel and touch events of this device, as decoded from
+		its notifications; see events.subscribe()."""
+		return _events.subscribe(self, kinds, maxlen, batch)
+
+	def _trip(self, backoff=_BREAKER_BACKOFF):
+		backoff = min(backoff, _BREAKER_MAX_BACKOFF)
+		if self._breaker is None and _log.isEnabledFor(_INFO):
+			_log.info("%s: not reachable, failing requests for %d seconds", self, backoff)
+		self._breaker = (_timestamp() + backoff, backoff)
+
+	def _reachable(self):
+		"""Whether requests to the device may be sent, or should fail right
+		away since it recently did not answer."""
+		breaker = self._breaker
+		if breaker is None:
+			return True
+		retry_at, backoff = breaker
+		if _timestamp() < retry_at:
+			return False
+
+		# let one request through to check on the device, fail the others
+		if not self._probe_lock.acquire(False):
+			return False
+		try:
+			if self._breaker is not breaker:
+				return self._breaker is None
+			if _log.isEnabledFor(_DEBUG):
+				_log.debug("%s: checking if reachable again", self)
+			with self.receiver.scheduler.slot(self.number):
+				protocol = _base.ping(self.receiver.handle, self.number)
+			if protocol is None:
+				self._trip(backoff * 2)
+				return False
+			self._protocol = protocol
+			self._breaker = None
+			return True
+		finally:
+			self._probe_lock.release()
+
+	def link_changed(self, established):
+		"""Called on wireless link notifications, which tell for certain if
+		the device can be reached."""
+		if established:
+			if self._breaker is not None and _log.isEnabledFor(_INFO):
+				_log.info("%s: reachable again", self)
+			self._breaker = None
+		elif self._breaker is None:
+			self._trip()
+
+	def _request(self, request_id, *params):
+		if not self._reachable():
+			return None
+		try:
+			with self.receiver.scheduler.slot(self.number):
+				return _base.checked_request(self.receiver.handle, self.number, request_id, *params)
+		except _base.DeviceUnreachable:
+			self._trip()
+
 	def request(self, request_id, *params):
-		return _base.request(self.receiver.handle, self.number, request_id, *params)
+		if _base.is_read(request_id):
+			return self.shared_request(request_id, *params)
+		return self._request(request_id, *params)
+
+	def shared_request(self, request_id, *params):
+		"""Same as request(), for calls without side effects: identical calls
+		made at the same time share a single request to the device."""
+		return _base.single_flight((id(self), request_id) + params, self._request, request_id, *params)
+
+	def request_many(self, requests):
+		if not self._reachable():
+			return [None] * len(requests)
+		try:
+			with self.receiver.scheduler.slot(self.number):
+				return _base.request_many(self.receiver.handle, self.number, requests, checked=True)
+		except _base.DeviceUnreachable as e:
+			self._trip()
+			return e.replies
 
 	read_register = _hidpp10.read_register
 	write_register = _hidpp10.write_register
@@ -287,12 +392,20 @@ class PairedDevice(object):
 		if self.protocol >= 2.0:
 			return _hidpp20.feature_request(self, feature, function, *params)
 
+	def feature_read(self, feature, function=0x00, *params):
+		if self.protocol >= 2.0:
+			return _hidpp20.feature_read(self, feature, function, *params)
+
 	def ping(self):
 		"""Checks if the device is online, returns True of False"""
-		protocol = _base.ping(self.receiver.handle, self.number)
+		with self.receiver.scheduler.slot(self.number):
+			protocol = _base.ping(self.receiver.handle, self.number)
 		self.online = protocol is not None
 		if protocol is not None:
 			self._protocol = protocol
+			self._breaker = None
+		elif self._breaker is None:
+			self._trip()
 		return self.online
 
 	def __index__(self):
@@ -318,10 +431,28 @@ class PairedDevice(object):
 #
 #
 
+def _capabilities_key(device_info):
+	return '%s:%s:%s' % (device_info.path, device_info.product_id, device_info.serial)
+
+# What was learned about each receiver (serial, max_devices, may_unpair,
+# firmware), kept when it is closed, so reopening it -- e.g. after a resume --
+# does not ask the receiver again.
+_capabilities = {}
+
+"""Where the capabilities of the receivers are kept across runs, set by the
+application: a dict-like object, by the same keys.  If ``None``, they are
+only kept in memory."""
+capabilities_store = None
+# the capabilities kept in the store; the firmware is only kept in memory
+_STORED_CAPABILITIES = ('serial', 'max_devices', 'may_unpair')
+
 class Receiver(object):
 	"""A Unifying Receiver instance.
 
 	The paired devices are available through the sequence interface.
+
+	Opening a receiver does not talk to it; its serial, max_devices, name
+	and firmware are read when first needed, may_unpair by check_may_unpair().
 	"""
 	number = 0xFF
 	kind = None
@@ -334,46 +465,100 @@ class Receiver(object):
 		# USB product id, used for some Nano receivers
 		self.product_id = device_info.product_id
 
-		# read the serial immediately, so we can find out max_devices
-		# this will tell us if it's a Unifying or Nano receiver
-		if self.product_id != 'c534':
-			serial_reply = self.read_register(_R.receiver_info, 0x03)
-			assert serial_reply
-			self.serial = _strhex(serial_reply[1:5])
-			self.max_devices = ord(serial_reply[6:7])
-		else:
-			self.serial = 0
-			self.max_devices = 6
-
-		if self.product_id == 'c539' or self.product_id == 'c53a' or self.product_id == 'c53f':
-			self.name = 'Lightspeed Receiver'
-		elif self.max_devices == 6:
-			self.name = 'Unifying Receiver'
-		elif self.max_devices < 6:
-			self.name = 'Nano Receiver'
-		else:
-			raise Exception("unknown receiver type", self.max_devices)
-		self._str = '<%s(%s,%s%s)>' % (self.name.replace(' ', ''), self.path, '' if isinstance(self.handle, int) else 'T', self.handle)
-
-		# TODO _properly_ figure out which receivers do and which don't support unpairing
-		self.may_unpair = self.write_register(_R.receiver_pairing) is None
-
-		self._firmware = None
+		self._capabilities_key = _capabilities_key(device_info)
+		capabilities = _capabilities.get(self._capabilities_key)
+		if capabilities is None:
+			stored = None if capabilities_store is None else capabilities_store.get(self._capabilities_key)
+			capabilities = _capabilities.setdefault(self._capabilities_key, dict(stored or {}))
+		self._capabilities = capabilities
 		self._devices = {}
+		# pairing information for all device slots, read in one go when first needed
+		self._pairing_info = None
+		# one thread reads the pairing information, the others wait for it
+		self._pairing_lock = _threading.Lock()
+		# bumped when the pairing information is dropped, so a read started
+		# before that does not put it back
+		self._pairing_generation = 0
+		self._register_cache = _hidpp10.RegisterCache()
+		# orders the requests of all the threads sharing the link
+		self.scheduler = _LinkScheduler(self.path)
 
 	def close(self):
 		handle, self.handle = self.handle, None
 		self._devices.clear()
+		self._pairing_info = None
+		self._register_cache.clear()
 		return (handle and _base.close(handle))
 
 	def __del__(self):
 		self.close()
 
+	def _read_receiver_info(self):
+		# the serial register also tells us if it's a Unifying or Nano receiver
+		if self.product_id != 'c534':
+			serial_reply = self.read_register(_R.receiver_info, 0x03)
+			if not serial_reply:
+				# try again next time
+				_log.warn("%s: failed to read the receiver serial", self)
+				return False
+			info = _strhex(serial_reply[1:5]), ord(serial_reply[6:7])
+		else:
+			info = 0, 6
+		self._capabilities['serial'], self._capabilities['max_devices'] = info
+		self._store_capabilities()
+		return True
+
+	def _store_capabilities(self):
+		if capabilities_store is not None:
+			capabilities_store[self._capabilities_key] = {k: self._capabilities[k]
+									for k in _STORED_CAPABILITIES if k in self._capabilities}
+
+	@property
+	def serial(self):
+		if 'serial' in self._capabilities or self._read_receiver_info():
+			return self._capabilities['serial']
+
+	@property
+	def max_devices(self):
+		"""How many devices may be paired, ``None`` if it could not be read."""
+		if 'max_devices' in self._capabilities or self._read_receiver_info():
+			return self._capabilities['max_devices']
+
+	@property
+	def name(self):
+		if self.product_id == 'c539' or self.product_id == 'c53a' or self.product_id == 'c53f':
+			return 'Lightspeed Receiver'
+		max_devices = self.max_devices
+		if max_devices == 6:
+			return 'Unifying Receiver'
+		if max_devices and max_devices < 6:
+			return 'Nano Receiver'
+		return 'Receiver'
+
+	@property
+	def may_unpair(self):
+		"""If devices can be unpaired; ``False`` until check_may_unpair()
+		found out, it does not ask the receiver."""
+		return self._capabilities.get('may_unpair', False)
+
+	def check_may_unpair(self):
+		"""Finds out if devices can be unpaired, asking the receiver if it was
+		not known yet."""
+		if 'may_unpair' not in self._capabilities and self.handle:
+			# TODO _properly_ figure out which receivers do and which don't support unpairing
+			# an empty write changes no pairing, so it does not go through
+			# write_register(), that would drop the pairing information
+			reply = self.request(0x8000 | _R.receiver_pairing)
+			self._capabilities['may_unpair'] = reply is None
+			self._store_capabilities()
+		return self.may_unpair
+
 	@property
 	def firmware(self):
-		if self._firmware is None and self.handle:
-			self._firmware = _hidpp10.get_firmware(self)
-		return self._firmware
+		firmware = self._capabilities.get('firmware')
+		if firmware is None and self.handle:
+			firmware = self._capabilities['firmware'] = _hidpp10.get_firmware(self)
+		return firmware
 
 	def enable_notifications(self, enable=True):
 		"""Enable or disable device (dis)connection notifications on this
@@ -398,6 +583,42 @@ class Receiver(object):
 			_log.info("%s: receiver notifications %s => %s", self, 'enabled' if enable else 'disabled', flag_names)
 		return flag_bits
 
+	def pairing_info(self, number):
+		"""The receiver_info pairing registers for a device slot, as a
+		_PairingInfo tuple; registers the receiver does not have are ``None``.
+
+		The first call reads the registers of all the device slots in one
+		pipelined batch, later calls are answered from that snapshot.
+		"""
+		assert number > 0 and number <= self.max_devices
+		pairing_info = self._pairing_info
+		if pairing_info is not None and number in pairing_info:
+			return pairing_info[number]
+
+		if not self.handle:
+			return _PairingInfo(None, None, None)
+
+		with self._pairing_lock:
+			# it may have been read while we were waiting
+			pairing_info = self._pairing_info
+			if pairing_info is None:
+				pairing_info = {}
+				numbers = range(1, 1 + self.max_devices)
+			elif number not in pairing_info:
+				numbers = (number, )
+			else:
+				return pairing_info[number]
+
+			generation = self._pairing_generation
+			registers = [(_R.receiver_info, sub + n - 1) for sub in (0x20, 0x30, 0x40) for n in numbers]
+			replies = _hidpp10.read_registers(self, *registers)
+			count = len(numbers)
+			for i, n in enumerate(numbers):
+				pairing_info[n] = _PairingInfo(replies[i], replies[count + i], replies[2 * count + i])
+			if generation == self._pairing_generation:
+				self._pairing_info = pairing_info
+			return pairing_info[number]
+
 	def notify_devices(self):
 		"""Scan all devices."""
 		if self.handle:
@@ -411,6 +632,12 @@ class Receiver(object):
 		assert notification is None or notification.devnumber == number
 		assert notification is None or notification.sub_id == 0x41
 
+		if notification is not None and self._pairing_info and number in self._pairing_info:
+			# a different wpid means a new pairing in this slot, so re-read its pairing information
+			pair_info = self._pairing_info[number].pairing
+			if pair_info is not None and pair_info[3:5] != notification.data[2:3] + notification.data[1:2]:
+				del self._pairing_info[number]
+
 		try:
 			dev = PairedDevice(self, number, notification)
 			assert dev.wpid
@@ -439,12 +666,36 @@ class Receiver(object):
 	# def has_devices(self):
 	# 	return len(self) > 0 or self.count() > 0
 
+	def _request(self, request_id, *params):
+		with self.scheduler.slot(self.number):
+			return _base.request(self.handle, 0xFF, request_id, *params)
+
 	def request(self, request_id, *params):
+		if _base.is_read(request_id):
+			return self.shared_request(request_id, *params)
 		if bool(self):
-			return _base.request(self.handle, 0xFF, request_id, *params)
+			return self._request(request_id, *params)
+
+	def shared_request(self, request_id, *params):
+		"""Same as request(), for calls without side effects: identical calls
+		made at the same time share a single request to the receiver."""
+		if bool(self):
+			return _base.single_flight((id(self), request_id) + params, self._request, request_id, *params)
+
+	def request_many(self, requests):
+		if bool(self):
+			with self.scheduler.slot(self.number):
+				return _base.request_many(self.handle, 0xFF, requests)
+		return [None] * len(requests)
 
 	read_register = _hidpp10.read_register
-	write_register = _hidpp10.write_register
+
+	def write_register(self, register_number, *value):
+		if int(register_number) == _R.receiver_pairing:
+			# (un)pairing changes what the device slots hold
+			self._pairing_generation += 1
+			self._pairing_info = None
+		return _hidpp10.write_register(self, register_number, *value)
 
 	def __iter__(self):
 		for number in range(1, 1 + self.max_devices):
@@ -490,6 +741,8 @@ class Receiver(object):
 			dev.wpid = None
 			if key in self._devices:
 				del self._devices[key]
+			if self._pairing_info:
+				self._pairing_info.pop(key, None)
 			_log.warn("%s unpaired device %s", self, dev)
 		else:
 			_log.error("%s failed to unpair device %s", self, dev)
@@ -514,11 +767,25 @@ class Receiver(object):
 		return self.path.__hash__()
 
 	def __str__(self):
-		return self._str
+		# don't read from the receiver just to log something
+		if 'max_devices' in self._capabilities:
+			name = self.name.replace(' ', '')
+		else:
+			name = 'Receiver'
+		return '<%s(%s,%s%s)>' % (name, self.path, '' if isinstance(self.handle, int) else 'T', self.handle)
 	__unicode__ = __repr__ = __str__
 
 	__bool__ = __nonzero__ = lambda self: self.handle is not None
 
+	@classmethod
+	def forget(self, device_info):
+		"""Drops what was learned about the receiver at this device path,
+		e.g. because another receiver may have been plugged in there."""
+		key = _capabilities_key(device_info)
+		_capabilities.pop(key, None)
+		if capabilities_store is not None and capabilities_store.get(key) is not None:
+			del capabilities_store[key]
+
 	@classmethod
 	def open(self, device_info):
 		"""Opens a Logitech Receiver found attached to the machine, by Linux device path.
@@ -528,7 +795,13 @@ class Receiver(object):
 		try:
 			handle = _base.open_path(device_info.path)
 			if handle:
-				return Receiver(handle, device_info)
+				receiver = Receiver(handle, device_info)
+				# only asks the receiver the first time it is ever opened
+				if receiver.max_devices is None:
+					_log.warn("%s: not answering as a receiver", receiver)
+					receiver.close()
+					return None
+				return receiver
 		except OSError as e:
 			_log.exception("open %s", device_info)
 			if e.errno == _errno.EACCES:
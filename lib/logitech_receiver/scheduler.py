@@ -0,0 +1,176 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+## Copyright (C) 2012-2013  Daniel Pavel
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# Ordering of the requests sharing a receiver's link.
+#
+# Each thread makes its requests at some priority: interactive (the user is
+# waiting for it, the default), notification (following up on something a
+# device reported), or background (enumeration, polling).  A request may only
+# start when no request of a higher priority is waiting or in flight, so
+# lower priority work yields between two requests.  Notification and
+# background requests are also limited in how many may be in flight at the
+# same time, and the devices waiting for them take turns.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading as _threading
+
+from logging import getLogger, DEBUG as _DEBUG
+_log = getLogger(__name__)
+del getLogger
+
+from .common import NamedInts as _NamedInts
+
+#
+#
+#
+
+"""Request priorities, lower goes first."""
+PRIORITY = _NamedInts(interactive=0, notification=1, background=2)
+
+# how many requests of each priority may be in flight on a receiver at the
+# same time; None for no limit
+_IN_FLIGHT_LIMIT = {
+				PRIORITY.interactive: None,
+				PRIORITY.notification: 2,
+				PRIORITY.background: 1,
+			}
+
+_local = _threading.local()
+
+
+def current_priority():
+	"""The priority of the requests made by the current thread."""
+	return getattr(_local, 'priority', PRIORITY.interactive)
+
+
+def set_priority(priority):
+	"""Sets the priority of all the requests the current thread makes from now on."""
+	assert priority in PRIORITY
+	_local.priority = PRIORITY[priority]
+
+
+class priority(object):
+	"""Context manager making the requests of the current thread at the given
+	priority, until the block exits."""
+	def __init__(self, priority):
+		assert priority in PRIORITY
+		self.priority = PRIORITY[priority]
+
+	def __enter__(self):
+		self._previous = current_priority()
+		_local.priority = self.priority
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		_local.priority = self._previous
+
+
+def call_with_priority(priority_, function, *args, **kwargs):
+	"""Calls the function, making its requests at the given priority."""
+	with priority(priority_):
+		return function(*args, **kwargs)
+
+#
+#
+#
+
+class LinkScheduler(object):
+	"""Grants the requests to a receiver's link, by priority."""
+	def __init__(self, name=None):
+		self.name = name
+		self._lock = _threading.Condition()
+		self._in_flight = [0] * len(PRIORITY)
+		# waiting requests, as [priority, device number, sequence] lists
+		self._waiting = []
+		self._sequence = 0
+		# sequence of the last request granted to each device, for taking turns
+		self._served = {}
+
+	def _may_start(self, ticket):
+		level, number = ticket[0], ticket[1]
+		if any(self._in_flight[p] for p in range(level)):
+			return False
+		if any(t[0] < level for t in self._waiting):
+			return False
+		limit = _IN_FLIGHT_LIMIT[level]
+		if limit is not None and self._in_flight[level] >= limit:
+			return False
+		# the device served longest ago goes first, then the oldest request
+		turn = min((self._served.get(t[1], 0), t[2]) for t in self._waiting if t[0] == level)
+		return turn == (self._served.get(number, 0), ticket[2])
+
+	def acquire(self, number):
+		"""Waits until a request to the device may be sent.
+
+		:returns: the priority granted, to pass to release().
+		"""
+		held = getattr(_local, 'held', None)
+		if held is None:
+			held = _local.held = {}
+		if held.get(self):
+			# nested request, e.g. from a notification handler
+			held[self] += 1
+			return None
+
+		with self._lock:
+			self._sequence += 1
+			ticket = [current_priority(), number, self._sequence]
+			self._waiting.append(ticket)
+			waited = False
+			while not self._may_start(ticket):
+				waited = True
+				self._lock.wait()
+			self._waiting.remove(ticket)
+			self._in_flight[ticket[0]] += 1
+			self._served[number] = ticket[2]
+			# the next one in line may be allowed as well
+			self._lock.notify_all()
+
+		if waited and _log.isEnabledFor(_DEBUG):
+			_log.debug("%s: %s request to device %d waited", self.name, PRIORITY[ticket[0]], number)
+		held[self] = 1
+		return ticket[0]
+
+	def release(self, granted):
+		held = _local.held
+		held[self] -= 1
+		if held[self]:
+			return
+		del held[self]
+		with self._lock:
+			self._in_flight[granted] -= 1
+			self._lock.notify_all()
+
+	def slot(self, number):
+		"""Context manager holding the link for a request to the device."""
+		return _Slot(self, number)
+
+
+class _Slot(object):
+	__slots__ = ('scheduler', 'number', 'granted')
+
+	def __init__(self, scheduler, number):
+		self.scheduler = scheduler
+		self.number = number
+
+	def __enter__(self):
+		self.granted = self.scheduler.acquire(self.number)
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.scheduler.release(self.granted)
@@ -24,6 +24,8 @@ _log = getLogger(__name__)
 del getLogger
 
 from copy import copy as _copy
+from time import time as _timestamp
+from threading import Condition as _Condition
 import math
 
 from .common import (
@@ -43,7 +45,8 @@ class Setting(object):
 	"""A setting descriptor.
 	Needs to be instantiated for each specific device."""
 	__slots__ = ('name', 'label', 'description', 'kind', 'persister', 'device_kind',
-					'_rw', '_validator', '_device', '_value')
+					'_rw', '_validator', '_device', '_value', '_timestamp',
+					'_writes', '_pending', '_queued', '_written', '_write_result', '_flushing')
 
 	def __init__(self, name, rw, validator, kind=None, label=None, description=None, device_kind=None):
 		assert name
@@ -72,7 +75,17 @@ class Setting(object):
 
 		o = _copy(self)
 		o._value = None
+		# when the value was last read from (or written to) the device
+		o._timestamp = None
 		o._device = device
+		# values waiting to be written: only the latest one is kept, and
+		# numbered, so callers can tell when a write covered theirs
+		o._writes = _Condition()
+		o._pending = None
+		o._queued = 0
+		o._written = 0
+		o._write_result = None
+		o._flushing = False
 		return o
 
 	@property
@@ -90,6 +103,15 @@ class Setting(object):
 		if self._validator.kind == KIND.range:
 			return (self._validator.min_value, self._validator.max_value)
 
+	def cached_value(self, max_age=None):
+		"""The value last read from or written to the device, without any
+		device request; ``None`` if there isn't one, or it is older than
+		`max_age` seconds."""
+		assert hasattr(self, '_value')
+		if self._timestamp is not None:
+			if max_age is None or _timestamp() - self._timestamp <= max_age:
+				return self._value
+
 	def read(self, cached=True):
 		assert hasattr(self, '_value')
 		assert hasattr(self, '_device')
@@ -110,6 +132,7 @@ class Setting(object):
 			reply = self._rw.read(self._device)
 			if reply:
 				self._value = self._validator.validate_read(reply)
+				self._timestamp = _timestamp()
 			if self.persister and self.name not in self.persister:
 				# Don't update the persister if it already has a value,
 				# otherwise the first read might overwrite the value we wanted.
@@ -117,6 +140,66 @@ class Setting(object):
 			return self._value
 
 	def write(self, value):
+		"""Writes a value to the device.  If writes of this setting are
+		already going on, just waits for them to write this value (or a later
+		one, this one being superseded).
+
+		:returns: the value written, or ``None`` if the write failed.
+		"""
+		self.queue_write(value)
+		return self.flush()
+
+	def queue_write(self, value):
+		"""Makes the value the next one to write, dropping any value queued
+		before and not written yet; flush() writes it."""
+		assert hasattr(self, '_value')
+		assert value is not None
+		with self._writes:
+			self._pending = value
+			self._queued += 1
+
+	def flush(self):
+		"""Writes the latest queued value, if any, with at most one write
+		going on at a time.
+
+		:returns: the last value written, or ``None`` if that write failed.
+		"""
+		with self._writes:
+			wanted = self._queued
+			while self._flushing and self._written < wanted:
+				# the thread writing will get to this value
+				self._writes.wait()
+			if self._written >= wanted:
+				return self._write_result
+			self._flushing = True
+
+		try:
+			while True:
+				with self._writes:
+					if self._written == self._queued:
+						return self._write_result
+					value, queued = self._pending, self._queued
+					self._pending = None
+
+				try:
+					result = self._write(value)
+				except:
+					with self._writes:
+						# the waiters for this value see it failed; a later
+						# value is left pending, for them to write
+						self._written, self._write_result = queued, None
+						self._writes.notify_all()
+					raise
+
+				with self._writes:
+					self._written, self._write_result = queued, result
+					self._writes.notify_all()
+		finally:
+			with self._writes:
+				self._flushing = False
+				self._writes.notify_all()
+
+	def _write(self, value):
 		assert hasattr(self, '_value')
 		assert hasattr(self, '_device')
 		assert value is not None
@@ -145,8 +228,10 @@ class Setting(object):
 				reply = self._rw.write(self._device, data_bytes)
 				if not reply:
 					# tell whomever is calling that the write failed
+					self._timestamp = None
 					return None
 
+			self._timestamp = _timestamp()
 			return value
 
 	def apply(self):
@@ -202,7 +287,7 @@ class FeatureRW(object):
 
 	def read(self, device):
 		assert self.feature is not None
-		return device.feature_request(self.feature, self.read_fnid)
+		return device.feature_read(self.feature, self.read_fnid)
 
 	def write(self, device, data_bytes):
 		assert self.feature is not None
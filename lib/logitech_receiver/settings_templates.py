@@ -20,6 +20,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 
+from threading import Lock as _Lock
+
 from .i18n import _
 from . import hidpp10 as _hidpp10
 from . import hidpp20 as _hidpp20
@@ -86,14 +88,56 @@ def feature_choices(name, feature, choices,
 	rw = _FeatureRW(feature, read_function_id, write_function_id)
 	return _Setting(name, rw, validator, kind=_KIND.choice, label=label, description=description, device_kind=device_kind)
 
+"""Where the choices read by feature_choices_dynamic() settings are kept
+across runs, set by the application: a dict-like object, taking lists of
+``[value, name]`` pairs.  If ``None``, they are only kept in memory."""
+choices_store = None
+_choices_cache = {}
+# settings are read from several threads
+_choices_lock = _Lock()
+
+
+def _choices_key(name, feature, device):
+	# devices of the same model, with the same version of the feature, have
+	# the same choices; looking the feature up tells its version, and the
+	# device would be asked for its index anyway
+	features = device.features
+	if device.wpid and features is not None and features.lookup(feature) is True:
+		version = features.version(feature)
+		if version is not None:
+			return '%s:%s:%d' % (name, device.wpid, version)
+
+
+def _cached_choices(name, feature, device, choices_callback):
+	key = _choices_key(name, feature, device)
+	if key is None:
+		return choices_callback(device)
+
+	with _choices_lock:
+		choices = _choices_cache.get(key)
+		if choices is None and choices_store is not None:
+			stored = choices_store.get(key)
+			if stored:
+				choices = _choices_cache[key] = _NamedInts(**{n: v for v, n in stored})
+	if choices is None:
+		# not holding the lock while talking to the device
+		choices = choices_callback(device)
+		if choices:
+			with _choices_lock:
+				_choices_cache[key] = choices
+				if choices_store is not None:
+					choices_store[key] = [[int(c), str(c)] for c in choices]
+	return choices
+
+
 def feature_choices_dynamic(name, feature, choices_callback,
 					read_function_id, write_function_id,
 					bytes_count=None,
 					label=None, description=None, device_kind=None):
 	# Proxy that obtains choices dynamically from a device
 	def instantiate(device):
-		# Obtain choices for this feature
-		choices = choices_callback(device)
+		# Obtain choices for this feature, read once per model and feature version
+		choices = _cached_choices(name, feature, device, choices_callback)
 		setting = feature_choices(name, feature, choices,
 						read_function_id, write_function_id,
 						bytes_count=bytes_count,
@@ -261,7 +305,7 @@ def _feature_smart_shift():
 
 def _feature_adjustable_dpi_choices(device):
 	# [1] getSensorDpiList(sensorIdx)
-	reply = device.feature_request(_F.ADJUSTABLE_DPI, 0x10)
+	reply = device.feature_read(_F.ADJUSTABLE_DPI, 0x10)
 	# Should not happen, but might happen when the user unplugs device while the
 	# query is being executed. TODO retry logic?
 	assert reply, 'Oops, DPI list cannot be retrieved!'
@@ -369,11 +413,21 @@ del _SETTINGS_LIST
 #
 
 def check_feature_settings(device, already_known):
-	"""Try to auto-detect device settings by the HID++ 2.0 features they have."""
+	"""Try to auto-detect device settings by the HID++ 2.0 features they have.
+
+	:returns: ``True`` if the device told for certain which features it has,
+	so there is no need to look again until its feature table changes.
+	"""
 	if device.features is None:
-		return
+		return True
 	if device.protocol and device.protocol < 2.0:
-		return
+		return True
+	if not device.online:
+		return False
+
+	known_names = set(s.name for s in already_known)
+	# set when the device could not tell if it has some feature
+	undecided = []
 
 	def check_feature(name, featureId, field_name=None):
 		"""
@@ -383,15 +437,19 @@ def check_feature_settings(device, already_known):
 		different from the user-visible setting name. Useful if there
 		are multiple features for the same setting.
 		"""
-		if not featureId in device.features:
+		if name in known_names:
 			return
-		if any(s.name == name for s in already_known):
+		present = device.features.lookup(featureId)
+		if not present:
+			if present is None:
+				undecided.append(featureId)
 			return
 		if not field_name:
 			# Convert user-visible settings name for FeatureSettings
 			field_name = name.replace('-', '_')
 		feature = getattr(FeatureSettings, field_name)()
 		already_known.append(feature(device))
+		known_names.add(name)
 
 	check_feature(_HI_RES_SCROLL[0], _F.HI_RES_SCROLLING)
 	check_feature(_LOW_RES_SCROLL[0], _F.LOWRES_WHEEL)
@@ -404,3 +462,5 @@ def check_feature_settings(device, already_known):
 	check_feature(_POINTER_SPEED[0], _F.POINTER_SPEED)
 	check_feature(_SMART_SHIFT[0],   _F.SMART_SHIFT)
 	check_feature(_BACKLIGHT[0],   	 _F.BACKLIGHT2)
+
+	return not undecided
@@ -30,6 +30,7 @@ from .i18n import _, ngettext
 from .common import NamedInts as _NamedInts, NamedInt as _NamedInt
 from . import hidpp10 as _hidpp10
 from . import hidpp20 as _hidpp20
+from . import scheduler as _scheduler
 
 _R = _hidpp10.REGISTERS
 
@@ -49,8 +50,8 @@ KEYS = _NamedInts(
 				ERROR=7,
 			)
 
-# If the battery charge is under this percentage, trigger an attention event
-# (blink systray icon/notification/whatever).
+# If the battery charge is under this percentage, the leds of devices that
+# have them show a warning.
 _BATTERY_ATTENTION_LEVEL = 5
 
 # If no updates have been receiver from the device for a while, ping the device
@@ -62,7 +63,13 @@ _LONG_SLEEP = 15 * 60  # seconds
 #
 #
 
-def attach_to(device, changed_callback):
+def attach_to(device, changed_callback, executor=None):
+	"""Gives the device a status object.
+
+	:param executor: called as ``executor(key, function, *args)`` to run the
+	(slow) work needed when a device comes online, instead of running it
+	right away; calls with the same key must run one at a time, in order.
+	"""
 	assert device
 	assert changed_callback
 
@@ -70,7 +77,7 @@ def attach_to(device, changed_callback):
 		if device.kind is None:
 			device.status = ReceiverStatus(device, changed_callback)
 		else:
-			device.status = DeviceStatus(device, changed_callback)
+			device.status = DeviceStatus(device, changed_callback, executor)
 
 #
 #
@@ -126,12 +133,13 @@ class DeviceStatus(dict):
 	active/inactive, battery charge, lux, etc. It updates them mostly by
 	processing incoming notification events from the device itself.
 	"""
-	def __init__(self, device, changed_callback):
+	def __init__(self, device, changed_callback, executor=None):
 		assert device
 		self._device = device
 
 		assert changed_callback
 		self._changed_callback = changed_callback
+		self._executor = executor
 
 		# is the device active?
 		self._active = None
@@ -139,6 +147,9 @@ class DeviceStatus(dict):
 		# timestamp of when this status object was last updated
 		self.updated = 0
 
+		# timestamp of when the battery info was last read or notified
+		self.battery_updated = 0
+
 	def to_string(self):
 		def _items():
 			comma = False
@@ -190,15 +201,17 @@ class DeviceStatus(dict):
 
 		changed = old_level != level or old_status != status or old_charging != charging
 		alert, reason = ALERT.NONE, None
+		self.battery_updated = timestamp or _timestamp()
 
-		if _hidpp20.BATTERY_OK(status) and level > _BATTERY_ATTENTION_LEVEL:
+		# a low battery level is alerted for by whoever keeps the battery
+		# history, once per threshold crossed; here only battery errors
+		if _hidpp20.BATTERY_OK(status):
 			self[KEYS.ERROR] = None
-		else:
-			_log.warn("%s: battery %d%%, ALERT %s", self._device, level, status)
-			if self.get(KEYS.ERROR) != status:
-				self[KEYS.ERROR] = status
-				# only show the notification once
-				alert = ALERT.NOTIFICATION | ALERT.ATTENTION
+		elif self.get(KEYS.ERROR) != status:
+			_log.warn("%s: battery %s%%, ALERT %s", self._device, level, status)
+			self[KEYS.ERROR] = status
+			# only show the notification once
+			alert = ALERT.NOTIFICATION | ALERT.ATTENTION
 			if isinstance(level, _NamedInt):
 				reason = _("Battery: %(level)s (%(status)s)") % { 'level': _(level), 'status': _(status) }
 			else:
@@ -206,13 +219,21 @@ class DeviceStatus(dict):
 
 		if changed or reason:
 			# update the leds on the device, if any
-			_hidpp10.set_3leds(self._device, level, charging=charging, warning=bool(alert))
+			warning = bool(self.get(KEYS.ERROR)) or (level is not None and level <= _BATTERY_ATTENTION_LEVEL)
+			_hidpp10.set_3leds(self._device, level, charging=charging, warning=warning)
 			self.changed(active=True, alert=alert, reason=reason, timestamp=timestamp)
 
-	def read_battery(self, timestamp=None):
+	def read_battery(self, timestamp=None, max_age=None):
+		"""Reads the battery info from the device, unless what is known is
+		newer than `max_age` seconds."""
 		if self._active:
+			if max_age is not None and (timestamp or _timestamp()) - self.battery_updated < max_age:
+				return
+
 			d = self._device
 			assert d
+			# also when failing, so devices without a battery are not asked too often
+			self.battery_updated = timestamp or _timestamp()
 
 			if d.protocol < 2.0:
 				battery = _hidpp10.get_battery(d)
@@ -235,6 +256,29 @@ class DeviceStatus(dict):
 				self[KEYS.BATTERY_CHARGING] = None
 				self.changed()
 
+	def _woke_up(self, timestamp):
+		# bring the device up to date, after it came online
+		if not self._active:
+			# offline again already
+			return
+		d = self._device
+
+		# Make sure to set notification flags on the device, they
+		# get cleared when the device is turned off (but not when the device
+		# goes idle, and we can't tell the difference right now).
+		if d.protocol < 2.0:
+			self[KEYS.NOTIFICATION_FLAGS] = d.enable_notifications()
+
+		# Devices lose configuration when they are turned off,
+		# make sure they're up-to-date.
+		# _log.debug("%s settings %s", d, d.settings)
+		with _scheduler.priority(_scheduler.PRIORITY.background):
+			for s in d.settings:
+				s.apply()
+
+		if self.get(KEYS.BATTERY_LEVEL) is None:
+			self.read_battery(timestamp)
+
 	def changed(self, active=None, alert=ALERT.NONE, reason=None, timestamp=None):
 		assert self._changed_callback
 		d = self._device
@@ -246,27 +290,19 @@ class DeviceStatus(dict):
 			was_active, self._active = self._active, active
 			if active:
 				if not was_active:
-					# Make sure to set notification flags on the device, they
-					# get cleared when the device is turned off (but not when the device
-					# goes idle, and we can't tell the difference right now).
-					if d.protocol < 2.0:
-						self[KEYS.NOTIFICATION_FLAGS] = d.enable_notifications()
-
 					# If we've been inactive for a long time, forget anything
 					# about the battery.
 					if self.updated > 0 and timestamp - self.updated > _LONG_SLEEP:
 						self[KEYS.BATTERY_LEVEL] = None
 						self[KEYS.BATTERY_STATUS] = None
 						self[KEYS.BATTERY_CHARGING] = None
+						self.battery_updated = 0
 
-					# Devices lose configuration when they are turned off,
-					# make sure they're up-to-date.
-					# _log.debug("%s settings %s", d, d.settings)
-					for s in d.settings:
-						s.apply()
-
-					if self.get(KEYS.BATTERY_LEVEL) is None:
-						self.read_battery(timestamp)
+					if self._executor:
+						# don't hold up the notifications of other devices
+						self._executor((d.receiver.path, d.number), self._woke_up, timestamp)
+					else:
+						self._woke_up(timestamp)
 			else:
 				if was_active:
 					battery = self.get(KEYS.BATTERY_LEVEL)
@@ -0,0 +1,148 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+## Copyright (C) 2012-2013  Daniel Pavel
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# Periodic battery reads, for the devices that don't tell us on their own.
+#
+# Devices that send battery notifications keep their status fresh, and are
+# never polled.  The others are read at intervals following how fast their
+# battery drains; everybody else (UI, local clients) just uses the status.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading as _threading
+from time import time as _timestamp
+
+from logging import getLogger, DEBUG as _DEBUG, INFO as _INFO
+_log = getLogger(__name__)
+del getLogger
+
+from . import history as _history
+from logitech_receiver import scheduler as _scheduler
+from logitech_receiver.status import KEYS as _K
+
+#
+#
+#
+
+# how often the poller wakes up to check which devices are due
+_TICK = 60
+# poll at least this often, and at most this often
+_MAX_INTERVAL = 60 * 60
+_MIN_INTERVAL = 5 * 60
+# when the discharge rate is not known yet
+_DEFAULT_INTERVAL = 15 * 60
+# with a battery this low, poll as often as allowed
+_LOW_LEVEL = 20
+
+
+def interval(device):
+	"""How long the battery info of a device stays good, in seconds."""
+	level = device.status.get(_K.BATTERY_LEVEL)
+	if level is not None and level <= _LOW_LEVEL:
+		return _MIN_INTERVAL
+
+	rate = _history.get(device).discharge_rate()
+	if not rate:
+		return _DEFAULT_INTERVAL
+	# about the time it takes to drain 1%
+	return int(max(_MIN_INTERVAL, min(_MAX_INTERVAL, 3600 / rate)))
+
+
+def _devices():
+	from solaar import listener as _listener
+	for l in list(_listener._all_listeners.values()):
+		r = l.receiver
+		if r:
+			# only the devices already known
+			for number in range(1, 1 + r.max_devices):
+				if number in r:
+					yield r[number]
+
+
+class _Poller(_threading.Thread):
+	def __init__(self):
+		super(_Poller, self).__init__(name=self.__class__.__name__)
+		self.daemon = True
+		self._active = True
+		self._paused = False
+		self._wake = _threading.Event()
+
+	def run(self):
+		_scheduler.set_priority(_scheduler.PRIORITY.background)
+		while self._active:
+			self._wake.wait(_TICK)
+			self._wake.clear()
+			if self._active and not self._paused:
+				self.poll()
+
+	def poll(self):
+		now = _timestamp()
+		for dev in _devices():
+			status = getattr(dev, 'status', None)
+			# offline devices tell us when they're back, and get read then
+			if status is None or not dev.online:
+				continue
+			try:
+				max_age = interval(dev)
+				if now - status.battery_updated >= max_age:
+					if _log.isEnabledFor(_DEBUG):
+						_log.debug("%s: polling battery, every %d seconds", dev, max_age)
+					status.read_battery(max_age=max_age)
+			except Exception:
+				_log.exception("polling battery of %s", dev)
+			if not self._active or self._paused:
+				break
+
+	def stop(self):
+		self._active = False
+		self._wake.set()
+
+
+_poller = None
+
+
+def start():
+	global _poller
+	assert _poller is None
+	_poller = _Poller()
+	_poller.start()
+
+
+def stop():
+	global _poller
+	if _poller:
+		_poller.stop()
+		_poller = None
+
+
+def pause():
+	"""Stops polling, e.g. while the system is suspended."""
+	if _poller:
+		if _log.isEnabledFor(_INFO):
+			_log.info("battery polling paused")
+		_poller._paused = True
+
+
+def resume():
+	if _poller:
+		if _log.isEnabledFor(_INFO):
+			_log.info("battery polling resumed")
+		# not right away, the devices need some time to reconnect after
+		# a resume; the next tick will do
+		_poller._paused = False
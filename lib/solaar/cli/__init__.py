@@ -44,6 +44,12 @@ def _create_parser():
 	sp.add_argument('device', nargs='?', default='all',
 					help='device to show information about; may be a device number (1..6), a serial, '
 						'a substring of a device\'s name, or "all" (the default)')
+	sp.add_argument('-c', '--concurrent', action='store_true',
+					help='probe all devices in parallel, printing each one as soon as it is done')
+	sp.add_argument('-t', '--timeout', type=float, metavar='SECONDS',
+					help='give up on devices not done probing after this long; implies --concurrent')
+	sp.add_argument('-j', '--json', action='store_true',
+					help='print a JSON object per line for each receiver and device')
 	sp.set_defaults(action='show')
 
 	sp = subparsers.add_parser('config', help='read/write device-specific settings',
@@ -148,12 +154,29 @@ def run(cli_args=None, hidraw_path=None):
 	assert action in actions
 
 	try:
+		from importlib import import_module
+		m = import_module('.' + action, package=__name__)
+
+		# when Solaar is already running, it owns the receivers; ask it instead
+		# of opening them again (unless a specific receiver was requested)
+		if hidraw_path is None and hasattr(m, 'run_remote'):
+			from solaar import ipc as _ipc
+			client = _ipc.connect()
+			if client:
+				if _log.isEnabledFor(_DEBUG):
+					_log.debug("forwarding '%s' to the running instance", action)
+				try:
+					return m.run_remote(client, args)
+				finally:
+					client.close()
+
+		# keeps what was learned about the receivers across runs
+		import solaar.configuration
+
 		c = list(_receivers(hidraw_path))
 		if not c:
 			raise Exception('Logitech receiver not found')
 
-		from importlib import import_module
-		m = import_module('.' + action, package=__name__)
 		m.run(c, args, _find_receiver, _find_device)
 	except AssertionError as e:
 		from traceback import extract_tb
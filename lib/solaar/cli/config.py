@@ -24,62 +24,43 @@ from solaar import configuration as _configuration
 from logitech_receiver import settings as _settings
 
 
-def _print_setting(s, verbose=True):
-	print ('#', s.label)
+def _print_setting_help(label, description, is_toggle, choices, verbose):
+	print ('#', label)
 	if verbose:
-		if s.description:
-			print ('#', s.description.replace('\n', ' '))
-		if s.kind == _settings.KIND.toggle:
+		if description:
+			print ('#', description.replace('\n', ' '))
+		if is_toggle:
 			print ('#   possible values: on/true/t/yes/y/1 or off/false/f/no/n/0')
-		elif s.choices:
-			print ('#   possible values: one of [', ', '.join(str(v) for v in s.choices), '], or higher/lower/highest/max/lowest/min')
+		elif choices:
+			print ('#   possible values: one of [', ', '.join(str(v) for v in choices), '], or higher/lower/highest/max/lowest/min')
 		else:
 			# wtf?
 			pass
-	value = s.read(cached=False)
-	if value is None:
-		print (s.name, '= ? (failed to read from device)')
-	else:
-		print (s.name, '= %r' % value)
 
 
-def run(receivers, args, find_receiver, find_device):
-	assert receivers
-	assert args.device
-
-	device_name = args.device.lower()
-	dev = find_device(receivers, device_name)
-
-	if not dev.ping():
-		raise Exception('%s is offline' % dev.name)
+def _print_setting_value(name, value):
+	if value is None:
+		print (name, '= ? (failed to read from device)')
+	else:
+		print (name, '= %r' % value)
 
-	if not dev.settings:
-		raise Exception('no settings for %s' % dev.name)
 
-	_configuration.attach_to(dev)
+def _print_setting(s, verbose=True):
+	_print_setting_help(s.label, s.description, s.kind == _settings.KIND.toggle, s.choices, verbose)
+	_print_setting_value(s.name, s.read(cached=False))
 
-	if not args.setting:
-		print (dev.name, '(%s) [%s:%s]' % (dev.codename, dev.wpid, dev.serial))
-		for s in dev.settings:
-			print ('')
-			_print_setting(s)
-		return
 
-	setting_name = args.setting.lower()
-	setting = None
-	for s in dev.settings:
-		if setting_name == s.name.lower():
-			setting = s
-			break
-	if setting is None:
-		raise Exception("no setting '%s' for %s" % (args.setting, dev.name))
+def _print_remote_setting(state, verbose=True):
+	# a setting as described by the running instance
+	_print_setting_help(state['label'], state['description'], state['kind'] == str(_settings.KIND.toggle),
+					state['choices'], verbose)
+	_print_setting_value(state['name'], state['value'])
 
-	if args.value is None:
-		_print_setting(setting)
-		return
 
+def parse_value(setting, text):
+	"""Interprets a value given as text (e.g. on the command line) for a setting."""
 	if setting.kind == _settings.KIND.toggle:
-		value = args.value
+		value = text
 		try:
 			value = bool(int(value))
 		except:
@@ -91,7 +72,7 @@ def run(receivers, args, find_receiver, find_device):
 				raise Exception("don't know how to interpret '%s' as boolean" % value)
 
 	elif setting.choices:
-		value = args.value.lower()
+		value = text.lower()
 
 		if value in ('higher', 'lower'):
 			old_value = setting.read()
@@ -114,14 +95,76 @@ def run(receivers, args, find_receiver, find_device):
 
 	elif setting.kind == _settings.KIND.range:
 		try:
-			value = int(args.value)
+			value = int(text)
 		except ValueError:
-			raise Exception("can't interpret '%s' as integer" % args.value)
+			raise Exception("can't interpret '%s' as integer" % text)
 
 	else:
 		raise NotImplemented
 
+	return value
+
+
+def run(receivers, args, find_receiver, find_device):
+	assert receivers
+	assert args.device
+
+	device_name = args.device.lower()
+	dev = find_device(receivers, device_name)
+
+	if not dev.ping():
+		raise Exception('%s is offline' % dev.name)
+
+	if not dev.settings:
+		raise Exception('no settings for %s' % dev.name)
+
+	_configuration.attach_to(dev)
+
+	if not args.setting:
+		print (dev.name, '(%s) [%s:%s]' % (dev.codename, dev.wpid, dev.serial))
+		for s in dev.settings:
+			print ('')
+			_print_setting(s)
+		return
+
+	setting_name = args.setting.lower()
+	setting = None
+	for s in dev.settings:
+		if setting_name == s.name.lower():
+			setting = s
+			break
+	if setting is None:
+		raise Exception("no setting '%s' for %s" % (args.setting, dev.name))
+
+	if args.value is None:
+		_print_setting(setting)
+		return
+
+	value = parse_value(setting, args.value)
 	result = setting.write(value)
 	if result is None:
 		raise Exception("failed to set '%s' = '%s' [%r]" % (setting.name, str(value), value))
 	_print_setting(setting, False)
+
+
+def run_remote(client, args):
+	"""Same as run(), through the running instance that owns the receivers."""
+	assert args.device
+
+	if not args.setting:
+		dev = client.request('status', device=args.device)
+		if not dev['online']:
+			raise Exception('%s is offline' % dev['name'])
+		if not dev['settings']:
+			raise Exception('no settings for %s' % dev['name'])
+		print (dev['name'], '(%s) [%s:%s]' % (dev['codename'], dev['wpid'], dev['serial']))
+		for s in dev['settings']:
+			print ('')
+			_print_remote_setting(s)
+		return
+
+	if args.value is None:
+		_print_remote_setting(client.request('get', device=args.device, setting=args.setting, force=True))
+		return
+
+	_print_remote_setting(client.request('set', device=args.device, setting=args.setting, value=args.value), False)
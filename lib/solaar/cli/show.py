@@ -20,156 +20,172 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 
+import json as _json
+import sys as _sys
+import threading as _threading
+from time import time as _timestamp
+
+try:
+	from Queue import Queue as _Queue, Empty as _Empty
+	from StringIO import StringIO as _StringIO
+except ImportError:
+	from queue import Queue as _Queue, Empty as _Empty
+	from io import StringIO as _StringIO
+
 from logitech_receiver import (
 				hidpp10 as _hidpp10,
 				hidpp20 as _hidpp20,
 				special_keys as _special_keys,
 			)
+from logitech_receiver.common import NamedInt as _NamedInt
+from logitech_receiver.listener import threaded_handle as _threaded_handle
 
+"""Default deadline for probing all devices in parallel, in seconds."""
+_DEFAULT_TIMEOUT = 10
 
-def _print_receiver(receiver):
+
+def _print_receiver(receiver, out=None):
 	paired_count = receiver.count()
 
-	print ('Unifying Receiver')
-	print ('  Device path  :', receiver.path)
-	print ('  USB id       : 046d:%s' % receiver.product_id)
-	print ('  Serial       :', receiver.serial)
+	print ('Unifying Receiver', file=out)
+	print ('  Device path  :', receiver.path, file=out)
+	print ('  USB id       : 046d:%s' % receiver.product_id, file=out)
+	print ('  Serial       :', receiver.serial, file=out)
 	for f in receiver.firmware:
-		print ('    %-11s: %s' % (f.kind, f.version))
+		print ('    %-11s: %s' % (f.kind, f.version), file=out)
 
-	print ('  Has', paired_count, 'paired device(s) out of a maximum of %d.' % receiver.max_devices)
+	print ('  Has', paired_count, 'paired device(s) out of a maximum of %d.' % receiver.max_devices, file=out)
 
 	notification_flags = _hidpp10.get_notification_flags(receiver)
 	if notification_flags is not None:
 		if notification_flags:
 			notification_names = _hidpp10.NOTIFICATION_FLAG.flag_names(notification_flags)
-			print ('  Notifications: %s (0x%06X)' % (', '.join(notification_names), notification_flags))
+			print ('  Notifications: %s (0x%06X)' % (', '.join(notification_names), notification_flags), file=out)
 		else:
-			print ('  Notifications: (none)')
+			print ('  Notifications: (none)', file=out)
 
 	activity = receiver.read_register(_hidpp10.REGISTERS.devices_activity)
 	if activity:
 		activity = [(d, ord(activity[d - 1:d])) for d in range(1, receiver.max_devices)]
 		activity_text = ', '.join(('%d=%d' % (d, a)) for d, a in activity if a > 0)
-		print ('  Device activity counters:', activity_text or '(empty)')
+		print ('  Device activity counters:', activity_text or '(empty)', file=out)
 
 
-def _print_device(dev):
+def _print_device(dev, out=None):
 	assert dev
 	# check if the device is online
 	dev.ping()
 
-	print ('  %d: %s' % (dev.number, dev.name))
-	print ('     Codename     :', dev.codename)
-	print ('     Kind         :', dev.kind)
-	print ('     Wireless PID :', dev.wpid)
+	print ('  %d: %s' % (dev.number, dev.name), file=out)
+	print ('     Codename     :', dev.codename, file=out)
+	print ('     Kind         :', dev.kind, file=out)
+	print ('     Wireless PID :', dev.wpid, file=out)
 	if dev.protocol:
-		print ('     Protocol     : HID++ %1.1f' % dev.protocol)
+		print ('     Protocol     : HID++ %1.1f' % dev.protocol, file=out)
 	else:
-		print ('     Protocol     : unknown (device is offline)')
+		print ('     Protocol     : unknown (device is offline)', file=out)
 	if dev.polling_rate:
-		print ('     Polling rate :', dev.polling_rate, 'ms (%dHz)' % (1000 // dev.polling_rate))
-	print ('     Serial number:', dev.serial)
+		print ('     Polling rate :', dev.polling_rate, 'ms (%dHz)' % (1000 // dev.polling_rate), file=out)
+	print ('     Serial number:', dev.serial, file=out)
 	for fw in dev.firmware:
-		print ('       %11s:' % fw.kind, (fw.name + ' ' + fw.version).strip())
+		print ('       %11s:' % fw.kind, (fw.name + ' ' + fw.version).strip(), file=out)
 
 	if dev.power_switch_location:
-		print ('     The power switch is located on the %s.' % dev.power_switch_location)
+		print ('     The power switch is located on the %s.' % dev.power_switch_location, file=out)
 
 	if dev.online:
 		notification_flags = _hidpp10.get_notification_flags(dev)
 		if notification_flags is not None:
 			if notification_flags:
 				notification_names = _hidpp10.NOTIFICATION_FLAG.flag_names(notification_flags)
-				print ('     Notifications: %s (0x%06X).' % (', '.join(notification_names), notification_flags))
+				print ('     Notifications: %s (0x%06X).' % (', '.join(notification_names), notification_flags), file=out)
 			else:
-				print ('     Notifications: (none).')
+				print ('     Notifications: (none).', file=out)
 
 	if dev.online and dev.features:
-		print ('     Supports %d HID++ 2.0 features:' % len(dev.features))
+		print ('     Supports %d HID++ 2.0 features:' % len(dev.features), file=out)
 		for index, feature in enumerate(dev.features):
 			feature = dev.features[index]
 			flags = dev.request(0x0000, feature.bytes(2))
 			flags = 0 if flags is None else ord(flags[1:2])
 			flags = _hidpp20.FEATURE_FLAG.flag_names(flags)
-			print ('        %2d: %-22s {%04X}   %s' % (index, feature, feature, ', '.join(flags)))
+			print ('        %2d: %-22s {%04X}   %s' % (index, feature, feature, ', '.join(flags)), file=out)
 			if feature == _hidpp20.FEATURE.HIRES_WHEEL:
 				wheel = _hidpp20.get_hires_wheel(dev)
 				if wheel:
 					multi, has_invert, has_switch, inv, res, target, ratchet = wheel
-					print("            Multiplier: %s" % multi)
+					print("            Multiplier: %s" % multi, file=out)
 					if has_invert:
-						print("            Has invert")
+						print("            Has invert", file=out)
 						if inv:
-							print("              Inverse wheel motion")
+							print("              Inverse wheel motion", file=out)
 						else:
-							print("              Normal wheel motion")
+							print("              Normal wheel motion", file=out)
 					if has_switch:
-						print("            Has ratchet switch")
+						print("            Has ratchet switch", file=out)
 						if ratchet:
-							print("              Normal wheel mode")
+							print("              Normal wheel mode", file=out)
 						else:
-							print("              Free wheel mode")
+							print("              Free wheel mode", file=out)
 					if res:
-						print("            High resolution mode")
+						print("            High resolution mode", file=out)
 					else:
-						print("            Low resolution mode")
+						print("            Low resolution mode", file=out)
 					if target:
-						print("            HID++ notification")
+						print("            HID++ notification", file=out)
 					else:
-						print("            HID notification")
+						print("            HID notification", file=out)
 			if feature == _hidpp20.FEATURE.MOUSE_POINTER:
 				mouse_pointer = _hidpp20.get_mouse_pointer_info(dev)
 				if mouse_pointer:
-					print("            DPI: %s" % mouse_pointer['dpi'])
-					print("            Acceleration: %s" % mouse_pointer['acceleration'])
+					print("            DPI: %s" % mouse_pointer['dpi'], file=out)
+					print("            Acceleration: %s" % mouse_pointer['acceleration'], file=out)
 					if mouse_pointer['suggest_os_ballistics']:
-						print("            Use OS ballistics")
+						print("            Use OS ballistics", file=out)
 					else:
-						print("            Override OS ballistics")
+						print("            Override OS ballistics", file=out)
 					if mouse_pointer['suggest_vertical_orientation']:
-						print("            Provide vertical tuning, trackball")
+						print("            Provide vertical tuning, trackball", file=out)
 					else:
-						print("            No vertical tuning, standard mice")
+						print("            No vertical tuning, standard mice", file=out)
 			if feature == _hidpp20.FEATURE.VERTICAL_SCROLLING:
 				vertical_scrolling_info = _hidpp20.get_vertical_scrolling_info(dev)
 				if vertical_scrolling_info:
-					print("            Roller type: %s" % vertical_scrolling_info['roller'])
-					print("            Ratchet per turn: %s" % vertical_scrolling_info['ratchet'])
-					print("            Scroll lines: %s" % vertical_scrolling_info['lines'])
+					print("            Roller type: %s" % vertical_scrolling_info['roller'], file=out)
+					print("            Ratchet per turn: %s" % vertical_scrolling_info['ratchet'], file=out)
+					print("            Scroll lines: %s" % vertical_scrolling_info['lines'], file=out)
 			if feature == _hidpp20.FEATURE.HI_RES_SCROLLING:
 				scrolling_mode, scrolling_resolution = _hidpp20.get_hi_res_scrolling_info(dev)
 				if scrolling_mode:
-					print("            Hi-res scrolling enabled")
+					print("            Hi-res scrolling enabled", file=out)
 				else:
-					print("            Hi-res scrolling disabled")
+					print("            Hi-res scrolling disabled", file=out)
 				if scrolling_resolution:
-					print("            Hi-res scrolling multiplier: %s" % scrolling_resolution)
+					print("            Hi-res scrolling multiplier: %s" % scrolling_resolution, file=out)
 			if feature == _hidpp20.FEATURE.POINTER_SPEED:
 				pointer_speed = _hidpp20.get_pointer_speed_info(dev)
 				if pointer_speed:
-					print("            Pointer Speed: %s" % pointer_speed)
+					print("            Pointer Speed: %s" % pointer_speed, file=out)
 			if feature == _hidpp20.FEATURE.LOWRES_WHEEL:
 				wheel_status = _hidpp20.get_lowres_wheel_status(dev)
 				if wheel_status:
-					print("            Wheel Reports: %s" % wheel_status)
+					print("            Wheel Reports: %s" % wheel_status, file=out)
 
 	if dev.online and dev.keys:
-		print ('     Has %d reprogrammable keys:' % len(dev.keys))
+		print ('     Has %d reprogrammable keys:' % len(dev.keys), file=out)
 		for k in dev.keys:
 			flags = _special_keys.KEY_FLAG.flag_names(k.flags)
 			# TODO: add here additional variants for other REPROG_CONTROLS
 			if dev.keys.keyversion == 1:
-				print ('        %2d: %-26s => %-27s   %s' % (k.index, k.key, k.task, ', '.join(flags)))
+				print ('        %2d: %-26s => %-27s   %s' % (k.index, k.key, k.task, ', '.join(flags)), file=out)
 			if dev.keys.keyversion == 4:
-				print ('        %2d: %-26s, default: %-27s => %-26s' % (k.index, k.key, k.task, k.remapped))
-				print ('             %s, pos:%d, group:%1d, gmask:%d' % ( ', '.join(flags), k.pos, k.group, k.group_mask))
+				print ('        %2d: %-26s, default: %-27s => %-26s' % (k.index, k.key, k.task, k.remapped), file=out)
+				print ('             %s, pos:%d, group:%1d, gmask:%d' % ( ', '.join(flags), k.pos, k.group, k.group_mask), file=out)
 	if dev.online:
 		battery = _hidpp20.get_battery(dev)
 		if battery is None:
 			battery = _hidpp10.get_battery(dev)
 		if battery is not None:
-			from logitech_receiver.common import NamedInt as _NamedInt
 			level, status = battery
 			if level is not None:
 				if isinstance(level, _NamedInt):
@@ -178,11 +194,176 @@ def _print_device(dev):
 					text = '%d%%' % level
 			else:
 				text = 'N/A'
-			print ('     Battery: %s, %s.' % (text, status))
+			print ('     Battery: %s, %s.' % (text, status), file=out)
 		else:
-			print ('     Battery status unavailable.')
+			print ('     Battery status unavailable.', file=out)
 	else:
-		print ('     Battery: unknown (device is offline).')
+		print ('     Battery: unknown (device is offline).', file=out)
+
+
+def _receiver_record(receiver):
+	notification_flags = _hidpp10.get_notification_flags(receiver)
+	return {
+		'type': 'receiver',
+		'name': receiver.name,
+		'path': receiver.path,
+		'usb_id': '046d:%s' % receiver.product_id,
+		'serial': receiver.serial,
+		'firmware': [{'kind': str(f.kind), 'version': f.version} for f in receiver.firmware or ()],
+		'paired': receiver.count(),
+		'max_devices': receiver.max_devices,
+		'notifications': None if notification_flags is None
+						else list(_hidpp10.NOTIFICATION_FLAG.flag_names(notification_flags)),
+	}
+
+
+def _device_record(dev):
+	assert dev
+	# check if the device is online
+	dev.ping()
+
+	record = {
+		'type': 'device',
+		'receiver': dev.receiver.path,
+		'number': dev.number,
+		'name': dev.name,
+		'codename': dev.codename,
+		'kind': str(dev.kind),
+		'wpid': dev.wpid,
+		'online': bool(dev.online),
+		'protocol': dev.protocol or None,
+		'polling_rate': dev.polling_rate or None,
+		'serial': dev.serial,
+		'firmware': [{'kind': str(fw.kind), 'name': fw.name, 'version': fw.version} for fw in dev.firmware],
+		'power_switch': str(dev.power_switch_location) if dev.power_switch_location else None,
+	}
+
+	if dev.online:
+		notification_flags = _hidpp10.get_notification_flags(dev)
+		if notification_flags is not None:
+			record['notifications'] = list(_hidpp10.NOTIFICATION_FLAG.flag_names(notification_flags))
+
+	if dev.online and dev.features:
+		features = list(dev.features)
+		# the feature flags of all features, in one pipelined batch
+		replies = dev.request_many([(0x0000, f.bytes(2)) for f in features])
+		record['features'] = [{'index': index,
+								'id': '%04X' % feature,
+								'name': str(feature),
+								'flags': list(_hidpp20.FEATURE_FLAG.flag_names(0 if flags is None else ord(flags[1:2])))}
+								for index, (feature, flags) in enumerate(zip(features, replies))]
+
+	if dev.online and dev.keys:
+		record['keys'] = keys = []
+		for k in dev.keys:
+			key = {'index': k.index, 'key': str(k.key), 'task': str(k.task),
+					'flags': list(_special_keys.KEY_FLAG.flag_names(k.flags))}
+			if dev.keys.keyversion == 4:
+				key['remapped'] = str(k.remapped)
+			keys.append(key)
+
+	if dev.online:
+		battery = _hidpp20.get_battery(dev)
+		if battery is None:
+			battery = _hidpp10.get_battery(dev)
+		if battery is not None:
+			level, status = battery
+			record['battery'] = {'level': str(level) if isinstance(level, _NamedInt) else level,
+								'status': None if status is None else str(status)}
+
+	return record
+
+
+def _print_record(record, out=None):
+	print (_json.dumps(record, sort_keys=True), file=out)
+	if out is None:
+		_sys.stdout.flush()
+
+
+def _show_devices(receivers, json, timeout):
+	"""Probes all the devices of all the receivers in parallel, printing the
+	result for each device as soon as it is complete.  Devices still being
+	probed when the timeout expires are reported as such."""
+	devices = []
+	for r in receivers:
+		if not isinstance(r.handle, int):
+			continue
+		_thread_handles(r)
+		if json:
+			_print_record(_receiver_record(r))
+		else:
+			_print_receiver(r)
+			print ('')
+		count = r.count()
+		if count:
+			for dev in r:
+				devices.append(dev)
+				count -= 1
+				if not count:
+					break
+
+	_probe_devices(devices, json, timeout)
+
+
+def _thread_handles(receiver):
+	if isinstance(receiver.handle, int):
+		# each probing thread will talk to the receiver through its own handle
+		receiver.handle = _threaded_handle(receiver.path, receiver.handle)
+
+
+def _known_name(dev):
+	# the name properties may ask the device, which may still be probed
+	return dev._name or dev._codename or dev.wpid
+
+
+def _probe_devices(devices, json, timeout):
+	results = _Queue()
+
+	def _probe(dev):
+		try:
+			if json:
+				result = _device_record(dev)
+			else:
+				result = _StringIO()
+				_print_device(dev, result)
+				result = result.getvalue()
+		except Exception as e:
+			result = e
+		results.put((dev, result))
+
+	for dev in devices:
+		t = _threading.Thread(name='show %s' % dev, target=_probe, args=(dev, ))
+		t.daemon = True
+		t.start()
+
+	deadline = _timestamp() + timeout
+	pending = list(devices)
+	while pending:
+		try:
+			dev, result = results.get(timeout=max(0, deadline - _timestamp()))
+		except _Empty:
+			break
+		pending.remove(dev)
+		if isinstance(result, Exception):
+			if json:
+				_print_record({'type': 'device', 'receiver': dev.receiver.path, 'number': dev.number, 'error': str(result)})
+			else:
+				print ('  %d: %s' % (dev.number, _known_name(dev)))
+				print ('     Error: %s' % result)
+				print ('')
+		elif json:
+			_print_record(result)
+		else:
+			print (result)
+			_sys.stdout.flush()
+
+	for dev in pending:
+		if json:
+			_print_record({'type': 'device', 'receiver': dev.receiver.path, 'number': dev.number, 'error': 'timeout'})
+		else:
+			print ('  %d: %s' % (dev.number, _known_name(dev)))
+			print ('     Timed out after %0.1f seconds.' % timeout)
+			print ('')
 
 
 def run(receivers, args, find_receiver, find_device):
@@ -190,26 +371,51 @@ def run(receivers, args, find_receiver, find_device):
 	assert args.device
 
 	device_name = args.device.lower()
+	json = getattr(args, 'json', False)
+	timeout = getattr(args, 'timeout', None)
+	if timeout is None and getattr(args, 'concurrent', False):
+		timeout = _DEFAULT_TIMEOUT
 
 	if device_name == 'all':
+		if timeout is not None:
+			_show_devices(receivers, json, timeout)
+			return
+
 		for r in receivers:
-			_print_receiver(r)
+			if json:
+				_print_record(_receiver_record(r))
+			else:
+				_print_receiver(r)
 			count = r.count()
 			if count:
 				for dev in r:
-					print ('')
-					_print_device(dev)
+					if json:
+						_print_record(_device_record(dev))
+					else:
+						print ('')
+						_print_device(dev)
 					count -= 1
 					if not count:
 						break
-			print ('')
+			if not json:
+				print ('')
 		return
 
 	dev = find_receiver(receivers, device_name)
 	if dev:
-		_print_receiver(dev)
+		if json:
+			_print_record(_receiver_record(dev))
+		else:
+			_print_receiver(dev)
 		return
 
 	dev = find_device(receivers, device_name)
 	assert dev
-	_print_device(dev)
+	if timeout is not None:
+		_thread_handles(dev.receiver)
+		_probe_devices([dev], json, timeout)
+	elif json:
+		_print_record(_device_record(dev))
+	else:
+		_print_device(dev)
+
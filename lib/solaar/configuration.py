@@ -20,6 +20,8 @@
 import os as _os
 import os.path as _path
 from json import load as _json_load, dump as _json_save
+from tempfile import mkstemp as _mkstemp
+from threading import Lock as _Lock
 
 from logging import getLogger, DEBUG as _DEBUG, INFO as _INFO
 _log = getLogger(__name__)
@@ -28,6 +30,10 @@ del getLogger
 _XDG_CONFIG_HOME = _os.environ.get('XDG_CONFIG_HOME') or _path.expanduser(_path.join('~', '.config'))
 _file_path = _path.join(_XDG_CONFIG_HOME, 'solaar', 'config.json')
 
+_XDG_CACHE_HOME = _os.environ.get('XDG_CACHE_HOME') or _path.expanduser(_path.join('~', '.cache'))
+_choices_path = _path.join(_XDG_CACHE_HOME, 'solaar', 'choices.json')
+_receivers_path = _path.join(_XDG_CACHE_HOME, 'solaar', 'receivers.json')
+
 
 from solaar import __version__
 _KEY_VERSION = '_version'
@@ -121,6 +127,72 @@ def _device_entry(device):
 	return c
 
 
+class _CacheStore(dict):
+	"""What was read from devices, that does not change for a given key; only
+	a cache, kept apart from the configuration."""
+	def __init__(self, path):
+		super(_CacheStore, self).__init__()
+		self.path = path
+		self._loaded = False
+		self._lock = _Lock()
+
+	def _load(self):
+		self._loaded = True
+		if _path.isfile(self.path):
+			try:
+				with open(self.path, 'r') as f:
+					self.update(_json_load(f))
+			except:
+				_log.error("failed to load from %s", self.path)
+
+	def _save(self):
+		# written to a temporary file first, so the file is never seen half-written
+		tmp_path = None
+		try:
+			dirname = _path.dirname(self.path)
+			if not _path.isdir(dirname):
+				_os.makedirs(dirname)
+			fd, tmp_path = _mkstemp(prefix='.cache-', dir=dirname)
+			with _os.fdopen(fd, 'w') as f:
+				_json_save(dict(self), f, sort_keys=True)
+			_os.rename(tmp_path, self.path)
+		except:
+			_log.error("failed to save to %s", self.path)
+			if tmp_path and _path.exists(tmp_path):
+				_os.remove(tmp_path)
+
+	def get(self, key, default=None):
+		with self._lock:
+			if not self._loaded:
+				self._load()
+			return super(_CacheStore, self).get(key, default)
+
+	def __setitem__(self, key, value):
+		with self._lock:
+			if not self._loaded:
+				self._load()
+			if super(_CacheStore, self).get(key) == value:
+				return
+			super(_CacheStore, self).__setitem__(key, value)
+			self._save()
+
+	def __delitem__(self, key):
+		with self._lock:
+			if not self._loaded:
+				self._load()
+			if key in self:
+				super(_CacheStore, self).__delitem__(key)
+				self._save()
+
+from logitech_receiver import settings_templates as _settings_templates
+_settings_templates.choices_store = _CacheStore(_choices_path)
+del _settings_templates
+
+from logitech_receiver import receiver as _receiver
+_receiver.capabilities_store = _CacheStore(_receivers_path)
+del _receiver
+
+
 def attach_to(device):
 	"""Apply the last saved configuration to a device."""
 	if not _configuration:
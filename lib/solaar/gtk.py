@@ -48,6 +48,8 @@ def _parse_arguments():
 							help='unifying receiver to use; the first detected receiver if unspecified. Example: /dev/hidraw2')
 	arg_parser.add_argument('--restart-on-wake-up', action='store_true',
 							help='restart Solaar on sleep wake-up (experimental)')
+	arg_parser.add_argument('--daemon', action='store_true',
+							help='run without a user interface, only serving local clients like %s-cli' % NAME.lower())
 	arg_parser.add_argument('-V', '--version', action='version', version='%(prog)s ' + __version__)
 	arg_parser.add_argument('--help-actions', action='store_true',
 							help='print help for the optional actions')
@@ -76,6 +78,58 @@ def _parse_arguments():
 	return args
 
 
+def _start_ipc(ipc):
+	# the local API is a convenience, Solaar works fine without it
+	try:
+		ipc.start()
+	except Exception as e:
+		import logging
+		logging.warning("local clients will not be served: %s", e)
+
+
+def _watch_upower(args, listener):
+	import solaar.upower as _upower
+	import solaar.battery as _battery
+	# no polling while suspended
+	_upower.watch(_battery.resume, _battery.pause)
+	if args.restart_on_wake_up:
+		_upower.watch(listener.start_all, listener.stop_all)
+	else:
+		_upower.watch(listener.resume_all)
+
+
+def _run_daemon(args):
+	import logging
+	from gi.repository import GLib
+	import solaar.listener as listener
+	import solaar.ipc as ipc
+
+	def _error(reason, object):
+		logging.error("error: %s %s", reason, object)
+
+	# the daemon exists to serve local clients, there's no point without it
+	ipc.start()
+	try:
+		listener.setup_scanner(ipc.status_changed, _error)
+		_watch_upower(args, listener)
+
+		loop = GLib.MainLoop()
+		import signal
+		for signum in (signal.SIGINT, signal.SIGTERM):
+			signal.signal(signum, lambda *ignore: GLib.idle_add(loop.quit))
+
+		import solaar.battery as battery
+		listener.start_all()
+		battery.start()
+		try:
+			loop.run()
+		finally:
+			battery.stop()
+			listener.stop_all()
+	finally:
+		ipc.stop()
+
+
 def main():
 	_require('pyudev', 'python-pyudev')
 
@@ -90,22 +144,37 @@ def main():
 		return _cli.run(args.action, args.hidraw_path)
 
 	gi = _require('gi', 'python-gi')
+	if args.daemon:
+		try:
+			return _run_daemon(args)
+		except Exception as e:
+			import sys
+			sys.exit('%s: error: %s' % (NAME.lower(), e))
+
 	gi.require_version('Gtk', '3.0')
 	_require('gi.repository.Gtk', 'gir1.2-gtk-3.0')
 
 	try:
 		import solaar.ui as ui
 		import solaar.listener as listener
-		listener.setup_scanner(ui.status_changed, ui.error_dialog)
-
-		import solaar.upower as _upower
-		if args.restart_on_wake_up:
-			_upower.watch(listener.start_all, listener.stop_all)
-		else:
-			_upower.watch(listener.ping_all)
-
-		# main UI event loop
-		ui.run_loop(listener.start_all, listener.stop_all)
+		import solaar.ipc as ipc
+
+		def _status_changed(device, alert=ui.ALERT.NONE, reason=None):
+			ipc.status_changed(device, alert, reason)
+			ui.status_changed(device, alert, reason)
+
+		listener.setup_scanner(_status_changed, ui.error_dialog)
+		_watch_upower(args, listener)
+
+		# main UI event loop; solaar-cli goes through us while it runs
+		_start_ipc(ipc)
+		import solaar.battery as battery
+		battery.start()
+		try:
+			ui.run_loop(listener.start_all, listener.stop_all)
+		finally:
+			battery.stop()
+			ipc.stop()
 	except Exception as e:
 		import sys
 		sys.exit('%s: error: %s' % (NAME.lower(), e))
@@ -0,0 +1,319 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+## Copyright (C) 2012-2013  Daniel Pavel
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# Battery (and light) level history of each device, kept across runs.
+#
+# Each device has its own append-only file of fixed-size records.  Older
+# samples are thinned out as they age, and dropped after a while, so the
+# files stay small.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os as _os
+import os.path as _path
+import struct as _struct
+import threading as _threading
+from collections import namedtuple
+from time import time as _timestamp
+
+from logging import getLogger, DEBUG as _DEBUG
+_log = getLogger(__name__)
+del getLogger
+
+from logitech_receiver.status import KEYS as _K
+
+_XDG_DATA_HOME = _os.environ.get('XDG_DATA_HOME') or _path.expanduser(_path.join('~', '.local', 'share'))
+_history_dir = _path.join(_XDG_DATA_HOME, 'solaar', 'history')
+
+#
+#
+#
+
+"""A history sample; `level` and `lux` are ``None`` when not known."""
+Sample = namedtuple('Sample', ('timestamp', 'level', 'charging', 'lux'))
+del namedtuple
+
+# timestamp, level (-1 if unknown), flags, lux
+_RECORD = _struct.Struct('<IbBH')
+_FLAG_CHARGING = 0x01
+_FLAG_LUX = 0x02
+
+# samples older than the age are thinned out to one per resolution (seconds)
+_DOWNSAMPLE = (
+				(7 * 24 * 3600, 3600),
+				(24 * 3600, 10 * 60),
+			)
+# samples older than this are dropped
+_RETENTION = 90 * 24 * 3600
+# an unchanged sample is stored only if the last one is older than this
+_MIN_INTERVAL = 10 * 60
+# thin out the history every so many samples appended
+_COMPACT_EVERY = 256
+
+# the discharge rate is estimated from at most this much of the latest discharge
+_RATE_WINDOW = 3 * 24 * 3600
+# ...and needs at least this much of it
+_RATE_MIN_SPAN = 30 * 60
+
+"""Battery levels (percent) that trigger a low battery alert, once each
+time the level drops under them."""
+LOW_BATTERY_THRESHOLDS = (20, 10, 5)
+# the level must rise this much over a threshold before it may alert again
+_THRESHOLD_REARM = 5
+
+
+def _pack(sample):
+	flags = _FLAG_CHARGING if sample.charging else 0
+	if sample.lux is not None:
+		flags |= _FLAG_LUX
+	return _RECORD.pack(int(sample.timestamp),
+						-1 if sample.level is None else int(sample.level),
+						flags,
+						0 if sample.lux is None else min(int(sample.lux), 0xFFFF))
+
+
+def _unpack(data):
+	timestamp, level, flags, lux = _RECORD.unpack(data)
+	return Sample(timestamp,
+					None if level < 0 else level,
+					bool(flags & _FLAG_CHARGING),
+					lux if flags & _FLAG_LUX else None)
+
+
+def downsample(samples, now=None):
+	"""Thins out the older samples, keeping the last one in each interval,
+	and drops the ones past retention."""
+	now = now or _timestamp()
+	result = []
+	last_bucket = None
+	for s in samples:
+		age = now - s.timestamp
+		if age > _RETENTION:
+			continue
+		bucket = None
+		for min_age, resolution in _DOWNSAMPLE:
+			if age > min_age:
+				bucket = (resolution, s.timestamp // resolution)
+				break
+		if bucket is not None and bucket == last_bucket:
+			# a later sample in the same interval replaces this one
+			result[-1] = s
+		else:
+			result.append(s)
+		last_bucket = bucket
+	return result
+
+
+def discharge_rate(samples, now=None):
+	"""Estimates how fast the battery is discharging, from the latest run of
+	samples without charging (least-squares fit of the level over time).
+
+	:returns: percent per hour, or ``None`` if there is not enough data.
+	"""
+	now = now or _timestamp()
+	run = []
+	for s in reversed(samples):
+		if s.level is None:
+			continue
+		if s.charging or now - s.timestamp > _RATE_WINDOW:
+			break
+		if run and s.level < run[-1].level:
+			# the level went up since, the battery was replaced or charged
+			break
+		run.append(s)
+
+	if len(run) < 2 or run[0].timestamp - run[-1].timestamp < _RATE_MIN_SPAN:
+		return None
+
+	count = len(run)
+	mean_t = sum(s.timestamp for s in run) / count
+	mean_l = sum(s.level for s in run) / count
+	var = sum((s.timestamp - mean_t) ** 2 for s in run)
+	cov = sum((s.timestamp - mean_t) * (s.level - mean_l) for s in run)
+	if var == 0:
+		return None
+	rate = -cov / var * 3600
+	return rate if rate > 0 else None
+
+
+class History(object):
+	"""The battery history of one device."""
+	def __init__(self, device_id, path=None):
+		self.device_id = device_id
+		self.path = path or _path.join(_history_dir, device_id.replace(':', '-') + '.bin')
+		self._samples = None
+		self._appended = 0
+		# the lowest threshold already alerted for
+		self._alerted = None
+		self._lock = _threading.Lock()
+
+	def _load(self):
+		samples = []
+		if _path.isfile(self.path):
+			try:
+				with open(self.path, 'rb') as f:
+					data = f.read()
+			except Exception:
+				_log.error("failed to read %s", self.path)
+			else:
+				# an incomplete last record means an interrupted write
+				end = len(data) - len(data) % _RECORD.size
+				samples = [_unpack(data[i:i + _RECORD.size]) for i in range(0, end, _RECORD.size)]
+		self._samples = samples
+		self._compact()
+
+	def _compact(self):
+		samples = downsample(self._samples)
+		self._appended = 0
+		if len(samples) == len(self._samples) and _path.isfile(self.path):
+			return
+		self._samples = samples
+		try:
+			dirname = _path.dirname(self.path)
+			if not _path.isdir(dirname):
+				_os.makedirs(dirname)
+			temp_path = self.path + '.tmp'
+			with open(temp_path, 'wb') as f:
+				f.write(b''.join(_pack(s) for s in samples))
+			_os.rename(temp_path, self.path)
+		except Exception:
+			_log.error("failed to write %s", self.path)
+
+	def samples(self, since=None, until=None):
+		"""The samples recorded between the two timestamps, oldest first."""
+		with self._lock:
+			if self._samples is None:
+				self._load()
+			return [s for s in self._samples
+						if (since is None or s.timestamp >= since) and (until is None or s.timestamp <= until)]
+
+	def append(self, level, charging, lux, timestamp=None):
+		"""Records a sample, unless it would repeat the last one too soon.
+
+		:returns: ``True`` if the sample was recorded.
+		"""
+		sample = Sample(int(timestamp or _timestamp()), level, bool(charging), lux)
+		with self._lock:
+			if self._samples is None:
+				self._load()
+			if self._samples:
+				last = self._samples[-1]
+				if last[1:] == sample[1:] and sample.timestamp - last.timestamp < _MIN_INTERVAL:
+					return False
+
+			self._samples.append(sample)
+			try:
+				dirname = _path.dirname(self.path)
+				if not _path.isdir(dirname):
+					_os.makedirs(dirname)
+				with open(self.path, 'ab') as f:
+					f.write(_pack(sample))
+			except Exception:
+				_log.error("failed to append to %s", self.path)
+
+			self._appended += 1
+			if self._appended >= _COMPACT_EVERY:
+				self._compact()
+			return True
+
+	def discharge_rate(self):
+		"""Percent per hour the battery is currently discharging, if known."""
+		return discharge_rate(self.samples())
+
+	def time_to_empty(self):
+		"""Estimated seconds until the battery is empty, if known."""
+		samples = self.samples()
+		rate = discharge_rate(samples)
+		if rate and samples and samples[-1].level is not None and not samples[-1].charging:
+			return samples[-1].level / rate * 3600
+
+	def check_thresholds(self, level, charging):
+		"""Checks the battery level against the low battery thresholds.
+
+		:returns: the threshold just crossed, or ``None``; each one is
+		returned only once, until the battery is charged back over it.
+		"""
+		if level is None:
+			return
+		if charging:
+			self._alerted = None
+			return
+
+		crossed = None
+		for threshold in LOW_BATTERY_THRESHOLDS:
+			if level <= threshold and (self._alerted is None or threshold < self._alerted):
+				if crossed is None or threshold < crossed:
+					crossed = threshold
+		if crossed is not None:
+			self._alerted = crossed
+		elif self._alerted is not None and level > self._alerted + _THRESHOLD_REARM:
+			# charged back over some thresholds, without us seeing it charging
+			under = [t for t in LOW_BATTERY_THRESHOLDS if t >= level]
+			self._alerted = min(under) if under else None
+		return crossed
+
+#
+#
+#
+
+_histories = {}
+
+
+def _device_id(device):
+	return '%s:%s' % (device.wpid, device.serial)
+
+
+def get(device):
+	"""The battery history of a device (paired to some receiver)."""
+	device_id = _device_id(device)
+	history = _histories.get(device_id)
+	if history is None:
+		history = _histories[device_id] = History(device_id)
+	return history
+
+
+def _battery(device):
+	# (level, charging, lux), if the device reported any of them
+	status = device.status
+	if status is not None:
+		level = status.get(_K.BATTERY_LEVEL)
+		lux = status.get(_K.LIGHT_LEVEL)
+		if level is not None or lux is not None:
+			return level, status.get(_K.BATTERY_CHARGING), lux
+
+
+def check(device):
+	"""Checks the current battery level of a device against the low battery
+	thresholds; does not touch the history file.
+
+	:returns: the low battery threshold the device just crossed, if any.
+	"""
+	battery = _battery(device)
+	if battery:
+		level, charging, lux = battery
+		return get(device).check_thresholds(level, charging)
+
+
+def record(device, timestamp=None):
+	"""Records the current battery status of a device in its history file."""
+	battery = _battery(device)
+	if battery:
+		level, charging, lux = battery
+		if get(device).append(level, charging, lux, timestamp) and _log.isEnabledFor(_DEBUG):
+			_log.debug("%s: recorded battery %s%s, lux %s", device, level, ' (charging)' if charging else '', lux)
@@ -0,0 +1,582 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+## Copyright (C) 2012-2013  Daniel Pavel
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation; either version 2 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License along
+## with this program; if not, write to the Free Software Foundation, Inc.,
+## 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# Local API to a running Solaar instance (the GUI, or `solaar --daemon`).
+#
+# The running instance owns all the receivers; other processes (solaar-cli)
+# talk to it through a Unix socket instead of opening the receivers
+# themselves.  The protocol is one JSON object per line, each way:
+#
+#   -> {"command": "list"}
+#   <- {"ok": true, "result": [...]}
+#
+# Commands:
+#   list                              all receivers and paired devices
+#   status    device                  a device, with its settings
+#   get       device, setting[, force] the value of a setting
+#   set       device, setting, value  change a setting
+#   subscribe [fields]                stream status changes, see below
+#
+# `device` is matched like on the command line: a device number, a serial,
+# a codename or a part of the device name.
+#
+# A subscriber first gets a snapshot of each receiver and device, then only
+# the fields that changed, as they change:
+#
+#   <- {"event": "snapshot", "receiver": "/dev/hidraw0", "number": 1, "state": {...}}
+#   <- {"event": "changed", "receiver": "/dev/hidraw0", "number": 1,
+#       "changed": {"battery": 45}, "alert": 0, "reason": null}
+#
+# `number` is 0 for the receiver itself.  With `fields` (e.g. ["battery",
+# "online"]) only changes to those fields are sent.  A subscriber that does
+# not keep up with the changes is disconnected, after an {"event": "evicted"};
+# it may reconnect and start over from a new snapshot.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import errno as _errno
+import json as _json
+import os as _os
+import os.path as _path
+import socket as _socket
+import stat as _stat
+import threading as _threading
+
+from collections import deque as _deque
+
+from logging import getLogger, DEBUG as _DEBUG, INFO as _INFO
+_log = getLogger(__name__)
+del getLogger
+
+from logitech_receiver.common import NamedInt as _NamedInt
+from logitech_receiver.status import KEYS as _K
+
+#
+#
+#
+
+def _runtime_dir():
+	runtime_dir = _os.environ.get('XDG_RUNTIME_DIR')
+	if runtime_dir:
+		return _path.join(runtime_dir, 'solaar')
+	# no per-user runtime directory, make our own
+	import tempfile
+	return _path.join(tempfile.gettempdir(), 'solaar-%d' % _os.getuid())
+
+_socket_path = _path.join(_runtime_dir(), 'ipc.socket')
+
+
+def _private_dir(dirname, create=False):
+	# the directory may be in a shared place (/tmp): only trust it if it's
+	# really ours, and nobody else may put anything in it
+	if create:
+		try:
+			_os.makedirs(dirname, 0o700)
+		except OSError as e:
+			if e.errno != _errno.EEXIST:
+				raise
+	try:
+		st = _os.lstat(dirname)
+	except OSError:
+		return False
+	if not _stat.S_ISDIR(st.st_mode) or st.st_uid != _os.getuid() or _stat.S_IMODE(st.st_mode) != 0o700:
+		_log.error("%s is not a private directory, refusing to use it", dirname)
+		return False
+	return True
+
+"""Changes buffered for a subscriber; if it falls further behind, it is evicted."""
+_SUBSCRIBER_BUFFER = 256
+
+# a subscriber not reading what is sent to it for this long is evicted
+_SEND_TIMEOUT = 5
+
+# how long a client waits for the running instance to answer
+_CLIENT_TIMEOUT = 15
+
+
+def _jsonable(value):
+	if isinstance(value, _NamedInt):
+		return str(value)
+	if isinstance(value, (list, tuple)):
+		return [_jsonable(v) for v in value]
+	if isinstance(value, dict):
+		return {str(k): _jsonable(v) for k, v in value.items()}
+	return value
+
+
+def _send(connection, message):
+	data = _json.dumps(message, sort_keys=True, default=str) + '\n'
+	connection.sendall(data.encode('utf-8'))
+
+#
+# Server side -- only uses the state the listeners already keep.
+#
+
+def _receivers():
+	from solaar import listener as _listener
+	return [l.receiver for l in list(_listener._all_listeners.values()) if l.receiver]
+
+
+def _receiver_state(receiver):
+	return {
+		'type': 'receiver',
+		'path': receiver.path,
+		'name': receiver.name,
+		'serial': receiver.serial,
+		'max_devices': receiver.max_devices,
+		'paired': len(receiver),
+		# the status is replaced by a message once the receiver is gone
+		'status': str(receiver.status),
+		'pairing': bool(getattr(receiver.status, 'lock_open', False)),
+	}
+
+
+def _device_state(dev):
+	status = getattr(dev, 'status', None)
+	return {
+		'type': 'device',
+		'receiver': dev.receiver.path,
+		'number': dev.number,
+		'paired': bool(dev),
+		'name': dev.name,
+		'codename': dev.codename if dev else None,
+		'kind': str(dev.kind),
+		'wpid': dev.wpid if dev else None,
+		'serial': dev.serial if dev else None,
+		'online': bool(dev.online),
+		'status': status.to_string() if status is not None else None,
+		'details': {str(k): _jsonable(v) for k, v in status.items()} if status is not None else {},
+	}
+
+
+def _device_id(device):
+	if device.kind is None:
+		return device.path, 0
+	return device.receiver.path, device.number
+
+
+def _status_fields(device):
+	# what subscribers are told about, and get the changes of
+	if device.kind is None:
+		return {
+			'paired': len(device),
+			'pairing': bool(getattr(device.status, 'lock_open', False)),
+			'status': str(device.status),
+		}
+
+	status = getattr(device, 'status', None)
+	get = (lambda key: None) if status is None else (lambda key: _jsonable(status.get(key)))
+	return {
+		'paired': bool(device),
+		'online': bool(device.online),
+		'battery': get(_K.BATTERY_LEVEL),
+		'battery_status': get(_K.BATTERY_STATUS),
+		'charging': get(_K.BATTERY_CHARGING),
+		'encrypted': get(_K.LINK_ENCRYPTED),
+		'lux': get(_K.LIGHT_LEVEL),
+		'error': get(_K.ERROR),
+	}
+
+
+def _setting_state(setting, value):
+	return {
+		'name': setting.name,
+		'label': setting.label,
+		'description': setting.description,
+		'kind': str(setting.kind),
+		'choices': [str(c) for c in setting.choices] if setting.choices else None,
+		'range': setting.range,
+		'value': _jsonable(value),
+	}
+
+
+def _find_device(request):
+	name = request.get('device')
+	if not name:
+		raise Exception('no device specified')
+	receivers = _receivers()
+	if not receivers:
+		raise Exception('Logitech receiver not found')
+	from solaar.cli import _find_device
+	return _find_device(receivers, str(name).lower())
+
+
+def _find_setting(request):
+	dev = _find_device(request)
+	name = str(request.get('setting') or '').lower()
+	for s in dev.settings:
+		if name == s.name.lower():
+			return dev, s
+	raise Exception("no setting '%s' for %s" % (request.get('setting'), dev.name))
+
+
+def _list(request):
+	return [_receiver_state(d) if d.kind is None else _device_state(d) for d in _known_devices()]
+
+
+def _status(request):
+	dev = _find_device(request)
+	state = _device_state(dev)
+	state['settings'] = [_setting_state(s, s.read()) for s in dev.settings] if dev.online else []
+	return state
+
+
+def _get(request):
+	dev, setting = _find_setting(request)
+	if not dev.online:
+		raise Exception('%s is offline' % dev.name)
+	return _setting_state(setting, setting.read(not request.get('force')))
+
+
+def _set(request):
+	dev, setting = _find_setting(request)
+	if not dev.online:
+		raise Exception('%s is offline' % dev.name)
+	from solaar.cli.config import parse_value
+	value = parse_value(setting, str(request.get('value')))
+	result = setting.write(value)
+	if result is None:
+		raise Exception("failed to set '%s' = '%s' [%r]" % (setting.name, str(value), value))
+	setting_changed(setting, result)
+	return _setting_state(setting, result)
+
+
+_COMMANDS = {
+	'list': _list,
+	'status': _status,
+	'get': _get,
+	'set': _set,
+}
+
+
+class _Subscriber(object):
+	"""A client streaming status changes, with its own bounded buffer."""
+	def __init__(self, connection, fields=None):
+		self.connection = connection
+		self.fields = frozenset(fields) if fields else None
+		self.evicted = False
+		self.closed = False
+		self._queue = _deque()
+		self._ready = _threading.Condition()
+
+	def push(self, event):
+		# runs on the listener threads, must never block
+		with self._ready:
+			if self.evicted or self.closed:
+				return
+			if len(self._queue) < _SUBSCRIBER_BUFFER:
+				self._queue.append(event)
+			else:
+				self.evicted = True
+				self._queue.clear()
+			self._ready.notify()
+
+	def pop(self):
+		""":returns: the next event, or ``None`` once evicted or closed."""
+		with self._ready:
+			while not self._queue and not self.evicted and not self.closed:
+				self._ready.wait()
+			if self._queue and not self.evicted:
+				return self._queue.popleft()
+
+	def close(self):
+		with self._ready:
+			self.closed = True
+			self._ready.notify()
+
+
+class _Server(object):
+	def __init__(self, path):
+		self.path = path
+		self._socket = None
+		self._thread = None
+		# replaced, never changed in place, the listener threads iterate it
+		self._subscribers = ()
+		# last known status fields, by device id
+		self._states = {}
+		self._states_lock = _threading.Lock()
+
+	def start(self):
+		dirname = _path.dirname(self.path)
+		if not _private_dir(dirname, True):
+			raise Exception('%s is not a private directory' % dirname)
+
+		if _path.exists(self.path):
+			connection = _connect(self.path)
+			if connection is not None:
+				connection.close()
+				raise Exception('another instance is already listening on %s' % self.path)
+			# left behind by an instance that did not exit cleanly
+			_os.unlink(self.path)
+
+		self._socket = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+		self._socket.bind(self.path)
+		_os.chmod(self.path, 0o600)
+		self._socket.listen(8)
+
+		self._thread = _threading.Thread(name='IPCServer', target=self._accept)
+		self._thread.daemon = True
+		self._thread.start()
+		if _log.isEnabledFor(_INFO):
+			_log.info("listening for local clients on %s", self.path)
+
+	def stop(self):
+		s, self._socket = self._socket, None
+		if s:
+			try:
+				s.shutdown(_socket.SHUT_RDWR)
+			except _socket.error:
+				pass
+			s.close()
+			try:
+				_os.unlink(self.path)
+			except OSError:
+				pass
+		for sub in self._subscribers:
+			sub.close()
+		self._subscribers = ()
+
+	def _accept(self):
+		while self._socket:
+			try:
+				connection, _ignore = self._socket.accept()
+			except _socket.error:
+				# closed by stop()
+				break
+			t = _threading.Thread(name='IPCClient', target=self._serve, args=(connection, ))
+			t.daemon = True
+			t.start()
+
+	def _serve(self, connection):
+		try:
+			for line in connection.makefile('rb'):
+				try:
+					request = _json.loads(line.decode('utf-8'))
+					command = request.get('command')
+				except Exception as e:
+					_send(connection, {'ok': False, 'error': 'invalid request: %s' % e})
+					continue
+
+				if _log.isEnabledFor(_DEBUG):
+					_log.debug("request %s", request)
+				if command == 'subscribe':
+					self._stream(connection, request.get('fields'))
+					break
+
+				handler = _COMMANDS.get(command)
+				if handler is None:
+					_send(connection, {'ok': False, 'error': "unknown command '%s'" % command})
+					continue
+				try:
+					reply = {'ok': True, 'result': handler(request)}
+				except Exception as e:
+					reply = {'ok': False, 'error': str(e)}
+				_send(connection, reply)
+		except _socket.error:
+			pass
+		finally:
+			connection.close()
+
+	def _stream(self, connection, fields):
+		sub = _Subscriber(connection, fields)
+		# register first, so no change is missed while the snapshot is sent
+		self._subscribers = self._subscribers + (sub, )
+		connection.settimeout(_SEND_TIMEOUT)
+		try:
+			_send(connection, {'ok': True, 'result': 'subscribed'})
+			for device in _known_devices():
+				state = self._snapshot(device)
+				path, number = _device_id(device)
+				_send(connection, {'event': 'snapshot', 'receiver': path, 'number': number, 'state': state})
+
+			while True:
+				event = sub.pop()
+				if event is None:
+					break
+				_send(connection, event)
+
+			if sub.evicted:
+				_log.warn("evicting subscriber that did not keep up with %d changes", _SUBSCRIBER_BUFFER)
+				_send(connection, {'event': 'evicted'})
+		except _socket.timeout:
+			_log.warn("evicting subscriber not reading for %d seconds", _SEND_TIMEOUT)
+		finally:
+			sub.close()
+			self._subscribers = tuple(s for s in self._subscribers if s is not sub)
+
+	def _snapshot(self, device):
+		# the last known state (with the settings changed so far), brought up to date
+		with self._states_lock:
+			state = dict(self._states.get(_device_id(device), ()))
+		state.update(_status_fields(device))
+		return state
+
+	def _update(self, device, fields):
+		"""Merges the new fields into the device's last known state.
+
+		:returns: the fields that changed.
+		"""
+		device_id = _device_id(device)
+		with self._states_lock:
+			state = self._states.get(device_id)
+			if state is None:
+				state = self._states[device_id] = {}
+			changed = {}
+			for k, v in fields.items():
+				if k == 'settings':
+					settings = state.setdefault('settings', {})
+					v = {n: sv for n, sv in v.items() if n not in settings or settings[n] != sv}
+					if v:
+						settings.update(v)
+						changed[k] = v
+				elif k not in state or state[k] != v:
+					state[k] = v
+					changed[k] = v
+			if not fields.get('paired', True):
+				# unpaired devices are forgotten once reported
+				del self._states[device_id]
+			return changed
+
+	def publish(self, device, fields, alert=0, reason=None):
+		changed = self._update(device, fields)
+		if not changed:
+			return
+
+		path, number = _device_id(device)
+		for sub in self._subscribers:
+			if sub.fields is None:
+				sub_changed = changed
+			else:
+				sub_changed = {k: v for k, v in changed.items() if k in sub.fields}
+				if not sub_changed:
+					continue
+			sub.push({'event': 'changed', 'receiver': path, 'number': number,
+						'changed': sub_changed, 'alert': int(alert), 'reason': _jsonable(reason)})
+
+
+def _known_devices():
+	for r in _receivers():
+		# only the devices already known, iterating the receiver would probe the empty slots
+		yield r
+		for number in range(1, 1 + r.max_devices):
+			if number in r:
+				yield r[number]
+
+
+_server = None
+
+
+def start():
+	"""Starts answering local clients; fails if another instance already does."""
+	global _server
+	assert _server is None
+	server = _Server(_socket_path)
+	server.start()
+	_server = server
+
+
+def stop():
+	global _server
+	if _server:
+		_server.stop()
+		_server = None
+
+
+def status_changed(device, alert=0, reason=None):
+	"""Status callback, tells the subscribers what changed."""
+	server = _server
+	if server:
+		server.publish(device, _status_fields(device), alert, reason)
+
+
+def setting_changed(setting, value):
+	"""To be called after a setting was written, to tell the subscribers."""
+	server = _server
+	if server:
+		server.publish(setting._device, {'settings': {setting.name: _jsonable(value)}})
+
+#
+# Client side
+#
+
+def _connect(path):
+	s = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+	try:
+		s.connect(path)
+		return s
+	except _socket.error as e:
+		s.close()
+		if e.errno not in (_errno.ENOENT, _errno.ECONNREFUSED):
+			_log.warn("failed to connect to %s: %s", path, e)
+
+
+class Client(object):
+	"""A connection to the running instance."""
+	def __init__(self, connection):
+		self._connection = connection
+		self._connection.settimeout(_CLIENT_TIMEOUT)
+		self._reader = connection.makefile('rb')
+
+	def _receive(self):
+		line = self._reader.readline()
+		if not line:
+			raise Exception('connection to %s closed' % _socket_path)
+		return _json.loads(line.decode('utf-8'))
+
+	def request(self, command, **args):
+		"""Sends a command, and returns its result.
+		Raises an Exception with the server's error message if it failed."""
+		args['command'] = command
+		_send(self._connection, args)
+		reply = self._receive()
+		if not reply.get('ok'):
+			raise Exception(reply.get('error'))
+		return reply.get('result')
+
+	def events(self, fields=None):
+		"""Subscribes to status changes, and yields them as they come: first
+		a snapshot of each device, then what changed.
+
+		:param fields: only the changes to these status fields.
+		"""
+		self.request('subscribe', fields=fields)
+		self._connection.settimeout(None)
+		while True:
+			yield self._receive()
+
+	def close(self):
+		self._reader.close()
+		self._connection.close()
+
+
+def connect():
+	"""Connects to the running instance, if there is one.
+
+	:returns: a Client, or ``None`` if no instance is running.
+	"""
+	if _path.exists(_socket_path):
+		if not _private_dir(_path.dirname(_socket_path)):
+			return None
+		st = _os.lstat(_socket_path)
+		if not _stat.S_ISSOCK(st.st_mode) or st.st_uid != _os.getuid():
+			_log.error("%s is not our socket, refusing to use it", _socket_path)
+			return None
+		connection = _connect(_socket_path)
+		if connection is not None:
+			return Client(connection)
@@ -27,11 +27,15 @@ del getLogger
 
 from solaar.i18n import _
 from . import configuration
+from . import history as _history
+from .tasks import TaskPool as _TaskPool, PRIORITY_NORMAL as _PRIORITY_NORMAL, PRIORITY_LOW as _PRIORITY_LOW
 from logitech_receiver import (
 				Receiver,
+				hidpp10 as _hidpp10,
 				listener as _listener,
 				status as _status,
-				notifications as _notifications
+				notifications as _notifications,
+				scheduler as _scheduler,
 			)
 
 #
@@ -81,8 +85,35 @@ class ReceiverListener(_listener.EventsListener):
 		notification_flags = self.receiver.enable_notifications()
 		self.receiver.status[_status.KEYS.NOTIFICATION_FLAGS] = notification_flags
 		self.receiver.notify_devices()
+		# here rather than when the UI first shows it
+		self.receiver.check_may_unpair()
 		self._status_changed(self.receiver)  #, _status.ALERT.NOTIFICATION)
 
+	def resume(self):
+		"""Brings the receiver and its devices up to date after a system resume,
+		keeping everything already known about them.
+
+		:returns: ``False`` if the receiver does not answer anymore, and must be reopened.
+		"""
+		r = self.receiver
+		if r is None or not self.is_alive():
+			return False
+
+		# not to hold up anything the user is waiting for
+		with _scheduler.priority(_scheduler.PRIORITY.background):
+			try:
+				# cheapest check the handle is still good
+				if r.read_register(_hidpp10.REGISTERS.receiver_connection, max_age=0) is None:
+					return False
+			except Exception as e:
+				_log.warn("%s: failed to talk to the receiver after resume: %s", r, e)
+				return False
+
+			# notifications may have been reset; have the devices report their link
+			# status, only the ones that changed will be looked into again
+			self.has_started()
+		return True
+
 	def has_stopped(self):
 		r, self.receiver = self.receiver, None
 		assert r is not None
@@ -90,8 +121,10 @@ class ReceiverListener(_listener.EventsListener):
 			_log.info("%s: notifications listener has stopped", r)
 
 		# because udev is not notifying us about device removal,
-		# make sure to clean up in _all_listeners
-		_all_listeners.pop(r.path, None)
+		# make sure to clean up in _all_listeners -- unless this listener
+		# was already replaced by a new one for the same receiver
+		if _all_listeners.get(r.path) is self:
+			del _all_listeners[r.path]
 
 		r.status = _("The receiver was unplugged.")
 		if r:
@@ -164,6 +197,10 @@ class ReceiverListener(_listener.EventsListener):
 			# with while cleaning up.
 			_log.warn("device %s was unpaired, ghosting", device)
 			device = _ghost(device)
+		elif device.status is not None:
+			# the low battery warning tells how long the battery may last, from
+			# the history, so it comes after the sample is recorded
+			_record_history(device, _history.check(device), self.status_changed_callback)
 
 		self.status_changed_callback(device, alert, reason)
 
@@ -211,7 +248,7 @@ class ReceiverListener(_listener.EventsListener):
 			# If there are saved configs, bring the device's settings up-to-date.
 			# They will be applied when the device is marked as online.
 			configuration.attach_to(dev)
-			_status.attach_to(dev, self._status_changed)
+			_status.attach_to(dev, self._status_changed, _run_for_device)
 			# the receiver changed status as well
 			self._status_changed(self.receiver)
 
@@ -231,6 +268,46 @@ class ReceiverListener(_listener.EventsListener):
 		return '<ReceiverListener(%s,%s)>' % (self.receiver.path, self.receiver.handle)
 	__unicode__ = __str__
 
+def _low_battery_reason(device, threshold):
+	left = _history.get(device).time_to_empty()
+	if left is None:
+		return _("Battery low: under %(percent)d%%.") % { 'percent': threshold }
+	hours, minutes = divmod(int(left) // 60, 60)
+	return _("Battery low: under %(percent)d%%, about %(hours)d:%(minutes)02d hours left.") % {
+					'percent': threshold, 'hours': hours, 'minutes': minutes }
+
+# runs the slow work of bringing devices up to date when they come online,
+# shared by all the receivers, serialized per device
+_executor = None
+
+def _run_for_device(key, function, *args):
+	executor = _executor
+	if executor is None:
+		function(*args)
+	else:
+		executor.submit(key, _PRIORITY_NORMAL, False,
+						_scheduler.call_with_priority, _scheduler.PRIORITY.notification, function, *args)
+
+
+def _record_battery(device, timestamp, low_level, status_changed_callback):
+	_history.record(device, timestamp)
+	if low_level is not None:
+		# warn once per threshold
+		status_changed_callback(device, _status.ALERT.NOTIFICATION, _low_battery_reason(device, low_level))
+
+
+def _record_history(device, low_level, status_changed_callback):
+	# the history file is read and written by the executor, not the listener thread
+	timestamp = int(time.time())
+	executor = _executor
+	if executor is None:
+		_record_battery(device, timestamp, low_level, status_changed_callback)
+	else:
+		key = ('history', device.receiver.path, device.number)
+		# not to be dropped when the queue is full, if there is a warning to show
+		priority = _PRIORITY_LOW if low_level is None else _PRIORITY_NORMAL
+		executor.submit(key, priority, False, _record_battery, device, timestamp, low_level, status_changed_callback)
+
 #
 #
 #
@@ -242,6 +319,11 @@ _all_listeners = {}
 
 def _start(device_info):
 	assert _status_callback
+	global _executor
+	if _executor is None:
+		_executor = _TaskPool('DeviceWakeUp')
+		_executor.start()
+
 	receiver = Receiver.open(device_info)
 	if receiver:
 		rl = ReceiverListener(receiver, _status_callback)
@@ -279,17 +361,34 @@ def stop_all():
 		for l in listeners:
 			l.join()
 
+	global _executor
+	if _executor is not None:
+		_executor.stop()
+		_executor = None
 
-def ping_all():
-	for l in _all_listeners.values():
-		count = l.receiver.count()
-		if count:
-			for dev in l.receiver:
-				dev.ping()
-				l._status_changed(dev)
-				count -= 1
-				if not count:
-					break
+
+def resume_all():
+	"""After a system resume, checks all the receivers are still there, and
+	updates their status without starting over; only the receivers that
+	don't answer anymore are reopened."""
+	if _log.isEnabledFor(_INFO):
+		_log.info("resuming receiver listeners")
+	for path, l in list(_all_listeners.items()):
+		if not l.resume():
+			_log.warn("%s: not answering after resume, reopening it", path)
+			_restart(path)
+
+
+def _restart(path):
+	for device_info in _base.receivers():
+		if device_info.path == path:
+			_process_receiver_event('add', device_info)
+			return
+
+	# the receiver is gone
+	l = _all_listeners.pop(path, None)
+	if l is not None:
+		l.stop()
 
 
 from logitech_receiver import base as _base
@@ -303,7 +402,13 @@ def setup_scanner(status_changed_callback, error_callback):
 	_status_callback = status_changed_callback
 	_error_callback = error_callback
 
-	_base.notify_on_receivers_glib(_process_receiver_event)
+	_base.notify_on_receivers_glib(_receiver_plugged)
+
+
+def _receiver_plugged(action, device_info):
+	# a receiver (re)plugged at this path is not necessarily the one that was there
+	Receiver.forget(device_info)
+	_process_receiver_event(action, device_info)
 
 
 # receiver add/remove events will start/stop listener threads
@@ -24,47 +24,151 @@ from logging import getLogger, DEBUG as _DEBUG
 _log = getLogger(__name__)
 del getLogger
 
-from threading import Thread as _Thread
-
-try:
-	from Queue import Queue as _Queue
-except ImportError:
-	from queue import Queue as _Queue
+from threading import Thread as _Thread, Condition as _Condition
 
 #
 #
 #
 
-class TaskRunner(_Thread):
-	def __init__(self, name):
-		super(TaskRunner, self).__init__(name=name)
-		self.daemon = True
-		self.queue = _Queue(16)
-		self.alive = False
+"""Task priorities, lower runs first."""
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
 
-	def __call__(self, function, *args, **kwargs):
-		task = (function, args, kwargs)
-		self.queue.put(task)
 
-	def stop(self):
+class _Task(object):
+	__slots__ = ('key', 'priority', 'sequence', 'cancellable', 'function', 'args', 'kwargs')
+
+	def __init__(self, key, priority, sequence, cancellable, function, args, kwargs):
+		self.key = key
+		self.priority = priority
+		self.sequence = sequence
+		self.cancellable = cancellable
+		self.function = function
+		self.args = args
+		self.kwargs = kwargs
+
+	def same_call(self, other):
+		return (self.key == other.key and self.function == other.function and
+				self.args == other.args and self.kwargs == other.kwargs)
+
+	def __str__(self):
+		return '<Task(%s,%d,%s)>' % (self.key, self.priority, self.function)
+	__unicode__ = __repr__ = __str__
+
+
+class TaskPool(object):
+	"""A few worker threads running queued tasks, highest priority first.
+
+	Tasks queued with the same (not ``None``) key, e.g. a device, run one at a
+	time, highest priority first, then in the order they were queued.  Queuing
+	a task identical to one still pending does nothing, and pending
+	cancellable tasks can be dropped with cancel().  The queue is bounded, but
+	queuing never blocks: when it is full, the new task is dropped, unless it
+	can take the place of a pending task of lower priority.
+	"""
+	def __init__(self, name, workers=3, maxsize=32):
+		assert workers > 0
+		assert maxsize > 0
+		self.name = name
+		self.maxsize = maxsize
+		self._pending = []
+		self._running_keys = set()
+		self._sequence = 0
+		self._ready = _Condition()
+		self._workers = [_Thread(name='%s-%d' % (name, i), target=self._run) for i in range(workers)]
+		for w in self._workers:
+			w.daemon = True
 		self.alive = False
-		self.queue.put(None)
 
-	def run(self):
+	def start(self):
 		self.alive = True
+		for w in self._workers:
+			w.start()
+
+	def stop(self):
+		with self._ready:
+			self.alive = False
+			del self._pending[:]
+			self._ready.notify_all()
+
+	def __call__(self, function, *args, **kwargs):
+		return self.submit(None, PRIORITY_NORMAL, False, function, *args, **kwargs)
+
+	def submit(self, key, priority, cancellable, function, *args, **kwargs):
+		"""Queues a task.
+
+		:returns: ``True`` if the task was queued (or an identical one was
+		already pending), ``False`` if it was dropped.
+		"""
+		assert function
+		with self._ready:
+			if not self.alive:
+				return False
+
+			self._sequence += 1
+			task = _Task(key, priority, self._sequence, cancellable, function, args, kwargs)
+			if any(task.same_call(t) for t in self._pending):
+				return True
 
+			if len(self._pending) >= self.maxsize:
+				# make room by dropping the newest pending task of the lowest priority
+				victim = max(self._pending, key=lambda t: (t.priority, t.sequence))
+				if victim.priority <= priority:
+					_log.warning("%s: queue full, dropped %s", self.name, task)
+					return False
+				_log.warning("%s: queue full, dropped %s", self.name, victim)
+				self._pending.remove(victim)
+
+			self._pending.append(task)
+			self._ready.notify()
+			return True
+
+	def cancel(self, key):
+		"""Drops all the pending cancellable tasks with the given key.
+		A task already running is not interrupted."""
+		with self._ready:
+			cancelled = [t for t in self._pending if t.key == key and t.cancellable]
+			for t in cancelled:
+				self._pending.remove(t)
+			if cancelled and _log.isEnabledFor(_DEBUG):
+				_log.debug("%s: cancelled %d task(s) for %s", self.name, len(cancelled), key)
+
+	def _next_task(self):
+		# highest priority first, oldest first, skipping keys with a task running
+		candidates = [t for t in self._pending if t.key is None or t.key not in self._running_keys]
+		if candidates:
+			task = min(candidates, key=lambda t: (t.priority, t.sequence))
+			self._pending.remove(task)
+			return task
+
+	def _run(self):
 		if _log.isEnabledFor(_DEBUG):
 			_log.debug("started")
 
-		while self.alive:
-			task = self.queue.get()
-			if task:
-				function, args, kwargs = task
-				assert function
-				try:
-					function(*args, **kwargs)
-				except:
-					_log.exception("calling %s", function)
+		while True:
+			with self._ready:
+				task = None
+				while self.alive:
+					task = self._next_task()
+					if task:
+						break
+					self._ready.wait()
+				if task is None:
+					break
+				if task.key is not None:
+					self._running_keys.add(task.key)
+
+			try:
+				task.function(*task.args, **task.kwargs)
+			except:
+				_log.exception("calling %s", task.function)
+			finally:
+				if task.key is not None:
+					with self._ready:
+						self._running_keys.discard(task.key)
+						# tasks for this key may run now
+						self._ready.notify_all()
 
 		if _log.isEnabledFor(_DEBUG):
 			_log.debug("stopped")
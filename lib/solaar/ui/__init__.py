@@ -79,6 +79,34 @@ def ui_async(function, *args, **kwargs):
 	if _task_runner:
 		_task_runner(function, *args, **kwargs)
 
+
+def _device_key(device):
+	# requests to the same device are serialized
+	if device.kind is None:
+		return (device.path, 0)
+	return (device.receiver.path, device.number)
+
+
+def ui_async_read(device, function, *args):
+	"""Queues a device read; it is dropped if still pending when
+	ui_async_cancel() is called for the device."""
+	if _task_runner:
+		from solaar.tasks import PRIORITY_NORMAL
+		_task_runner.submit(_device_key(device), PRIORITY_NORMAL, True, function, *args)
+
+
+def ui_async_write(device, function, *args):
+	"""Queues a device write, ahead of any pending reads."""
+	if _task_runner:
+		from solaar.tasks import PRIORITY_HIGH
+		_task_runner.submit(_device_key(device), PRIORITY_HIGH, False, function, *args)
+
+
+def ui_async_cancel(device):
+	"""Drops the pending reads for a device, e.g. when it is no longer shown."""
+	if _task_runner and device is not None:
+		_task_runner.cancel(_device_key(device))
+
 #
 #
 #
@@ -90,9 +118,9 @@ def _startup(app, startup_hook):
 	if _log.isEnabledFor(_DEBUG):
 		_log.debug("startup registered=%s, remote=%s", app.get_is_registered(), app.get_is_remote())
 
-	from solaar.tasks import TaskRunner as _TaskRunner
+	from solaar.tasks import TaskPool as _TaskPool
 	global _task_runner
-	_task_runner = _TaskRunner('AsyncUI')
+	_task_runner = _TaskPool('AsyncUI')
 	_task_runner.start()
 
 	notify.init()
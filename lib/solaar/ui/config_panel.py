@@ -23,19 +23,38 @@ from gi.repository import Gtk, GLib
 from threading import Timer as _Timer
 
 from solaar.i18n import _
-from solaar.ui import ui_async as _ui_async
+from solaar.ui import ui_async_read as _ui_async_read, ui_async_write as _ui_async_write
+from solaar.ipc import setting_changed as _setting_changed
 from logitech_receiver.settings import KIND as _SETTING_KIND
 
 #
 #
 #
 
-def _read_async(setting, force_read, sbox, device_is_online):
-	def _do_read(s, force, sb, online):
-		v = s.read(not force)
-		GLib.idle_add(_update_setting_item, sb, v, online, priority=99)
+# values read from the device more recently than this are shown right away,
+# without going through the device again
+_CACHE_MAX_AGE = 300
+
+# slider moves are written after the slider stays still this long (seconds);
+# moves made while a write is going on only update the value it writes next
+_SLIDER_DELAY = 0.1
+
+# module-level, so the task pool can tell identical pending tasks apart
+def _do_read(s, force, sb, online):
+	v = s.read(not force)
+	GLib.idle_add(_update_setting_item, sb, v, online, priority=99)
+
+
+def _do_write(s, sb):
+	v = s.flush()
+	if v is not None:
+		# let the local subscribers know
+		_setting_changed(s, v)
+	GLib.idle_add(_update_setting_item, sb, v, True, priority=99)
+
 
-	_ui_async(_do_read, setting, force_read, sbox, device_is_online)
+def _read_async(setting, force_read, sbox, device_is_online):
+	_ui_async_read(setting._device, _do_read, setting, force_read, sbox, device_is_online)
 
 
 def _write_async(setting, value, sbox):
@@ -44,12 +63,13 @@ def _write_async(setting, value, sbox):
 	failed.set_visible(False)
 	spinner.set_visible(True)
 	spinner.start()
+	# the control was disabled, the result must be rendered whatever it is
+	sbox._rendered = None
 
-	def _do_write(s, v, sb):
-		v = setting.write(v)
-		GLib.idle_add(_update_setting_item, sb, v, True, priority=99)
-
-	_ui_async(_do_write, setting, value, sbox)
+	# only the latest value gets written, and a write still queued for the
+	# setting takes care of it
+	setting.queue_write(value)
+	_ui_async_write(setting._device, _do_write, setting, sbox)
 
 #
 #
@@ -102,7 +122,7 @@ def _create_slider_control(setting):
 			if self.gtk_range.get_sensitive():
 				if self.timer:
 					self.timer.cancel()
-				self.timer = _Timer(0.5, lambda: GLib.idle_add(self._write))
+				self.timer = _Timer(_SLIDER_DELAY, lambda: GLib.idle_add(self._write))
 				self.timer.start()
 
 	control = SliderControl(setting)
@@ -153,6 +173,12 @@ def _update_setting_item(sbox, value, is_online=True):
 	spinner.set_visible(False)
 	spinner.stop()
 
+	# only touch the widgets when what they show actually changes
+	rendered = (value, is_online)
+	if getattr(sbox, '_rendered', None) == rendered:
+		return
+	sbox._rendered = rendered
+
 	# print ("update", control, "with new value", value)
 	if value is None:
 		control.set_sensitive(False)
@@ -193,15 +219,14 @@ def update(device, is_online=None):
 	if is_online is None:
 		is_online = bool(device.online)
 
-	# if the device changed since last update, clear the box first
-	if device_id != _box._last_device:
+	# if the device changed since last update, clear the box first,
+	# and hide the controls belonging to other devices
+	device_changed = device_id != _box._last_device
+	if device_changed:
 		_box.set_visible(False)
 		_box._last_device = device_id
-
-	# hide controls belonging to other devices
-	for k, sbox in _items.items():
-		sbox = _items[k]
-		sbox.set_visible(k[0:2] == device_id)
+		for k, sbox in _items.items():
+			sbox.set_visible(k[0:2] == device_id)
 
 	for s in device.settings:
 		k = (device_id[0], device_id[1], s.name)
@@ -211,7 +236,12 @@ def update(device, is_online=None):
 			sbox = _items[k] = _create_sbox(s)
 			_box.pack_start(sbox, False, False, 0)
 
-		_read_async(s, False, sbox, is_online)
+		value = s.cached_value(_CACHE_MAX_AGE)
+		if value is None:
+			# never read, or too old -- go to the device for it
+			_read_async(s, s.cached_value() is not None, sbox, is_online)
+		else:
+			_update_setting_item(sbox, value, is_online)
 
 	_box.set_visible(True)
 
@@ -90,6 +90,18 @@ def _init_icon_paths():
 	if _log.isEnabledFor(_DEBUG):
 		_log.debug("icon theme paths: %s", _default_theme.get_search_path())
 
+	_detect_icon_sets()
+	_default_theme.connect('changed', _theme_changed)
+
+
+def _theme_changed(theme):
+	if _log.isEnabledFor(_DEBUG):
+		_log.debug("icon theme changed")
+	_battery_icons.clear()
+	_detect_icon_sets()
+
+
+def _detect_icon_sets():
 	global _has_mint_icons, _has_gpm_icons, _has_oxygen_icons, _has_gnome_icons, _has_elementary_icons
 
 	_has_mint_icons = _default_theme.has_icon('battery-good-symbolic')
@@ -112,14 +124,30 @@ def _init_icon_paths():
 #
 #
 
+# resolved battery icon names, by _battery_key(); cleared when the theme changes
+_battery_icons = {}
+
+
+def _battery_key(level, charging):
+	# all the levels that map to the same icon, in any of the known icon sets
+	if level is None or level < 0:
+		return None
+	return (20 * ((level + 10) // 20), bool(charging), level == 100)
+
+
 def battery(level=None, charging=False):
-	icon_name = _battery_icon_name(level, charging)
-	if not _default_theme.has_icon(icon_name):
-		_log.warning("icon %s not found in current theme", icon_name);
-	# elif _log.isEnabledFor(_DEBUG):
-	# 	_log.debug("battery icon for %s:%s = %s", level, charging, icon_name)
+	key = _battery_key(level, charging)
+	icon_name = _battery_icons.get(key)
+	if icon_name is None:
+		icon_name = _battery_icon_name(level, charging)
+		if not _default_theme.has_icon(icon_name):
+			_log.warning("icon %s not found in current theme", icon_name);
+		# elif _log.isEnabledFor(_DEBUG):
+		# 	_log.debug("battery icon for %s:%s = %s", level, charging, icon_name)
+		_battery_icons[key] = icon_name
 	return icon_name
 
+
 def _battery_icon_name(level, charging):
 	_init_icon_paths()
 
@@ -299,27 +299,40 @@ def _generate_tooltip_lines():
 
 
 def _pick_device_with_lowest_battery():
-	if not _devices_info:
+	if not _devices_info or _lowest_battery is None:
 		return None
 
-	picked = None
-	picked_level = 1000
-
-	for info in _devices_info:
-		if info[1] is None: # is receiver/separator
-			continue
-		level = info[-1].get(_K.BATTERY_LEVEL)
-		# print ("checking %s -> %s", info, level)
-		if level is not None and picked_level > level:
-			picked = info
-			picked_level = level or 0
-
+	picked = _devices_info[_devices_index[_lowest_battery]]
 	if _log.isEnabledFor(_DEBUG):
 		_log.debug("picked device with lowest battery: %s", picked)
 
 	return picked
 
 
+def _update_lowest_battery(device_id, level):
+	"""Keeps track of the device with the lowest battery level, as the levels
+	change; only a device's level going up may require looking at all of them."""
+	global _lowest_battery
+	previous = _battery_levels.pop(device_id, None)
+	if level is not None:
+		_battery_levels[device_id] = level
+
+	if device_id == _lowest_battery:
+		if level is None or (previous is not None and level > previous):
+			_lowest_battery = min(_battery_levels, key=_battery_levels.get) if _battery_levels else None
+	elif level is not None:
+		if _lowest_battery is None or level < _battery_levels[_lowest_battery]:
+			_lowest_battery = device_id
+
+
+def _reindex():
+	# only needed when entries are added or removed, which shifts the indices
+	_devices_index.clear()
+	for index, info in enumerate(_devices_info):
+		if info[0] != _RECEIVER_SEPARATOR[0]:
+			_devices_index[info[0:2]] = index
+
+
 #
 #
 #
@@ -330,13 +343,8 @@ def _add_device(device):
 	receiver_path = device.receiver.path
 	assert receiver_path
 
-	index = None
-	for idx, (path, _ignore, _ignore, _ignore) in enumerate(_devices_info):
-		if path == receiver_path:
-			# the first entry matching the receiver serial should be for the receiver itself
-			index = idx + 1
-			break
-	assert index is not None
+	# the devices come right after the receiver's own entry
+	index = _devices_index[(receiver_path, None)] + 1
 
 	# proper ordering (according to device.number) for a receiver's devices
 	while True:
@@ -352,6 +360,7 @@ def _add_device(device):
 	new_device_info = (receiver_path, device.number, device.name, device.status)
 	assert len(new_device_info) == len(_RECEIVER_SEPARATOR)
 	_devices_info.insert(index, new_device_info)
+	_reindex()
 
 	# label_prefix = b'\xE2\x94\x84 '.decode('utf-8')
 	label_prefix = '   '
@@ -361,6 +370,7 @@ def _add_device(device):
 	new_menu_item.show_all()
 	new_menu_item.connect('activate', _window_popup, receiver_path, device.number)
 	_menu.insert(new_menu_item, index)
+	_menu_items[new_device_info[0:2]] = new_menu_item
 
 	return index
 
@@ -372,6 +382,11 @@ def _remove_device(index):
 	_menu.remove(menu_items[index])
 
 	removed_device = _devices_info.pop(index)
+	_reindex()
+	if removed_device[0] != _RECEIVER_SEPARATOR[0]:
+		_menu_items.pop(removed_device[0:2], None)
+		_update_lowest_battery(removed_device[0:2], None)
+
 	global _picked_device
 	if _picked_device and _picked_device[0:2] == removed_device[0:2]:
 		# the current pick was unpaired
@@ -384,6 +399,7 @@ def _add_receiver(receiver):
 	new_receiver_info = (receiver.path, None, receiver.name, None)
 	assert len(new_receiver_info) == len(_RECEIVER_SEPARATOR)
 	_devices_info.append(new_receiver_info)
+	_devices_index[new_receiver_info[0:2]] = index
 
 	new_menu_item = Gtk.ImageMenuItem.new_with_label(receiver.name)
 	_menu.insert(new_menu_item, index)
@@ -418,13 +434,10 @@ def _remove_receiver(receiver):
 			index += 1
 
 
-def _update_menu_item(index, device):
+def _update_menu_item(menu_item, device):
 	assert device
 	assert device.status is not None
 
-	menu_items = _menu.get_children()
-	menu_item = menu_items[index]
-
 	level = device.status.get(_K.BATTERY_LEVEL)
 	charging = device.status.get(_K.BATTERY_CHARGING)
 	icon_name = _icons.battery(level, charging)
@@ -445,6 +458,17 @@ _picked_device = None
 # contains tuples of (receiver path, device number, name, status)
 _devices_info = []
 
+# (receiver path, device number) -> index in _devices_info;
+# the device number is None for the receiver entries
+_devices_index = {}
+# (receiver path, device number) -> menu item, for the devices
+_menu_items = {}
+
+# (receiver path, device number) -> battery level, for the devices reporting one
+_battery_levels = {}
+# the (receiver path, device number) with the lowest battery level
+_lowest_battery = None
+
 _menu = None
 _icon = None
 
@@ -457,7 +481,7 @@ def init(_quit_handler):
 
 
 def destroy():
-	global _icon, _menu, _devices_info
+	global _icon, _menu, _devices_info, _lowest_battery
 	assert _icon is not None
 	i, _icon = _icon, None
 	_destroy(i)
@@ -466,6 +490,10 @@ def destroy():
 	_icon = None
 	_menu = None
 	_devices_info = None
+	_devices_index.clear()
+	_menu_items.clear()
+	_battery_levels.clear()
+	_lowest_battery = None
 
 
 def update(device=None):
@@ -478,40 +506,32 @@ def update(device=None):
 			is_alive = bool(device)
 			receiver_path = device.path
 			if is_alive:
-				index = None
-				for idx, (path, _ignore, _ignore, _ignore) in enumerate(_devices_info):
-					if path == receiver_path:
-						index = idx
-						break
-
-				if index is None:
+				if (receiver_path, None) not in _devices_index:
 					_add_receiver(device)
 			else:
 				_remove_receiver(device)
 
+			menu_items = _menu.get_children()
+			no_receivers_index = len(_devices_info)
+			menu_items[no_receivers_index].set_visible(not _devices_info)
+			menu_items[no_receivers_index + 1].set_visible(not _devices_info)
+
 		else:
 			# peripheral
 			is_paired = bool(device)
-			receiver_path = device.receiver.path
-			index = None
-			for idx, (path, number, _ignore, _ignore) in enumerate(_devices_info):
-				if path == receiver_path and number == device.number:
-					index = idx
+			device_id = (device.receiver.path, device.number)
+			index = _devices_index.get(device_id)
 
 			if is_paired:
 				if index is None:
 					index = _add_device(device)
-				_update_menu_item(index, device)
+				_update_menu_item(_menu_items[device_id], device)
+				_update_lowest_battery(device_id, device.status.get(_K.BATTERY_LEVEL))
 			else:
 				# was just unpaired
 				if index:
 					_remove_device(index)
 
-		menu_items = _menu.get_children()
-		no_receivers_index = len(_devices_info)
-		menu_items[no_receivers_index].set_visible(not _devices_info)
-		menu_items[no_receivers_index + 1].set_visible(not _devices_info)
-
 	global _picked_device
 	if (not _picked_device or _last_scroll == 0) and device is not None and device.kind is not None:
 		# if it's just a receiver update, it's unlikely the picked device would change
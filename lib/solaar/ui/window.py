@@ -29,7 +29,7 @@ from gi.repository.GObject import TYPE_PYOBJECT
 from solaar import NAME
 from solaar.i18n import _, ngettext
 # from solaar import __version__ as VERSION
-from solaar.ui import ui_async as _ui_async
+from solaar.ui import ui_async_read as _ui_async_read, ui_async_cancel as _ui_async_cancel
 from logitech_receiver import hidpp10 as _hidpp10
 from logitech_receiver.common import NamedInts as _NamedInts, NamedInt as _NamedInt
 from logitech_receiver.status import KEYS as _K
@@ -373,6 +373,12 @@ def _find_selected_device_id():
 def _device_selected(selection):
 	model, item = selection.get_selected()
 	device = model.get_value(item, _COLUMN.DEVICE) if item else None
+
+	# don't keep reading from a device no longer shown
+	global _shown_device
+	if _shown_device is not None and _shown_device is not device:
+		_ui_async_cancel(_shown_device)
+	_shown_device = device
 	# if _log.isEnabledFor(_DEBUG):
 	# 	_log.debug("window tree selected device %s", device)
 	if device:
@@ -385,15 +391,24 @@ def _device_selected(selection):
 		_update_info_panel(None, full=True)
 
 
+def _row(row_id):
+	# the row references follow the rows as others are added and removed
+	reference = _rows.get(row_id)
+	if reference is not None:
+		if reference.valid():
+			return _model.get_iter(reference.get_path())
+		# the row was removed from the model
+		del _rows[row_id]
+
+
+def _add_row_reference(row_id, item):
+	_rows[row_id] = Gtk.TreeRowReference.new(_model, _model.get_path(item))
+
+
 def _receiver_row(receiver_path, receiver=None):
 	assert receiver_path
 
-	item = _model.get_iter_first()
-	while item:
-		# first row matching the path must be the receiver one
-		if _model.get_value(item, _COLUMN.PATH) == receiver_path:
-			return item
-		item = _model.iter_next(item)
+	item = _row((receiver_path, 0))
 
 	if not item and receiver:
 		icon_name = _icons.device_icon_name(receiver.name)
@@ -404,6 +419,7 @@ def _receiver_row(receiver_path, receiver=None):
 		# if _log.isEnabledFor(_DEBUG):
 		# 	_log.debug("new receiver row %s", row_data)
 		item = _model.append(None, row_data)
+		_add_row_reference((receiver_path, 0), item)
 		if _TREE_SEPATATOR:
 			_model.append(None, _TREE_SEPATATOR)
 
@@ -414,14 +430,18 @@ def _device_row(receiver_path, device_number, device=None):
 	assert receiver_path
 	assert device_number is not None
 
-	receiver_row = _receiver_row(receiver_path, None if device is None else device.receiver)
+	item = _row((receiver_path, device_number))
+	if item or not device:
+		return item
+
+	receiver_row = _receiver_row(receiver_path, device.receiver)
+	# find the position for the new row, ordered by device number
 	item = _model.iter_children(receiver_row)
 	new_child_index = 0
 	while item:
 		assert _model.get_value(item, _COLUMN.PATH) == receiver_path
 		item_number = _model.get_value(item, _COLUMN.NUMBER)
-		if item_number == device_number:
-			return item
+		assert item_number != device_number
 		if item_number > device_number:
 			item = None
 			break
@@ -437,6 +457,7 @@ def _device_row(receiver_path, device_number, device=None):
 		# if _log.isEnabledFor(_DEBUG):
 		# 	_log.debug("new device row %s at index %d", row_data, new_child_index)
 		item = _model.insert(receiver_row, new_child_index, row_data)
+		_add_row_reference((receiver_path, device_number), item)
 
 	return item or None
 
@@ -555,7 +576,7 @@ def _update_details(button):
 		if read_all:
 			_details._current_device = None
 		else:
-			_ui_async(_read_slow, selected_device)
+			_ui_async_read(selected_device, _read_slow, selected_device)
 
 	_details.set_visible(visible)
 
@@ -602,9 +623,20 @@ def _update_receiver_panel(receiver, panel, buttons, full=False):
 def _update_device_panel(device, panel, buttons, full=False):
 	assert device
 	is_online = bool(device.online)
-	panel.set_sensitive(is_online)
 
 	battery_level = device.status.get(_K.BATTERY_LEVEL)
+	charging = device.status.get(_K.BATTERY_CHARGING)
+
+	# status notifications come in often, and most of them change nothing shown here
+	rendered = (device, is_online, battery_level, charging,
+				device.status.get(_K.LINK_ENCRYPTED), device.status.get(_K.LIGHT_LEVEL),
+				device.receiver.may_unpair)
+	if not full and getattr(panel, '_rendered', None) == rendered:
+		return
+	panel._rendered = rendered
+
+	panel.set_sensitive(is_online)
+
 	if battery_level is None:
 		icon_name = _icons.battery()
 		panel._battery._icon.set_sensitive(False)
@@ -612,7 +644,6 @@ def _update_device_panel(device, panel, buttons, full=False):
 		panel._battery._text.set_sensitive(True)
 		panel._battery._text.set_markup('<small>%s</small>' % _("unknown"))
 	else:
-		charging = device.status.get(_K.BATTERY_CHARGING)
 		icon_name = _icons.battery(battery_level, charging)
 		panel._battery._icon.set_from_icon_name(icon_name, _INFO_ICON_SIZE)
 		panel._battery._icon.set_sensitive(True)
@@ -683,9 +714,12 @@ def _update_info_panel(device, full=False):
 	# a device must be paired
 	assert device
 
-	_info._title.set_markup('<b>%s</b>' % device.name)
-	icon_name = _icons.device_icon_name(device.name, device.kind)
-	_info._icon.set_from_icon_name(icon_name, _DEVICE_ICON_SIZE)
+	# the title and icon only change when another device is shown
+	if full or getattr(_info, '_rendered', None) is not device:
+		_info._rendered = device
+		_info._title.set_markup('<b>%s</b>' % device.name)
+		icon_name = _icons.device_icon_name(device.name, device.kind)
+		_info._icon.set_from_icon_name(icon_name, _DEVICE_ICON_SIZE)
 
 	if device.kind is None:
 		_info._device.set_visible(False)
@@ -719,7 +753,11 @@ def _update_info_panel(device, full=False):
 # the details panel can be toggle on/off
 
 _model = None
+# (receiver path, device number) -> Gtk.TreeRowReference, 0 for receivers
+_rows = {}
 _tree = None
+# the device currently shown in the info panel
+_shown_device = None
 _details = None
 _info = None
 _empty = None
@@ -740,7 +778,7 @@ def init():
 
 
 def destroy():
-	global _model, _tree, _details, _info, _empty, _window
+	global _model, _tree, _details, _info, _empty, _window, _shown_device
 	w, _window = _window, None
 	w.destroy()
 	w = None
@@ -751,6 +789,8 @@ def destroy():
 	_details = None
 	_tree = None
 	_model = None
+	_rows.clear()
+	_shown_device = None
 
 
 def update(device, need_popup=False):
@@ -784,6 +824,8 @@ def update(device, need_popup=False):
 				separator = _model.iter_next(item)
 				_model.remove(separator)
 			_model.remove(item)
+			for row_id in [r for r in _rows if r[0] == device.path]:
+				del _rows[row_id]
 
 	else:
 		# peripheral
@@ -820,6 +862,7 @@ def update(device, need_popup=False):
 
 		elif item:
 			_model.remove(item)
+			_rows.pop((device.receiver.path, device.number), None)
 			_config_panel.clean(device)
 
 	# make sure all rows are visible
@@ -27,28 +27,32 @@ del getLogger
 # As suggested here: http://stackoverflow.com/a/13548984
 #
 
-_suspend_callback = None
+_suspend_callbacks = []
 def _suspend():
-	if _suspend_callback:
+	if _suspend_callbacks:
 		if _log.isEnabledFor(_INFO):
 			_log.info("received suspend event from UPower")
-		_suspend_callback()
+		for callback in _suspend_callbacks:
+			callback()
 
 
-_resume_callback = None
+_resume_callbacks = []
 def _resume():
-	if _resume_callback:
+	if _resume_callbacks:
 		if _log.isEnabledFor(_INFO):
 			_log.info("received resume event from UPower")
-		_resume_callback()
+		for callback in _resume_callbacks:
+			callback()
 
 
 def watch(on_resume_callback=None, on_suspend_callback=None):
 	"""Register callback for suspend/resume events.
-	They are called only if the system DBus is running, and the UPower daemon is available."""
-	global _resume_callback, _suspend_callback
-	_suspend_callback = on_suspend_callback
-	_resume_callback = on_resume_callback
+	They are called only if the system DBus is running, and the UPower daemon is available.
+	May be called more than once, the callbacks are called in the order registered."""
+	if on_suspend_callback:
+		_suspend_callbacks.append(on_suspend_callback)
+	if on_resume_callback:
+		_resume_callbacks.append(on_resume_callback)
 
 
 try:
@@ -0,0 +1,10 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os.path as _path
+import sys as _sys
+
+# the packages live in lib/, not installed when running the tests from the tree
+_sys.path.insert(0, _path.join(_path.dirname(_path.dirname(_path.abspath(__file__))), 'lib'))
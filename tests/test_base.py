@@ -0,0 +1,124 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import time
+
+import pytest
+
+from logitech_receiver import base as _base
+
+
+class _Call(object):
+	"""Counts its calls, holding them until released."""
+
+	def __init__(self, result=None, error=None):
+		self.result = result
+		self.error = error
+		self.calls = 0
+		self.started = threading.Event()
+		self.release = threading.Event()
+
+	def __call__(self, *args):
+		self.calls += 1
+		self.started.set()
+		self.release.wait(5)
+		if self.error is not None:
+			raise self.error
+		return (self.result, ) + args
+
+
+class _CountingEvent(object):
+	"""An Event that counts the threads waiting on it."""
+
+	def __init__(self):
+		self.event = threading.Event()
+		self.waiting = 0
+		self.lock = threading.Lock()
+
+	def wait(self, timeout=None):
+		with self.lock:
+			self.waiting += 1
+		return self.event.wait(timeout)
+
+	def set(self):
+		self.event.set()
+
+
+def _run_flight(key, call, followers):
+	"""Starts a leader, then the followers once the leader is in the call."""
+	results = []
+	errors = []
+
+	def _run():
+		try:
+			results.append(_base.single_flight(key, call, 'arg'))
+		except Exception as e:
+			errors.append(e)
+
+	threads = [threading.Thread(target=_run)]
+	threads[0].start()
+	assert call.started.wait(5)
+	done = _base._flights[key].done = _CountingEvent()
+	for _ignore in range(followers):
+		threads.append(threading.Thread(target=_run))
+		threads[-1].start()
+	deadline = time.time() + 5
+	while done.waiting < followers:
+		assert time.time() < deadline
+		time.sleep(0.01)
+	call.release.set()
+	for t in threads:
+		t.join(5)
+	return results, errors
+
+
+def test_single_flight_shares_result():
+	call = _Call(result=42)
+	results, errors = _run_flight(('test', 1), call, 3)
+	assert call.calls == 1
+	assert not errors
+	assert results == [(42, 'arg')] * 4
+	assert ('test', 1) not in _base._flights
+
+
+def test_single_flight_shares_error():
+	error = _base.NoReceiver(reason='test')
+	call = _Call(error=error)
+	results, errors = _run_flight(('test', 2), call, 2)
+	assert call.calls == 1
+	assert not results
+	assert errors == [error] * 3
+	assert ('test', 2) not in _base._flights
+
+
+def test_single_flight_separate_keys():
+	call = _Call(result=1)
+	call.release.set()
+	assert _base.single_flight(('test', 3), call) == (1, )
+	assert _base.single_flight(('test', 4), call) == (1, )
+	assert call.calls == 2
+
+
+def test_single_flight_reentrant():
+	inner = []
+
+	def _outer():
+		# the same key, from within the call
+		inner.append(_base.single_flight(('test', 5), lambda: 'inner'))
+		return 'outer'
+
+	assert _base.single_flight(('test', 5), _outer) == 'outer'
+	assert inner == ['inner']
+
+
+def test_single_flight_after_error():
+	def _fail():
+		raise ValueError('test')
+
+	with pytest.raises(ValueError):
+		_base.single_flight(('test', 6), _fail)
+	# a failed call is not remembered
+	assert _base.single_flight(('test', 6), lambda: 'ok') == 'ok'
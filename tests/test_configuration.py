@@ -0,0 +1,46 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import threading
+
+from solaar import configuration as _configuration
+
+
+def test_choices_store_concurrent_writes(tmpdir):
+	path = tmpdir.join('solaar', 'choices.json')
+	store = _configuration._CacheStore(str(path))
+
+	def _store(n):
+		for i in range(20):
+			store['key-%d-%d' % (n, i)] = [[i, 'choice-%d' % i]]
+
+	threads = [threading.Thread(target=_store, args=(n, )) for n in range(4)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join(10)
+
+	with open(str(path)) as f:
+		saved = json.load(f)
+	assert len(saved) == 4 * 20
+	assert saved['key-3-19'] == [[19, 'choice-19']]
+	# no temporary files left behind
+	assert [p.basename for p in tmpdir.join('solaar').listdir()] == ['choices.json']
+
+	reloaded = _configuration._CacheStore(str(path))
+	assert reloaded.get('key-0-0') == [[0, 'choice-0']]
+
+
+def test_choices_store_unchanged_not_saved(tmpdir, monkeypatch):
+	store = _configuration._CacheStore(str(tmpdir.join('choices.json')))
+	saves = []
+	monkeypatch.setattr(store, '_save', lambda: saves.append(1))
+
+	store['key'] = [[1, 'one']]
+	store['key'] = [[1, 'one']]
+	assert len(saves) == 1
+	store['key'] = [[2, 'two']]
+	assert len(saves) == 2
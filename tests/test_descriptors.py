@@ -0,0 +1,47 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from logitech_receiver import descriptors as _descriptors
+
+
+def _wpids(descriptor):
+	wpid = descriptor.wpid
+	return wpid if isinstance(wpid, tuple) else (wpid, ) if wpid else ()
+
+
+def _declared():
+	# compiling makes the declarations
+	_descriptors._get_index()
+	return [_descriptors._make_descriptor(*d) for d in _descriptors._DECLARATIONS]
+
+
+def test_index_matches_declarations():
+	declared = _declared()
+	assert declared
+
+	wpids = [w for d in declared for w in _wpids(d)]
+	codenames = [d.codename for d in declared]
+	assert len(set(wpids)) == len(wpids)
+	assert len(set(codenames)) == len(codenames)
+
+	for d in declared:
+		assert _descriptors.get_codename(d.codename) == d
+		for w in _wpids(d):
+			assert _descriptors.get_wpid(w) == d
+
+	index = _descriptors._get_index()
+	assert sorted(index.wpid) == sorted(wpids)
+	assert sorted(index.codename) == sorted(codenames)
+
+
+def test_wpids_and_codenames_kept_apart():
+	declared = _declared()
+	by_wpid = dict((w, d) for d in declared for w in _wpids(d))
+	by_codename = dict((d.codename, d) for d in declared)
+	for d in declared:
+		# a codename is only found as a wpid if some device has it as its wpid
+		assert _descriptors.get_wpid(d.codename) is by_wpid.get(d.codename)
+		for w in _wpids(d):
+			assert _descriptors.get_codename(w) is by_codename.get(w)
@@ -0,0 +1,153 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+
+from logitech_receiver import hidpp10 as _hidpp10
+from logitech_receiver.hidpp10 import REGISTERS as _R
+
+
+class _Device(object):
+	"""Answers every register read with its number and params, counting the requests."""
+
+	def __init__(self):
+		self._register_cache = _hidpp10.RegisterCache()
+		self.requests = []
+
+	def __bool__(self):
+		return True
+	__nonzero__ = __bool__
+
+	def request(self, request_id, *params):
+		self.requests.append((request_id, ) + params)
+		return bytes(bytearray([request_id & 0xFF, len(self.requests)]))
+
+	def request_many(self, requests):
+		return [self.request(*r) for r in requests]
+
+
+class _Clock(object):
+	def __init__(self):
+		self.now = 1000.0
+
+	def __call__(self):
+		return self.now
+
+
+def _clock(monkeypatch):
+	clock = _Clock()
+	monkeypatch.setattr(_hidpp10, '_timestamp', clock)
+	return clock
+
+
+def test_ttl_expiry(monkeypatch):
+	clock = _clock(monkeypatch)
+	d = _Device()
+
+	first = _hidpp10.read_register(d, _R.battery_status)
+	clock.now += _hidpp10.REGISTER_TTL[_R.battery_status] - 1
+	assert _hidpp10.read_register(d, _R.battery_status) == first
+	assert len(d.requests) == 1
+
+	clock.now += 2
+	assert _hidpp10.read_register(d, _R.battery_status) != first
+	assert len(d.requests) == 2
+
+
+def test_max_age(monkeypatch):
+	clock = _clock(monkeypatch)
+	d = _Device()
+
+	_hidpp10.read_register(d, _R.receiver_info, 0x03)
+	clock.now += 3600
+	_hidpp10.read_register(d, _R.receiver_info, 0x03)
+	assert len(d.requests) == 1
+
+	_hidpp10.read_register(d, _R.receiver_info, 0x03, max_age=10)
+	assert len(d.requests) == 2
+	_hidpp10.read_register(d, _R.receiver_info, 0x03, max_age=10)
+	assert len(d.requests) == 2
+	_hidpp10.read_register(d, _R.receiver_info, 0x03, max_age=0)
+	assert len(d.requests) == 3
+
+
+def test_uncached_register(monkeypatch):
+	_clock(monkeypatch)
+	d = _Device()
+
+	_hidpp10.read_register(d, _R.three_leds)
+	_hidpp10.read_register(d, _R.three_leds)
+	assert len(d.requests) == 2
+	assert not d._register_cache
+
+
+def test_notifications_write_invalidates_read(monkeypatch):
+	_clock(monkeypatch)
+	d = _Device()
+
+	first = _hidpp10.read_register(d, _R.notifications)
+	assert _hidpp10.read_register(d, _R.notifications) == first
+	assert len(d.requests) == 1
+
+	_hidpp10.write_register(d, _R.notifications, b'\x00\x01\x00')
+	assert len(d.requests) == 2
+	assert _hidpp10.read_register(d, _R.notifications) != first
+	assert len(d.requests) == 3
+
+
+def test_pairing_write_invalidates_slots(monkeypatch):
+	_clock(monkeypatch)
+	d = _Device()
+
+	_hidpp10.read_registers(d, (_R.receiver_connection, ), (_R.receiver_info, 0x20), (_R.receiver_info, 0x21),
+					(_R.firmware, 0x01))
+	assert len(d.requests) == 4
+	_hidpp10.read_registers(d, (_R.receiver_connection, ), (_R.receiver_info, 0x20), (_R.receiver_info, 0x21),
+					(_R.firmware, 0x01))
+	assert len(d.requests) == 4
+
+	_hidpp10.write_register(d, _R.receiver_pairing, 0x03, 0x01)
+	assert list(d._register_cache) == [(int(_R.firmware), 0x01)]
+
+	_hidpp10.read_registers(d, (_R.receiver_connection, ), (_R.receiver_info, 0x20), (_R.receiver_info, 0x21),
+					(_R.firmware, 0x01))
+	assert len(d.requests) == 4 + 1 + 3
+
+
+def test_invalidate_one(monkeypatch):
+	_clock(monkeypatch)
+	d = _Device()
+
+	_hidpp10.read_registers(d, (_R.receiver_info, 0x20), (_R.receiver_info, 0x21))
+	_hidpp10.invalidate_registers(d, _R.receiver_info, 0x20)
+	assert list(d._register_cache) == [(int(_R.receiver_info), 0x21)]
+	_hidpp10.invalidate_registers(d)
+	assert not d._register_cache
+
+
+def test_read_during_invalidation_not_stored(monkeypatch):
+	_clock(monkeypatch)
+	d = _Device()
+	started = threading.Event()
+	release = threading.Event()
+	request = d.request
+
+	def _held_request(request_id, *params):
+		started.set()
+		release.wait(5)
+		return request(request_id, *params)
+	d.request = _held_request
+
+	t = threading.Thread(target=_hidpp10.read_register, args=(d, _R.receiver_connection))
+	t.start()
+	assert started.wait(5)
+	generation = d._register_cache.generation
+	_hidpp10.invalidate_registers(d, _R.receiver_connection)
+	assert d._register_cache.generation == generation + 1
+	release.set()
+	t.join(5)
+
+	# what was read before the invalidation is not kept
+	assert not d._register_cache
@@ -0,0 +1,54 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import struct
+
+from logitech_receiver import hidpp20 as _hidpp20
+
+_F = _hidpp20.FEATURE
+
+
+class _Features(list):
+	def index(self, feature_id):
+		return list.index(self, feature_id) + 1
+
+
+class _Device(object):
+	"""Has REPROG_CONTROLS; some keys answer the key info request with an error."""
+
+	def __init__(self, failing):
+		self.online = True
+		self.features = _Features([int(_F.REPROG_CONTROLS)])
+		self.failing = failing
+		self.batches = 0
+
+	def request(self, request_id, *params):
+		assert request_id == 0x0110
+		key = params[0]
+		if key in self.failing:
+			raise _hidpp20.FeatureCallError(number=1, request=request_id, error=0x02, params=params)
+		# cid, task, flags, pos, group, gmask
+		return struct.pack('!HHBBBB', 0x0050 + key, 0x0038, 0, key, 0, 0)
+
+	def request_many(self, requests):
+		self.batches += 1
+		return [self.request(*r) for r in requests]
+
+
+def test_keys_batch_with_errors():
+	d = _Device(failing=(1, ))
+	keys = _hidpp20.KeysArray(d, 3)
+
+	assert keys[0:3][1] is None
+	assert d.batches == 1
+	assert [int(k.key) for k in (keys.keys[0], keys.keys[2])] == [0x0050, 0x0052]
+
+
+def test_keys_batch():
+	d = _Device(failing=())
+	keys = _hidpp20.KeysArray(d, 3)
+
+	assert [int(k.key) for k in keys] == [0x0050, 0x0051, 0x0052]
+	assert d.batches == 1
@@ -0,0 +1,43 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from time import time
+
+from solaar import history as _history
+
+
+def _history_in(tmpdir):
+	return _history.History('4041:12345678', str(tmpdir.join('history.bin')))
+
+
+def test_thresholds_alert_once(tmpdir):
+	h = _history_in(tmpdir)
+	crossed = [h.check_thresholds(level, False) for level in (30, 20, 19, 19, 12, 10, 9, 4, 3)]
+	assert crossed == [None, 20, None, None, None, 10, None, 5, None]
+
+
+def test_thresholds_rearm_after_charging(tmpdir):
+	h = _history_in(tmpdir)
+	assert h.check_thresholds(18, False) == 20
+	assert h.check_thresholds(40, True) is None
+	assert h.check_thresholds(19, False) == 20
+
+
+def test_append_and_reload(tmpdir):
+	now = int(time())
+	h = _history_in(tmpdir)
+	assert h.append(50, False, None, now - 60)
+	# the same sample again, too soon
+	assert not h.append(50, False, None, now - 59)
+	assert h.append(49, False, None, now)
+
+	reloaded = _history_in(tmpdir)
+	assert [(s.timestamp, s.level) for s in reloaded.samples()] == [(now - 60, 50), (now, 49)]
+
+
+def test_discharge_rate():
+	hour = 3600
+	samples = [_history.Sample(i * hour, 100 - 2 * i, False, None) for i in range(6)]
+	assert abs(_history.discharge_rate(samples, now=5 * hour) - 2) < 0.01
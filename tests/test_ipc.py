@@ -0,0 +1,101 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from collections import namedtuple
+
+from solaar import ipc as _ipc
+
+
+_Receiver = namedtuple('_Receiver', ['path'])
+_Device = namedtuple('_Device', ['receiver', 'number', 'kind'])
+
+
+def _device(number=1):
+	return _Device(_Receiver('/dev/test'), number, 'mouse')
+
+
+def _server(*subscribers):
+	server = _ipc._Server('/nonexistent/test.socket')
+	server._subscribers = subscribers
+	return server
+
+
+def test_subscriber_in_order():
+	sub = _ipc._Subscriber(None)
+	for n in range(3):
+		sub.push(n)
+	assert [sub.pop() for n in range(3)] == [0, 1, 2]
+	assert not sub.evicted
+
+
+def test_subscriber_evicted_when_behind():
+	sub = _ipc._Subscriber(None)
+	for n in range(_ipc._SUBSCRIBER_BUFFER):
+		sub.push(n)
+	assert not sub.evicted
+
+	sub.push(_ipc._SUBSCRIBER_BUFFER)
+	assert sub.evicted
+	# what was buffered is dropped, not sent after the eviction notice
+	assert sub.pop() is None
+	sub.push(0)
+	assert sub.pop() is None
+
+
+def test_subscriber_closed_wakes_pop():
+	sub = _ipc._Subscriber(None)
+	popped = []
+	t = threading.Thread(target=lambda: popped.append(sub.pop()))
+	t.start()
+	sub.close()
+	t.join(5)
+	assert popped == [None]
+
+
+def test_update_only_changes():
+	server = _server()
+	d = _device()
+
+	assert server._update(d, {'paired': True, 'battery': 50, 'online': True}) == \
+					{'paired': True, 'battery': 50, 'online': True}
+	assert server._update(d, {'paired': True, 'battery': 45, 'online': True}) == {'battery': 45}
+	assert server._update(d, {'paired': True, 'battery': 45, 'online': True}) == {}
+
+	assert server._update(d, {'settings': {'dpi': 800, 'fn-swap': True}}) == {'settings': {'dpi': 800, 'fn-swap': True}}
+	assert server._update(d, {'settings': {'dpi': 1600, 'fn-swap': True}}) == {'settings': {'dpi': 1600}}
+
+
+def test_update_forgets_unpaired():
+	server = _server()
+	d = _device()
+
+	server._update(d, {'paired': True, 'battery': 50})
+	server._update(_device(2), {'paired': True, 'battery': 20})
+	assert server._update(d, {'paired': False, 'battery': None}) == {'paired': False, 'battery': None}
+	assert list(server._states) == [('/dev/test', 2)]
+
+	# paired again, everything is new
+	assert server._update(d, {'paired': True, 'battery': 50}) == {'paired': True, 'battery': 50}
+
+
+def test_publish_filters_fields():
+	everything = _ipc._Subscriber(None)
+	battery = _ipc._Subscriber(None, ['battery'])
+	online = _ipc._Subscriber(None, ['online'])
+	server = _server(everything, battery, online)
+	d = _device()
+
+	server.publish(d, {'battery': 50, 'online': True})
+	server.publish(d, {'battery': 45, 'online': True}, alert=1, reason='low')
+
+	assert [e['changed'] for e in (everything.pop(), everything.pop())] == [{'battery': 50, 'online': True},
+					{'battery': 45}]
+	assert battery.pop()['changed'] == {'battery': 50}
+	assert battery.pop() == {'event': 'changed', 'receiver': '/dev/test', 'number': 1,
+					'changed': {'battery': 45}, 'alert': 1, 'reason': 'low'}
+	assert online.pop()['changed'] == {'online': True}
+	# nothing else was sent to it
+	assert not online._queue
@@ -0,0 +1,134 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from collections import namedtuple
+
+from logitech_receiver import receiver as _receiver
+from logitech_receiver.hidpp10 import REGISTERS as _R
+
+
+_DeviceInfo = namedtuple('_DeviceInfo', ['path', 'product_id', 'serial'])
+
+
+class _Registers(object):
+	"""Answers the pairing registers, optionally holding the first read."""
+
+	def __init__(self, hold=False):
+		self.reads = []
+		self.started = threading.Event()
+		self.release = threading.Event()
+		if not hold:
+			self.release.set()
+
+	def __call__(self, device, *registers):
+		self.reads.append(registers)
+		self.started.set()
+		self.release.wait(5)
+		return [bytes(bytearray([sub])) for _ignore, sub in registers]
+
+
+def _open(monkeypatch, registers):
+	monkeypatch.setattr(_receiver._hidpp10, 'read_registers', registers)
+	monkeypatch.setattr(_receiver._base, 'close', lambda handle: True)
+	r = _receiver.Receiver(1, _DeviceInfo('/dev/test-%d' % id(registers), 'c52b', None))
+	r._capabilities['max_devices'] = 6
+	return r
+
+
+def test_pairing_info_read_once(monkeypatch):
+	registers = _Registers(hold=True)
+	r = _open(monkeypatch, registers)
+
+	results = []
+	threads = [threading.Thread(target=lambda n=n: results.append(r.pairing_info(n))) for n in (1, 2, 3)]
+	for t in threads:
+		t.start()
+	assert registers.started.wait(5)
+	registers.release.set()
+	for t in threads:
+		t.join(5)
+
+	assert len(registers.reads) == 1
+	assert len(registers.reads[0]) == 3 * 6
+	assert sorted(p.pairing for p in results) == [b'\x20', b'\x21', b'\x22']
+
+
+def test_pairing_write_drops_pairing_info(monkeypatch):
+	registers = _Registers()
+	r = _open(monkeypatch, registers)
+	monkeypatch.setattr(_receiver._hidpp10, 'write_register', lambda device, register, *value: b'\x00')
+
+	assert r.pairing_info(2).codename == b'\x41'
+	assert r.pairing_info(4).extended == b'\x33'
+	assert len(registers.reads) == 1
+
+	r.write_register(_R.receiver_pairing, 0x03, 2)
+	r.pairing_info(2)
+	assert len(registers.reads) == 2
+
+
+def test_pairing_write_during_read(monkeypatch):
+	registers = _Registers(hold=True)
+	r = _open(monkeypatch, registers)
+	monkeypatch.setattr(_receiver._hidpp10, 'write_register', lambda device, register, *value: b'\x00')
+
+	t = threading.Thread(target=r.pairing_info, args=(1, ))
+	t.start()
+	assert registers.started.wait(5)
+	r.write_register(_R.receiver_pairing, 0x01, 0x00)
+	registers.release.set()
+	t.join(5)
+
+	# what was read before the write is not kept
+	assert r._pairing_info is None
+
+
+def test_capabilities_kept_across_runs(monkeypatch):
+	store = {}
+	reads = []
+
+	def _read_register(device, register, *params):
+		reads.append((register, ) + params)
+		return b'\x03\x12\x34\x56\x78\x00\x06'
+
+	monkeypatch.setattr(_receiver, 'capabilities_store', store)
+	monkeypatch.setattr(_receiver.Receiver, 'read_register', _read_register)
+	monkeypatch.setattr(_receiver._base, 'open_path', lambda path: 1)
+	monkeypatch.setattr(_receiver._base, 'close', lambda handle: True)
+	info = _DeviceInfo('/dev/test-store', 'c52b', None)
+
+	r = _receiver.Receiver.open(info)
+	assert (r.serial, r.max_devices) == ('12345678', 6)
+	assert len(reads) == 1
+	assert store == {'/dev/test-store:c52b:None': {'serial': '12345678', 'max_devices': 6}}
+
+	# as in a new process
+	monkeypatch.setattr(_receiver, '_capabilities', {})
+	r = _receiver.Receiver.open(info)
+	assert (r.serial, r.max_devices) == ('12345678', 6)
+	assert len(reads) == 1
+
+	# another receiver may be plugged in there now
+	_receiver.Receiver.forget(info)
+	assert store == {}
+	_receiver.Receiver.forget(info)
+
+
+def test_may_unpair_keeps_pairing_info(monkeypatch):
+	registers = _Registers()
+	r = _open(monkeypatch, registers)
+	requests = []
+	monkeypatch.setattr(r, 'request', lambda request_id, *params: requests.append(request_id))
+
+	assert r.may_unpair is False
+	assert not requests
+
+	r.pairing_info(1)
+	assert r.check_may_unpair() is True
+	assert r.check_may_unpair() is True
+	assert requests == [0x80B2]
+	assert r.may_unpair is True
+	assert r._pairing_info is not None
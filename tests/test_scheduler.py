@@ -0,0 +1,106 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import time
+
+from logitech_receiver import scheduler as _scheduler
+
+PRIORITY = _scheduler.PRIORITY
+
+
+def _wait_for(condition):
+	deadline = time.time() + 5
+	while not condition():
+		assert time.time() < deadline
+		time.sleep(0.01)
+
+
+def _request(link, number, priority, granted, hold=None):
+	"""Makes a request in a new thread, recording the order they are granted in."""
+	def _run():
+		with _scheduler.priority(priority):
+			with link.slot(number):
+				granted.append(number)
+				if hold is not None:
+					hold.wait(5)
+
+	t = threading.Thread(target=_run)
+	t.start()
+	return t
+
+
+def test_default_priority():
+	assert _scheduler.current_priority() == PRIORITY.interactive
+	with _scheduler.priority(PRIORITY.background):
+		assert _scheduler.current_priority() == PRIORITY.background
+	assert _scheduler.current_priority() == PRIORITY.interactive
+
+
+def test_background_waits_for_interactive():
+	link = _scheduler.LinkScheduler('test')
+	granted = []
+	with link.slot(1):
+		t = _request(link, 2, PRIORITY.background, granted)
+		_wait_for(lambda: link._waiting)
+		assert granted == []
+	t.join(5)
+	assert granted == [2]
+
+
+def test_interactive_does_not_wait_for_background():
+	link = _scheduler.LinkScheduler('test')
+	hold = threading.Event()
+	granted = []
+	t = _request(link, 1, PRIORITY.background, granted, hold)
+	_wait_for(lambda: granted)
+	with link.slot(2):
+		granted.append('interactive')
+	hold.set()
+	t.join(5)
+	assert granted == [1, 'interactive']
+
+
+def test_background_in_flight_limit():
+	link = _scheduler.LinkScheduler('test')
+	hold = threading.Event()
+	granted = []
+	first = _request(link, 1, PRIORITY.background, granted, hold)
+	_wait_for(lambda: granted)
+	second = _request(link, 2, PRIORITY.background, granted)
+	_wait_for(lambda: link._waiting)
+	assert granted == [1]
+	hold.set()
+	first.join(5)
+	second.join(5)
+	assert granted == [1, 2]
+
+
+def test_devices_take_turns():
+	link = _scheduler.LinkScheduler('test')
+	granted = []
+	_request(link, 1, PRIORITY.background, granted).join(5)
+
+	# queued behind an interactive request, device 1 first
+	threads = []
+	with link.slot(3):
+		threads.append(_request(link, 1, PRIORITY.background, granted))
+		_wait_for(lambda: len(link._waiting) == 1)
+		threads.append(_request(link, 2, PRIORITY.background, granted))
+		_wait_for(lambda: len(link._waiting) == 2)
+	for t in threads:
+		t.join(5)
+	# device 2 was not served yet, so it goes before device 1
+	assert granted == [1, 2, 1]
+
+
+def test_nested_requests():
+	link = _scheduler.LinkScheduler('test')
+	with _scheduler.priority(PRIORITY.background):
+		with link.slot(1):
+			# would wait for itself if it were counted again
+			with link.slot(1):
+				assert link._in_flight[PRIORITY.background] == 1
+	assert link._in_flight == [0, 0, 0]
@@ -0,0 +1,55 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from logitech_receiver import hidpp10 as _hidpp10
+from logitech_receiver import hidpp20 as _hidpp20
+from logitech_receiver.common import Schema
+
+_F = _hidpp20.FEATURE
+
+
+def test_decode_encode():
+	layout = Schema('Pair', '!BH', ('a', 'b'))
+	assert layout.size == 3
+	assert layout.decode(b'\x01\x02\x03\xff') == (1, 0x0203)
+	assert layout.decode(b'\xff\x01\x02\x03', 1).b == 0x0203
+	assert layout.encode(1, 0x0203) == b'\x01\x02\x03'
+
+
+def test_decode_short_or_missing():
+	layout = Schema('Pair', '!BH', ('a', 'b'))
+	assert layout.decode(None) is None
+	assert layout.decode(b'\x01\x02') is None
+	assert layout.decode(b'\x01\x02\x03', 1) is None
+
+
+def test_layouts_compile():
+	for table in (_hidpp20.REPLY, _hidpp20.REQUEST, _hidpp20.EVENT):
+		for (feature, function), layout in table.items():
+			assert feature in _F
+			assert function & 0x0F == 0
+			assert layout.size <= 16
+
+
+def test_battery_register():
+	charge = _hidpp10.parse_battery_status(_hidpp10.REGISTERS.battery_charge, b'\x40\x00\x50')
+	assert charge == (0x40, _hidpp20.BATTERY_STATUS.recharging)
+	assert _hidpp10.parse_battery_status(_hidpp10.REGISTERS.battery_charge, b'\x40') is None
+
+
+def test_feature_event():
+	battery = _hidpp20.EVENT[(_F.BATTERY_STATUS, 0x00)].decode(b'\x46\x14\x00' + b'\x00' * 13)
+	assert (battery.discharge, battery.next_level, battery.status) == (70, 20, 0)
+	wheel = _hidpp20.EVENT[(_F.HIRES_WHEEL, 0x00)].decode(b'\x11\xff\xfe')
+	assert tuple(wheel) == (0x11, -2)
+
+
+def test_touch_points():
+	from logitech_receiver.notifications import _decode_touch_points
+	points = _decode_touch_points(b'\x10\x20\x35\x12' + b'\xff' * 12)
+	assert [tuple(p) for p in points] == [(1, 0x105, 0x203, 2, 1)]
+	# short: only the fingers that fit
+	assert len(_decode_touch_points(b'\xff\xff\xff\x00\x10\x20\x35')) == 0
+	assert len(_decode_touch_points(b'')) == 0
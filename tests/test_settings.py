@@ -0,0 +1,138 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import time
+
+import pytest
+
+from logitech_receiver import settings as _settings
+from logitech_receiver.hidpp20 import FeatureCallError
+
+
+class _Device(object):
+	protocol = 2.0
+	kind = None
+	online = True
+
+
+class _Validator(object):
+	kind = _settings.KIND.choice
+	needs_current_value = False
+
+	def prepare_write(self, value, current_value=None):
+		return bytes(bytearray([value]))
+
+
+class _BlockingRW(object):
+	"""Fails the first write, once told to; the others go through."""
+	kind = _settings.FeatureRW.kind
+
+	def __init__(self):
+		self.started = threading.Event()
+		self.release = threading.Event()
+		self.written = []
+
+	def write(self, device, data_bytes):
+		if not self.started.is_set():
+			self.started.set()
+			self.release.wait(5)
+			raise FeatureCallError(number=1, request=0x0110, error=0x05)
+		self.written.append(data_bytes)
+		return data_bytes
+
+
+def _wait_for(condition):
+	deadline = time.time() + 5
+	while not condition():
+		assert time.time() < deadline
+		time.sleep(0.01)
+
+
+def _setting(rw):
+	return _settings.Setting('test', rw, _Validator())(_Device())
+
+
+def test_write():
+	rw = _BlockingRW()
+	rw.started.set()
+	setting = _setting(rw)
+	assert setting.write(3) == 3
+	assert rw.written == [b'\x03']
+
+
+def test_failed_write_leaves_queued_value():
+	rw = _BlockingRW()
+	setting = _setting(rw)
+	results = {}
+
+	def write(value):
+		try:
+			results[value] = setting.write(value)
+		except FeatureCallError as e:
+			results[value] = e
+
+	first = threading.Thread(target=write, args=(1, ))
+	first.start()
+	assert rw.started.wait(5)
+
+	# queued while the first write is going on, waits for it
+	second = threading.Thread(target=write, args=(2, ))
+	second.start()
+	_wait_for(lambda: setting._queued == 2)
+	time.sleep(0.05)
+	assert 2 not in results
+
+	rw.release.set()
+	first.join(5)
+	second.join(5)
+	assert not first.is_alive() and not second.is_alive()
+
+	assert isinstance(results[1], FeatureCallError)
+	assert results[2] == 2
+	assert rw.written == [b'\x02']
+
+
+def test_failed_write_of_value_waited_for():
+	rw = _BlockingRW()
+	setting = _setting(rw)
+	setting.queue_write(1)
+	setting.queue_write(2)
+	results = {}
+
+	def flush(name):
+		try:
+			results[name] = setting.flush()
+		except FeatureCallError as e:
+			results[name] = e
+
+	writer = threading.Thread(target=flush, args=('writer', ))
+	writer.start()
+	assert rw.started.wait(5)
+
+	# waits for the value the writer is writing
+	waiter = threading.Thread(target=flush, args=('waiter', ))
+	waiter.start()
+	time.sleep(0.05)
+
+	rw.release.set()
+	writer.join(5)
+	waiter.join(5)
+	assert not writer.is_alive() and not waiter.is_alive()
+
+	assert isinstance(results['writer'], FeatureCallError)
+	assert results['waiter'] is None
+	assert rw.written == []
+
+
+def test_failed_write_alone():
+	rw = _BlockingRW()
+	rw.release.set()
+	setting = _setting(rw)
+	with pytest.raises(FeatureCallError):
+		setting.write(1)
+	# nothing left over, the next write goes through
+	assert setting.write(4) == 4
+	assert rw.written == [b'\x04']
@@ -0,0 +1,45 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from logitech_receiver import status as _status
+from logitech_receiver.hidpp20 import BATTERY_STATUS
+
+
+class _Device(object):
+	online = True
+	settings = []
+
+	def __bool__(self):
+		return True
+	__nonzero__ = __bool__
+
+
+def _device_status(monkeypatch):
+	leds = []
+	alerts = []
+	monkeypatch.setattr(_status._hidpp10, 'set_3leds',
+					lambda device, level, charging=None, warning=None: leds.append((level, warning)))
+	status = _status.DeviceStatus(_Device(), lambda device, alert, reason: alerts.append((alert, reason)))
+	# already online, nothing to bring up to date
+	status._active = True
+	return status, leds, alerts
+
+
+def test_low_battery_leds(monkeypatch):
+	status, leds, alerts = _device_status(monkeypatch)
+	status.set_battery_info(50, BATTERY_STATUS.discharging)
+	status.set_battery_info(5, BATTERY_STATUS.discharging)
+	status.set_battery_info(30, BATTERY_STATUS.recharging)
+	assert leds == [(50, False), (5, True), (30, False)]
+	# a low level is alerted for by the battery history
+	assert not any(a & _status.ALERT.ATTENTION for a, r in alerts)
+
+
+def test_battery_error_alerted_once(monkeypatch):
+	status, leds, alerts = _device_status(monkeypatch)
+	status.set_battery_info(50, BATTERY_STATUS.invalid_battery)
+	status.set_battery_info(40, BATTERY_STATUS.invalid_battery)
+	assert [bool(a & _status.ALERT.ATTENTION) for a, r in alerts] == [True, False]
+	assert leds == [(50, True), (40, True)]
@@ -0,0 +1,94 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+
+import pytest
+
+from solaar import tasks as _tasks
+
+
+@pytest.fixture
+def pool():
+	pool = _tasks.TaskPool('test', workers=1)
+	pool.start()
+	yield pool
+	pool.stop()
+
+
+def _block(pool):
+	# keeps the only worker busy until the returned event is set
+	started, release = threading.Event(), threading.Event()
+
+	def blocker():
+		started.set()
+		release.wait(5)
+	pool.submit(None, _tasks.PRIORITY_HIGH, False, blocker)
+	assert started.wait(5)
+	return release
+
+
+def _run_all(pool, release):
+	done = threading.Event()
+	pool.submit(None, _tasks.PRIORITY_LOW, False, done.set)
+	release.set()
+	assert done.wait(5)
+
+
+def _record(calls, name):
+	calls.append(name)
+
+
+def test_identical_pending_tasks_run_once(pool):
+	calls = []
+	release = _block(pool)
+	for i in range(5):
+		assert pool.submit('device', _tasks.PRIORITY_NORMAL, True, _record, calls, 'read')
+	_run_all(pool, release)
+	assert calls == ['read']
+
+
+def test_different_arguments_all_run(pool):
+	calls = []
+	release = _block(pool)
+	pool.submit('device', _tasks.PRIORITY_NORMAL, True, _record, calls, 'a')
+	pool.submit('device', _tasks.PRIORITY_NORMAL, True, _record, calls, 'b')
+	_run_all(pool, release)
+	assert calls == ['a', 'b']
+
+
+def test_higher_priority_runs_first_for_a_key(pool):
+	calls = []
+	release = _block(pool)
+	pool.submit('device', _tasks.PRIORITY_NORMAL, True, _record, calls, 'read 1')
+	pool.submit('device', _tasks.PRIORITY_NORMAL, True, _record, calls, 'read 2')
+	pool.submit('device', _tasks.PRIORITY_HIGH, False, _record, calls, 'write 1')
+	pool.submit('device', _tasks.PRIORITY_HIGH, False, _record, calls, 'write 2')
+	_run_all(pool, release)
+	assert calls == ['write 1', 'write 2', 'read 1', 'read 2']
+
+
+def test_cancel_drops_only_cancellable(pool):
+	calls = []
+	release = _block(pool)
+	pool.submit('device', _tasks.PRIORITY_NORMAL, True, _record, calls, 'read')
+	pool.submit('device', _tasks.PRIORITY_HIGH, False, _record, calls, 'write')
+	pool.submit('other', _tasks.PRIORITY_NORMAL, True, _record, calls, 'other read')
+	pool.cancel('device')
+	_run_all(pool, release)
+	assert calls == ['write', 'other read']
+
+
+def test_full_queue_drops_lowest_priority(pool):
+	calls = []
+	pool.maxsize = 2
+	release = _block(pool)
+	assert pool.submit(None, _tasks.PRIORITY_LOW, False, _record, calls, 'low')
+	assert pool.submit(None, _tasks.PRIORITY_NORMAL, False, _record, calls, 'normal')
+	assert not pool.submit(None, _tasks.PRIORITY_LOW, False, _record, calls, 'dropped')
+	assert pool.submit(None, _tasks.PRIORITY_HIGH, False, _record, calls, 'high')
+	pool.maxsize = 32
+	_run_all(pool, release)
+	assert calls == ['high', 'normal']
@@ -0,0 +1,100 @@
+# -*- python-mode -*-
+# -*- coding: UTF-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from binascii import unhexlify
+
+from hidapi import udev as _udev
+from logitech_receiver import base_usb as _base_usb
+
+# vendor collections declaring the HID++ short and long reports
+_HIDPP_DESCRIPTOR = unhexlify('0600ff0901a1018510750895069501150026ff000901810009019100c0'
+							'0600ff0902a1018511750895139501150026ff000902810009029100c0')
+# a mouse, no report ids; with a long item in the middle
+_MOUSE_DESCRIPTOR = unhexlify('05010902a101fe020011220509c0')
+
+
+class _Attributes(dict):
+	def asint(self, name):
+		return int(self[name])
+
+
+class _Device(dict):
+	def __init__(self, node=None, parents=None, attributes=None, sys_path=None, **properties):
+		super(_Device, self).__init__(**properties)
+		self.device_node = node
+		self.sys_path = sys_path
+		self.parents = parents or {}
+		self.attributes = _Attributes(attributes or {})
+
+	def find_parent(self, subsystem, device_type=None):
+		return self.parents.get((subsystem, device_type))
+
+
+class _Descriptor(object):
+	"""A sysfs report descriptor, counting how many times it is read."""
+	def __init__(self, descriptor):
+		self.descriptor = descriptor
+		self.reads = 0
+
+	def __call__(self):
+		self.reads += 1
+		return self.descriptor
+
+
+class _HidAttributes(_Attributes):
+	def get(self, name, default=None):
+		value = super(_HidAttributes, self).get(name, default)
+		return value() if callable(value) else value
+
+
+def _hidraw(node, interface, descriptor, product_id='c52b', instance=1):
+	usb = _Device(ID_VENDOR_ID='046d', ID_MODEL_ID=product_id)
+	hid = _Device(DRIVER='hid-generic', sys_path='/sys/devices/0003:046D:%s.%04X' % (product_id.upper(), instance))
+	hid.attributes = _HidAttributes(report_descriptor=descriptor)
+	intf = _Device(attributes={'bInterfaceNumber': interface})
+	return _Device(node, {('usb', 'usb_device'): usb, ('hid', None): hid, ('usb', 'usb_interface'): intf})
+
+
+def test_report_ids():
+	assert _udev._parse_report_ids(_HIDPP_DESCRIPTOR) == frozenset((0x10, 0x11))
+	assert _udev._parse_report_ids(_MOUSE_DESCRIPTOR) == frozenset()
+
+
+def test_match_by_report_descriptor():
+	receiver = _base_usb.UNIFYING_RECEIVER_C52B
+	# the right interface number, but not the HID++ interface
+	assert _udev._match('add', _hidraw('/dev/hidraw0', 2, _MOUSE_DESCRIPTOR), *receiver) is None
+	# the HID++ interface, whatever its number
+	info = _udev._match('add', _hidraw('/dev/hidraw1', 1, _HIDPP_DESCRIPTOR), *receiver)
+	assert info.path == '/dev/hidraw1'
+
+
+def test_match_node_reused():
+	receiver = _base_usb.UNIFYING_RECEIVER_C52B
+	assert _udev._match('add', _hidraw('/dev/hidraw1', 2, _HIDPP_DESCRIPTOR), *receiver)
+	# replugged, the node now belongs to another interface of the receiver
+	assert _udev._match('add', _hidraw('/dev/hidraw1', 0, _MOUSE_DESCRIPTOR, instance=2), *receiver) is None
+
+
+def test_report_ids_cached():
+	receiver = _base_usb.UNIFYING_RECEIVER_C52B
+	descriptor = _Descriptor(_HIDPP_DESCRIPTOR)
+	device = _hidraw('/dev/hidraw3', 2, descriptor)
+	assert _udev._match('add', device, *receiver)
+	assert _udev._match('add', device, *receiver)
+	assert descriptor.reads == 1
+
+	# until the device is removed
+	_udev._match('remove', device, *receiver)
+	assert _udev._match('add', device, *receiver)
+	assert descriptor.reads == 2
+
+
+def test_match_unknown_receiver():
+	catch_all = _base_usb.OTHER_RECEIVER
+	assert _udev._match('add', _hidraw('/dev/hidraw4', 2, _HIDPP_DESCRIPTOR, product_id='c548'), *catch_all)
+	assert _udev._match('add', _hidraw('/dev/hidraw5', 0, _MOUSE_DESCRIPTOR, product_id='c548'), *catch_all) is None
+	# not by interface number alone
+	assert _udev._match('add', _hidraw('/dev/hidraw-missing', 2, None, product_id='c548'), *catch_all) is None